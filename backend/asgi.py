@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
+from core.staticfiles import StaticFilesASGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Static files are answered before Django; see core.staticfiles. With DEBUG
+# on and no manifest, runserver's finders serve the app directories, and a
+# leftover STATIC_ROOT must not shadow them.
+if not settings.DEBUG or settings.STATIC_MANIFEST:
+    application = StaticFilesASGI(application)
@@ -0,0 +1,25 @@
+"""
+Settings package. DJANGO_ENV selects the environment:
+
+    dev (default)   backend/settings/dev.py
+    prod            backend/settings/prod.py
+    test            backend/settings/test.py (the default for manage.py test)
+
+All three extend backend/settings/base.py, so DJANGO_SETTINGS_MODULE stays
+'backend.settings'. A module can also be named directly, e.g.
+DJANGO_SETTINGS_MODULE=backend.settings.prod.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+elif DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif DJANGO_ENV == 'test':
+    from .test import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(f"DJANGO_ENV must be dev, prod or test, not {DJANGO_ENV!r}.")
@@ -0,0 +1,396 @@
+"""
+Django settings for backend project, shared by every environment.
+
+DJANGO_ENV picks dev.py (the default), prod.py or test.py, which start from
+these settings and change their defaults (see backend/settings/__init__.py).
+Anything that differs between deployments is read from the environment.
+
+Generated by 'django-admin startproject' using Django 5.1.6.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.1/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def env_bool(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_list(name, default=''):
+    """Comma-separated environment variable as a list."""
+    return [item.strip() for item in os.environ.get(name, default).split(',') if item.strip()]
+
+
+# SECURITY WARNING: keep the secret key used in production secret!
+# prod.py refuses to start without SECRET_KEY; this one is for development
+SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-z=*z3mlqs=f$@dsrme7q9#y4&wkas@e@810*c*r0z3$+%k8&o3')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+# With DEBUG on, Django also keeps every SQL statement of a request in memory
+DEBUG = env_bool('DEBUG')
+
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS')
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'core',
+
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.TemplateProfilingMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'backend.urls'
+
+# Parsed templates are kept in memory by the cached loader (runserver's
+# autoreloader clears it when a template changes). TEMPLATE_CACHE=0 re-reads
+# templates from disk on every render instead. On the caregiver dashboard the
+# loader makes no measurable difference (bench_templates, 2000 rows: ~163 ms
+# per render either way): rendering the rows dominates, mostly the per-row
+# {% url %} and date formatting, not loading the templates.
+TEMPLATE_SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATE_CACHE = env_bool('TEMPLATE_CACHE', True)
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': [('django.template.loaders.cached.Loader', TEMPLATE_SOURCE_LOADERS)] if TEMPLATE_CACHE else TEMPLATE_SOURCE_LOADERS,
+        },
+    },
+]
+
+WSGI_APPLICATION = 'backend.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+
+# DB_ENGINE=sqlite (default) or postgres, see the DB_* variables below.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'elderease'),
+            'USER': os.environ.get('DB_USER', 'elderease'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Persistent connections; Django's pool replaces them when enabled
+            'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', True),
+            'OPTIONS': {},
+        }
+    }
+    if DB_POOL_MAX_SIZE:
+        # Requires psycopg[pool]
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds to wait for a lock before "database is locked"
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)),
+                # Take the write lock up front instead of failing to upgrade
+                # a read lock half-way through a transaction
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Applied to every new SQLite connection by core.signals.configure_sqlite_connection.
+# These only last for the connection; WAL mode is stored in the database
+# file and set once, by migration 0011_sqlite_wal.
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20)) * 1000,
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024)),
+    'temp_store': 'MEMORY',
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    
+]
+
+# Password hashing: PASSWORD_HASHER=pbkdf2 (default), argon2 (needs argon2-cffi)
+# or scrypt. Hashes made with the others still verify and are upgraded to
+# the preferred hasher, or to new cost settings, at the next login.
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'scrypt': 'core.hashers.ScryptPasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 870000))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_KB = int(os.environ.get('PASSWORD_ARGON2_MEMORY_KB', 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get('PASSWORD_SCRYPT_BLOCK_SIZE', 8))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get('PASSWORD_SCRYPT_PARALLELISM', 1))
+
+# Password checks run on a pool of LOGIN_HASH_WORKERS threads; past
+# LOGIN_HASH_QUEUE waiting or running checks, logins are refused (a 503 from
+# the login page, a form error on the admin's). The pool caps hashing CPU;
+# only the async login view (under ASGI) frees the worker while it waits,
+# the sync views' request threads still block on their check.
+AUTHENTICATION_BACKENDS = ['core.backends.PooledModelBackend']
+LOGIN_HASH_WORKERS = int(os.environ.get('LOGIN_HASH_WORKERS', os.cpu_count() or 1))
+LOGIN_HASH_QUEUE = int(os.environ.get('LOGIN_HASH_QUEUE', 4 * LOGIN_HASH_WORKERS))
+LOGIN_HASH_TIMEOUT = int(os.environ.get('LOGIN_HASH_TIMEOUT', 10))
+
+# Login/signup throttling (core.middleware.RateLimitMiddleware): POSTs per
+# URL name, keyed by client IP and by the submitted form field. The
+# LocMemStore counts per process; CacheStore shares counts through a cache
+# alias (RATE_LIMIT_STORE_OPTIONS = {'alias': 'default'}), e.g. Redis.
+RATE_LIMIT_ENABLED = env_bool('RATE_LIMIT_ENABLED', True)
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'core.ratelimit.LocMemStore')
+RATE_LIMIT_STORE_OPTIONS = {}
+# Set to HTTP_X_FORWARDED_FOR behind a reverse proxy
+RATE_LIMIT_IP_HEADER = os.environ.get('RATE_LIMIT_IP_HEADER', 'REMOTE_ADDR')
+RATE_LIMITS = {
+    'login': {'ip': '30/m', 'email': '10/m'},
+    'async_login': {'ip': '30/m', 'email': '10/m'},
+    'admin:login': {'ip': '30/m', 'username': '10/m'},
+    'signup': {'ip': '10/h'},
+}
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
+
+STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# STATIC_MANIFEST=1: collectstatic writes content-hashed names plus .gz/.br
+# copies, and {% static %} links to the hashed names (requires collectstatic)
+STATIC_MANIFEST = env_bool('STATIC_MANIFEST')
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': ('core.staticfiles.CompressedManifestStaticFilesStorage' if STATIC_MANIFEST
+                    else 'django.contrib.staticfiles.storage.StaticFilesStorage'),
+    },
+}
+# Cache lifetime of static files without a content hash in their name
+# (hashed ones are immutable); see core.staticfiles
+STATIC_MAX_AGE = 60
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+STATICFILES_DIRS = [
+    BASE_DIR / 'core/static',
+]
+
+# Responsive image variants built by `manage.py build_images` (not committed)
+IMAGE_SOURCE_DIRS = [BASE_DIR / 'core/static']
+IMAGE_BUILD_DIR = BASE_DIR / 'build/static'
+IMAGE_MANIFEST_PATH = BASE_DIR / 'build/images.json'
+IMAGE_WIDTHS = [480, 960, 1600]
+IMAGE_QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 78}
+if IMAGE_BUILD_DIR.exists():
+    STATICFILES_DIRS.append(IMAGE_BUILD_DIR)
+AUTH_USER_MODEL = 'core.CustomUser'
+
+# Caregiver dashboard keyset pagination
+CAREGIVER_DASHBOARD_PAGE_SIZE = 25
+CAREGIVER_DASHBOARD_MAX_PAGE_SIZE = 100
+
+# Offline gazetteer used to geocode profile locations (name,latitude,longitude)
+GAZETTEER_PATH = BASE_DIR / 'core/data/gazetteer.csv'
+
+# How far ahead recurring schedules are written out as Schedule rows
+SCHEDULE_MATERIALIZE_DAYS = 14
+
+# Rows fetched per database round trip by the streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+# Bulk schedule uploads: rows per INSERT, and rows accepted per request
+BULK_SCHEDULE_BATCH_SIZE = 500
+BULK_SCHEDULE_MAX_ROWS = 5000
+# Rows validated and written per transaction by the import_profiles command
+PROFILE_IMPORT_BATCH_SIZE = 1000
+
+# Full-text search backend: core.search.SQLiteFTSBackend or
+# core.search.PostgresSearchBackend; defaults to the one for DB_ENGINE
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', (
+    'core.search.PostgresSearchBackend' if DB_ENGINE == 'postgres' else 'core.search.SQLiteFTSBackend'
+))
+SEARCH_ADMIN_LIMIT = 1000
+
+# Cache: CACHE_BACKEND=locmem (default), file or redis; CACHE_LOCATION overrides
+# the location. locmem is the local stand-in for a shared Redis server.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'elderease'),
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/0'),
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Backends every worker process shares; locmem is per process, so what one
+# worker invalidates the others would keep serving
+SHARED_CACHE_BACKENDS = ('file', 'redis')
+
+# Sessions: SESSION_BACKEND=cached_db (reads from the cache, falls back to
+# the database; the default with a shared cache), db (the default
+# otherwise), or cache (Redis only: a locmem cache would lose sessions
+# between worker processes)
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db' if CACHE_BACKEND in SHARED_CACHE_BACKENDS else 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'default'
+# request.user is loaded from this cache when it is shared (None loads it
+# from the database). CustomUser saves and deletes invalidate it
+# (core.signals); QuerySet.update() and bulk_update() send no signals, so
+# their changes show after at most USER_CACHE_TIMEOUT seconds.
+USER_CACHE_ALIAS = 'default' if CACHE_BACKEND in SHARED_CACHE_BACKENDS else None
+USER_CACHE_TIMEOUT = 300
+
+# Per-request query instrumentation (core.middleware.QueryInstrumentationMiddleware)
+QUERY_INSTRUMENTATION = env_bool('QUERY_INSTRUMENTATION')
+# Per-request template and block render times (core.middleware.TemplateProfilingMiddleware)
+TEMPLATE_PROFILING = env_bool('TEMPLATE_PROFILING')
+# Maximum queries per request, by URL name; enforced in core/tests.py
+QUERY_BUDGETS = {
+    'home': 0,
+    'login': 9,
+    'signup': 2,
+    'caregiver_dashboard': 5,
+    'create_caregiver_profile': 3,
+    'confirm_caregiving': 7,
+    'family_dashboard': 3,
+    'create_elderly_profile': 2,
+    'set_schedule': 3,
+    'set_recurring_schedule': 3,
+    'export_schedules': 3,
+    'bulk_schedules': 17,
+    'async_login': 9,
+    'async_caregiver_dashboard': 5,
+    'async_confirm_caregiving': 7,
+    'async_family_dashboard': 3,
+    'async_set_schedule': 3,
+    'admin:core_schedule_changelist': 6,
+    'admin:core_elderlyprofile_changelist': 7,
+    'admin:core_caregiverprofile_changelist': 6,
+    'admin:core_schedule_change': 11,
+}
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        # Replaces Django's default, which only logs to the console with DEBUG on
+        'django': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'core.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.templates': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
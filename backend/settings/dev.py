@@ -0,0 +1,4 @@
+"""Local development: DEBUG on, everything in process (locmem cache, SQLite)."""
+from .base import *  # noqa: F401,F403
+
+DEBUG = env_bool('DEBUG', True)
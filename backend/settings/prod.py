@@ -0,0 +1,45 @@
+"""
+Production (DJANGO_ENV=prod). Defaults: DEBUG off, SECRET_KEY and
+ALLOWED_HOSTS required from the environment, cached templates, persistent
+database connections, a Redis cache shared by the workers (sessions,
+request.user, fragments and rate limits) and precompressed, content-hashed
+static files (run collectstatic on deploy). Each can be overridden with the
+environment variables read here and in base.py.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = env_bool('DEBUG', False)
+
+if 'SECRET_KEY' not in os.environ:
+    raise ImproperlyConfigured("Set SECRET_KEY in the environment for DJANGO_ENV=prod.")
+if not ALLOWED_HOSTS:
+    raise ImproperlyConfigured("Set ALLOWED_HOSTS (comma-separated) in the environment for DJANGO_ENV=prod.")
+CSRF_TRUSTED_ORIGINS = env_list('CSRF_TRUSTED_ORIGINS')
+SESSION_COOKIE_SECURE = CSRF_COOKIE_SECURE = env_bool('SECURE_COOKIES', True)
+
+# The cached loader, whatever TEMPLATE_CACHE says
+TEMPLATES[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', TEMPLATE_SOURCE_LOADERS)]
+
+# Keep connections (and SQLite's PRAGMA setup) open between requests;
+# base.py already decides this for Postgres, where its pool needs 0
+DATABASES['default'].setdefault('CONN_MAX_AGE', int(os.environ.get('DB_CONN_MAX_AGE', 600)))
+DATABASES['default'].setdefault('CONN_HEALTH_CHECKS', True)
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis')
+CACHES = {'default': CACHE_BACKENDS[CACHE_BACKEND]}
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db' if CACHE_BACKEND in SHARED_CACHE_BACKENDS else 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+USER_CACHE_ALIAS = 'default' if CACHE_BACKEND in SHARED_CACHE_BACKENDS else None
+if CACHE_BACKEND == 'redis':
+    # Count login attempts across workers
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'core.ratelimit.CacheStore')
+
+STATIC_MANIFEST = env_bool('STATIC_MANIFEST', True)
+if STATIC_MANIFEST:
+    STORAGES = {**STORAGES, 'staticfiles': {'BACKEND': 'core.staticfiles.CompressedManifestStaticFilesStorage'}}
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 3600))
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'WARNING')
+LOGGING['root']['level'] = LOGGING['loggers']['django']['level'] = LOG_LEVEL
@@ -0,0 +1,18 @@
+"""
+Test runs (DJANGO_ENV=test, which ``manage.py test`` picks when DJANGO_ENV
+is not set): DEBUG off as in production, but with per-process stores and
+plain static files, so no Redis or collectstatic is needed.
+"""
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+# Tests create many users; LoginTests sets its own iteration counts
+PASSWORD_PBKDF2_ITERATIONS = 1000
+
+CACHES = {'default': CACHE_BACKENDS['locmem']}
+RATE_LIMIT_STORE = 'core.ratelimit.LocMemStore'
+STATIC_MANIFEST = False
+STORAGES = {**STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+QUERY_INSTRUMENTATION = False
+TEMPLATE_PROFILING = False
@@ -1,7 +1,30 @@
 # core/admin.py
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.forms import AdminAuthenticationForm
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, CaregiverProfile, ElderlyProfile, Schedule
+from django.core.exceptions import ValidationError
+from django.db.models import Case, Q, Value, When
+from .backends import LoginBusy
+from .geo import load_gazetteer, locate
+from .models import CustomUser, CaregiverProfile, ElderlyProfile, Schedule, ScheduleRule, MonthlyInvoice, Task, ScheduleTask
+from .pagination import EstimatedCountPaginator
+from .search import get_backend
+from .task_catalogue import parse_task_list
+
+
+class AdminLoginForm(AdminAuthenticationForm):
+    """Shows a full hashing pool as a form error instead of a server error."""
+
+    def clean(self):
+        try:
+            return super().clean()
+        except LoginBusy:
+            raise ValidationError("We're handling a lot of logins right now. Please try again in a moment.",
+                                  code='busy')
+
+
+admin.site.login_form = AdminLoginForm
 
 
 @admin.register(CustomUser)
@@ -9,8 +32,12 @@ class CustomUserAdmin(UserAdmin):
     model = CustomUser
     list_display = ('email', 'username', 'role', 'is_staff', 'is_active')
     list_filter = ('role', 'is_staff', 'is_active')
-    search_fields = ('email', 'username')
+    # Exact matches, so each lookup can use its column's unique index
+    search_fields = ('email__exact', 'username__exact')
+    search_help_text = "Searches an exact email or username."
     ordering = ('email',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
 
     fieldsets = (
         (None, {'fields': ('email', 'username', 'password', 'role')}),
@@ -25,24 +52,186 @@ class CustomUserAdmin(UserAdmin):
     )
 
 
+class GenderFilter(admin.SimpleListFilter):
+    """
+    Gender with fixed choices, so rendering the changelist does not run a
+    DISTINCT over the whole table. A filtered page reads the table in id
+    order and stops after a page, since either value matches many rows.
+    """
+    title = 'gender'
+    parameter_name = 'gender'
+
+    def lookups(self, request, model_admin):
+        return (('female', 'Female'), ('male', 'Male'))
+
+    def queryset(self, request, queryset):
+        if self.value():
+            # Free text, however it was capitalised
+            return queryset.filter(gender__iexact=self.value())
+        return queryset
+
+
+class AreaFilter(admin.SimpleListFilter):
+    """
+    Area from the gazetteer instead of the free-text location, so the
+    choices need no DISTINCT over the table. Profiles geocoded to the area
+    share its geohash, which is indexed.
+    """
+    title = 'area'
+    parameter_name = 'area'
+    # Lookup from the filtered model to ElderlyProfile
+    elderly_path = None
+
+    def lookups(self, request, model_admin):
+        return [(name, name.title()) for name in sorted(load_gazetteer())]
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        geohash = locate(self.value())[2]
+        if not geohash:
+            # Not a gazetteer name; '' would match the profiles never geocoded
+            return queryset.none()
+        if self.elderly_path is None:
+            return queryset.filter(geohash=geohash)
+        return queryset.filter(**{f'{self.elderly_path}__in': ElderlyProfile.objects.filter(geohash=geohash)})
+
+
+class VisitAreaFilter(AreaFilter):
+    """Visits by the area their elderly person lives in."""
+    elderly_path = 'elderly'
+
+
 @admin.register(CaregiverProfile)
 class CaregiverProfileAdmin(admin.ModelAdmin):
     list_display = ('name', 'user', 'phone', 'gender',
                     'dob', 'emergency_contact')
-    search_fields = ('name', 'phone', 'user__email')
-    list_filter = ('gender',)
+    # The email must match exactly and the phone number by prefix, see
+    # get_search_results(), so both lookups can use an index
+    search_fields = ('user__email__exact',)
+    list_filter = (GenderFilter,)
+    list_select_related = ('user',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    search_help_text = "Searches the start of a phone number or an exact email."
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        by_email, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        # A range rather than startswith, whose LIKE SQLite cannot answer
+        # from the phone index
+        by_phone = Q(phone__gte=search_term, phone__lt=search_term + '\U0010ffff')
+        return queryset.filter(by_phone | Q(id__in=by_email.values('id'))), may_have_duplicates
 
 
 @admin.register(ElderlyProfile)
 class ElderlyProfileAdmin(admin.ModelAdmin):
     list_display = ('name', 'family_member', 'gender', 'dob', 'location')
-    search_fields = ('name', 'family_member__email', 'location')
-    list_filter = ('gender', 'location')
+    # Name and location are covered by the full-text index, see
+    # get_search_results(). The email must match exactly so the lookup can
+    # use its unique index.
+    search_fields = ('family_member__email__exact',)
+    list_filter = (GenderFilter, AreaFilter)
+    list_select_related = ('family_member',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    search_help_text = "Searches name, medical condition, location and tasks, or a family member's exact email."
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        by_email, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        ids = get_backend().search(search_term, limit=settings.SEARCH_ADMIN_LIMIT)
+        # Both sides are id lookups, so SQLite answers the OR from two indexes
+        results = queryset.filter(Q(id__in=ids) | Q(id__in=by_email.values('id')))
+        if ids:
+            # Full-text matches first, best first, then email matches; the
+            # changelist keeps this ordering unless a column is sorted
+            rank = Case(*[When(id=elderly_id, then=Value(position)) for position, elderly_id in enumerate(ids)],
+                        default=Value(len(ids)))
+            results = results.alias(search_rank=rank).order_by('search_rank')
+        return results, may_have_duplicates
+
+
+class ScheduleTaskInline(admin.TabularInline):
+    model = ScheduleTask
+    extra = 0
+    fields = ('task', 'completed', 'completed_at')
+    readonly_fields = ('task',)
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('task', 'schedule__elderly')
 
 
 @admin.register(Schedule)
 class ScheduleAdmin(admin.ModelAdmin):
     list_display = ('elderly', 'date', 'start_time',
                     'end_time', 'location', 'hourly_rate')
-    search_fields = ('elderly__name', 'location', 'task_list')
-    list_filter = ('date', 'location')
+    # The elderly person is found through the full-text index and the task
+    # by its exact, normalised name, see get_search_results().
+    search_fields = ('tasks__name__exact',)
+    list_filter = ('date', VisitAreaFilter)
+    list_select_related = ('elderly',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    inlines = (ScheduleTaskInline,)
+    # Select widgets would load every profile and rule into the change form
+    raw_id_fields = ('elderly', 'caregiver', 'rule')
+    search_help_text = "Searches the elderly person's name, medical condition, location and tasks, or an exact task name."
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = get_backend().search(search_term, limit=settings.SEARCH_ADMIN_LIMIT)
+        # Task names are stored normalised, so an exact match can use the
+        # unique index on the name
+        by_task = ScheduleTask.objects.filter(task__name__in=parse_task_list(search_term)).values('schedule_id')
+        return queryset.filter(Q(elderly_id__in=ids) | Q(id__in=by_task)), False
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    # Matched against the normalised name, see get_search_results()
+    search_fields = ('name__exact',)
+    search_help_text = "Searches an exact task name."
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(name__in=parse_task_list(search_term)), False
+
+
+@admin.register(ScheduleRule)
+class ScheduleRuleAdmin(admin.ModelAdmin):
+    list_display = ('elderly', 'frequency', 'interval', 'start_date',
+                    'until', 'count', 'start_time', 'end_time', 'materialized_until')
+    # Searched through the full-text index, see get_search_results()
+    search_fields = ('elderly__name',)
+    list_filter = ('frequency',)
+    list_select_related = ('elderly',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    search_help_text = "Searches the elderly person's name, medical condition, location and tasks."
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = get_backend().search(search_term, limit=settings.SEARCH_ADMIN_LIMIT)
+        return queryset.filter(elderly_id__in=ids), False
+
+
+@admin.register(MonthlyInvoice)
+class MonthlyInvoiceAdmin(admin.ModelAdmin):
+    list_display = ('family', 'month', 'visits', 'minutes', 'total', 'generated_at')
+    search_fields = ('family__email__exact',)
+    search_help_text = "Searches a family member's exact email."
+    list_filter = ('month',)
+    list_select_related = ('family',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
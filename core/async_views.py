@@ -0,0 +1,142 @@
+# core/async_views.py
+"""
+ASGI-native versions of the dashboards and schedule views.
+
+They read through the async ORM (aget, afirst, async iteration) so
+an ASGI server does not have to hand the whole request to a worker thread.
+Querysets are always evaluated before rendering: templates are rendered
+synchronously and must not touch the database. Form validation and saving,
+and assigning visits (shared with the sync view), still run through
+sync_to_async. The login view awaits the password hashing pool, so a slow
+hash does not hold a worker.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth import alogin
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
+
+from .backends import LoginBusy, apooled_authenticate
+from .caching import acached_fragment
+from .forms import ScheduleForm
+from .models import CaregiverProfile, ElderlyProfile, Schedule
+from .pagination import KeysetPage
+from .search import get_backend
+from .views import (
+    LOGIN_DASHBOARDS, assign_open_visits, caregiver_table_html, caregiver_table_params, is_caregiver, login_busy,
+    report_assignment,
+)
+
+
+async def login_view(request):
+    if request.method == 'POST':
+        try:
+            user = await apooled_authenticate(request, request.POST['email'], request.POST['password'])
+        except LoginBusy:
+            return login_busy(request)
+        if user:
+            await alogin(request, user)
+            if user.role in LOGIN_DASHBOARDS:
+                return redirect(LOGIN_DASHBOARDS[user.role])
+        else:
+            messages.error(request, "Invalid credentials")
+    return render(request, 'core/login.html')
+
+
+@login_required
+async def caregiver_dashboard(request):
+    user = await request.auser()
+    profile = await CaregiverProfile.objects.filter(user=user).afirst()
+
+    name, scopes, (query, after, before, page_size) = caregiver_table_params(request)
+    elderly_table = await acached_fragment(
+        request, name, scopes, lambda: render_caregiver_table(query, after, before, page_size),
+    )
+    return render(request, 'core/caregiver_dashboard.html', {
+        'profile': profile,
+        'elderly_table': elderly_table,
+        'query': query,
+    })
+
+
+async def render_caregiver_table(query, after, before, page_size):
+    elderly_list = ElderlyProfile.objects.only('id', 'name', 'dob', 'med_condition', 'location')
+    if query:
+        # The search backends use raw cursors, which have no async API
+        ids = await sync_to_async(get_backend().search)(query, limit=page_size)
+        found = await elderly_list.ain_bulk(ids)
+        page = None
+        elderly_list = [found[elderly_id] for elderly_id in ids if elderly_id in found]
+    else:
+        page = await KeysetPage.acreate(elderly_list, after=after, before=before, page_size=page_size)
+        elderly_list = page
+    return caregiver_table_html(elderly_list, page)
+
+
+async def ais_caregiver(user):
+    # An async test, so the check does not hop to a worker thread
+    return is_caregiver(user)
+
+
+@require_POST
+@user_passes_test(ais_caregiver)
+async def confirm_caregiving(request, elderly_id):
+    try:
+        elderly = await ElderlyProfile.objects.aget(id=elderly_id)
+    except ElderlyProfile.DoesNotExist:
+        raise Http404('No ElderlyProfile matches the given query.')
+    user = await request.auser()
+    profile = await CaregiverProfile.objects.filter(user=user).afirst()
+    if profile is None:
+        messages.error(request, 'Create your profile before confirming caregiving.')
+        return redirect('create_caregiver_profile')
+
+    # The same assignment as the sync view; it is a handful of short queries
+    assigned, skipped = await sync_to_async(assign_open_visits)(elderly, profile)
+    report_assignment(request, elderly, assigned, skipped)
+    return redirect('async_caregiver_dashboard')
+
+
+@login_required
+async def family_dashboard(request):
+    user = await request.auser()
+
+    async def render_table():
+        elderly_list = [elderly async for elderly in ElderlyProfile.objects.filter(family_member=user)]
+        return render_to_string('core/family_elderly_table.html', {'elderly_list': elderly_list})
+
+    elderly_table = await acached_fragment(request, f'family-table:{user.id}', [f'family:{user.id}'], render_table)
+    return render(request, 'core/family_dashboard.html', {'elderly_table': elderly_table})
+
+
+def save_if_valid(form):
+    """Validate and save ``form``; returns whether it was valid."""
+    if not form.is_valid():
+        return False
+    form.save()
+    return True
+
+
+@login_required
+async def set_schedule(request):
+    user = await request.auser()
+    elderly_list = ElderlyProfile.objects.filter(family_member=user)
+    if request.method == 'POST':
+        form = ScheduleForm(request.POST)
+        form.fields['elderly'].queryset = elderly_list
+        if await sync_to_async(save_if_valid)(form):
+            messages.success(request, 'Schedule set successfully.')
+            return redirect('async_family_dashboard')
+    else:
+        form = ScheduleForm()
+
+    # Fetch the elderly choices up front so rendering the form does not query
+    field = form.fields['elderly']
+    field.queryset = elderly_list
+    field.choices = [('', field.empty_label)] + [
+        (elderly.pk, field.label_from_instance(elderly)) async for elderly in elderly_list
+    ]
+    return render(request, 'core/set_schedule.html', {'form': form})
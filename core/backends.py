@@ -0,0 +1,172 @@
+# core/backends.py
+"""
+Authentication backend that verifies passwords on a bounded thread pool.
+
+Password hashing is deliberately slow CPU work. The pool caps the hashing
+running at once at LOGIN_HASH_WORKERS (hashlib and argon2 release the GIL,
+so a pool sized to the CPU count can use every core) and bounds the
+backlog. Past LOGIN_HASH_QUEUE waiting or running checks, logins fail fast
+with LoginBusy instead of piling up CPU work that would time out anyway,
+and the rest of the site keeps its CPU during a spike.
+
+Only the async path frees the worker while a hash runs: the async login
+view (core.async_views, under ASGI) awaits the pool through
+apooled_authenticate(), so the event loop serves other requests
+meanwhile. The sync login views' request threads still wait for their
+check.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.core.cache import caches
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+class LoginBusy(Exception):
+    """Too many password checks are already queued; retry shortly."""
+
+
+def hashing_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(settings.LOGIN_HASH_QUEUE)
+    return _pool, _slots
+
+
+def submit(func, *args):
+    """Queue ``func(*args)`` on the hashing pool, or raise LoginBusy if it is full."""
+    pool, slots = hashing_pool()
+    if not slots.acquire(blocking=False):
+        raise LoginBusy
+    future = pool.submit(func, *args)
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def run_in_pool(func, *args):
+    """
+    Run ``func(*args)`` on the hashing pool. The calling thread waits for
+    the result, up to LOGIN_HASH_TIMEOUT seconds.
+    """
+    try:
+        return submit(func, *args).result(timeout=settings.LOGIN_HASH_TIMEOUT)
+    except TimeoutError:
+        raise LoginBusy
+
+
+async def arun_in_pool(func, *args):
+    """run_in_pool() for async code: waits on the event loop, not a thread."""
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(submit(func, *args)), settings.LOGIN_HASH_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise LoginBusy
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def needs_rehash(encoded):
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != get_hasher().algorithm or hasher.must_update(encoded)
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend whose password checks (and the rehash after a cost or
+    algorithm change) run on the hashing pool, and whose get_user() reads
+    the logged-in user from USER_CACHE_ALIAS instead of the database.
+
+    A cached user is dropped when it is saved or deleted. Changes made with
+    QuerySet.update() or bulk_update() are not seen until the entry
+    expires, so deactivating a user or changing a password that way leaves
+    their sessions working for up to USER_CACHE_TIMEOUT seconds.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so unknown emails take as long as wrong passwords
+            run_in_pool(make_password, password)
+            return None
+
+        if not run_in_pool(check_password, password, user.password):
+            return None
+        if needs_rehash(user.password):
+            user.password = run_in_pool(make_password, password)
+            user.save(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            await arun_in_pool(make_password, password)
+            return None
+
+        if not await arun_in_pool(check_password, password, user.password):
+            return None
+        if needs_rehash(user.password):
+            user.password = await arun_in_pool(make_password, password)
+            await user.asave(update_fields=['password'])
+        return user if self.user_can_authenticate(user) else None
+
+    def get_user(self, user_id):
+        # Called by AuthenticationMiddleware on every authenticated request
+        if settings.USER_CACHE_ALIAS is None:
+            return super().get_user(user_id)
+        cache = caches[settings.USER_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+async def apooled_authenticate(request, username, password):
+    """
+    Log in check for async views, awaiting the hashing pool.
+
+    Django 5.1's aauthenticate() runs the sync authenticate() in a thread,
+    which would block on the pool there; backends' own aauthenticate() is
+    only used from Django 5.2. Like authenticate(), the user returned is
+    annotated with its backend and a failure sends user_login_failed.
+    """
+    backend = PooledModelBackend()
+    user = await backend.aauthenticate(request, username=username, password=password)
+    if user is None:
+        await user_login_failed.asend(
+            sender=__name__, credentials={'username': username, 'password': '********************'}, request=request)
+        return None
+    user.backend = f'{backend.__module__}.{type(backend).__qualname__}'
+    return user
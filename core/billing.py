@@ -0,0 +1,142 @@
+# core/billing.py
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Q, Sum
+from django.db.models.functions import Cast, ExtractHour, ExtractMinute, Round
+
+CENT = Decimal('0.01')
+
+
+def visit_minutes():
+    """Database expression for the length of a visit in minutes."""
+    return ExpressionWrapper(
+        (ExtractHour('end_time') * 60 + ExtractMinute('end_time'))
+        - (ExtractHour('start_time') * 60 + ExtractMinute('start_time')),
+        output_field=IntegerField(),
+    )
+
+
+def rate_cents():
+    """Database expression for hourly_rate in whole cents, an integer."""
+    return Cast(Round(F('hourly_rate') * 100), IntegerField())
+
+
+def cent_minutes():
+    """
+    Database expression for minutes x hourly rate in cents.
+
+    SQLite stores decimals as REAL, so the rate is turned into whole cents
+    first and the product (and its SUM) stays in exact integer arithmetic on
+    every database. Dividing by 60 and rounding happens once, in Python with
+    Decimal, see :func:`to_amount`.
+    """
+    return ExpressionWrapper(visit_minutes() * rate_cents(), output_field=IntegerField())
+
+
+def to_amount(total_cent_minutes):
+    return (Decimal(total_cent_minutes or 0) / 6000).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def visit_cost(minutes, hourly_rate):
+    cents = (Decimal(hourly_rate) * 100).to_integral_value(rounding=ROUND_HALF_UP)
+    return to_amount(minutes * cents)
+
+
+def month_bounds(month):
+    first = month.replace(day=1)
+    if first.month == 12:
+        return first, first.replace(year=first.year + 1, month=1)
+    return first, first.replace(month=first.month + 1)
+
+
+def is_closed(month, today=None):
+    return month_bounds(month)[1] <= (today or date.today())
+
+
+def monthly_totals(month, family=None):
+    """
+    Per-family totals for ``month`` computed in one GROUP BY query.
+
+    Returns a list of dicts with ``family``, ``visits``, ``minutes`` and
+    ``total``.
+    """
+    from .models import Schedule
+
+    first, following = month_bounds(month)
+    queryset = Schedule.objects.filter(date__gte=first, date__lt=following)
+    if family is not None:
+        queryset = queryset.filter(elderly__family_member=family)
+    rows = (queryset
+            .values('elderly__family_member')
+            .annotate(visits=Count('id'), minutes=Sum(visit_minutes()), cent_minutes=Sum(cent_minutes()))
+            .order_by())
+    return [
+        {
+            'family': row['elderly__family_member'],
+            'visits': row['visits'],
+            'minutes': row['minutes'] or 0,
+            'total': to_amount(row['cent_minutes']),
+        }
+        for row in rows
+    ]
+
+
+def generate_invoices(month):
+    """(Re)build the MonthlyInvoice rows for ``month``; returns how many were written."""
+    from .models import MonthlyInvoice
+
+    first, _ = month_bounds(month)
+    invoices = [
+        MonthlyInvoice(family_id=row['family'], month=first, visits=row['visits'],
+                       minutes=row['minutes'], total=row['total'])
+        for row in monthly_totals(first)
+    ]
+    with transaction.atomic():
+        MonthlyInvoice.objects.filter(month=first).delete()
+        MonthlyInvoice.objects.bulk_create(invoices, batch_size=1000)
+    return len(invoices)
+
+
+def family_month_total(family, month, today=None):
+    """
+    Total for one family and month. Closed months are read from (and, the
+    first time, written to) MonthlyInvoice; the current month is computed
+    live because visits can still change. Saving or deleting a visit in a
+    closed month drops its cached invoice, see :func:`forget_invoices`.
+    """
+    from .models import MonthlyInvoice
+
+    first, _ = month_bounds(month)
+    if not is_closed(first, today):
+        rows = monthly_totals(first, family=family)
+        return rows[0]['total'] if rows else Decimal('0.00')
+
+    invoice = MonthlyInvoice.objects.filter(family=family, month=first).first()
+    if invoice is None:
+        rows = monthly_totals(first, family=family)
+        if not rows:
+            return Decimal('0.00')
+        invoice, _ = MonthlyInvoice.objects.get_or_create(
+            family=family, month=first,
+            defaults={'visits': rows[0]['visits'], 'minutes': rows[0]['minutes'], 'total': rows[0]['total']},
+        )
+    return invoice.total
+
+
+def forget_invoices(visits, today=None):
+    """
+    Delete the cached MonthlyInvoice of each closed month touched by
+    ``visits``, an iterable of ``(elderly_id, date)``, so the next
+    family_month_total() recomputes it. One query, none if every visit is
+    in an open month.
+    """
+    from .models import MonthlyInvoice
+
+    condition = Q()
+    for elderly_id, day in set(visits):
+        if is_closed(day, today):
+            condition |= Q(family__elderlyprofile=elderly_id, month=month_bounds(day)[0])
+    if condition:
+        MonthlyInvoice.objects.filter(condition).delete()
@@ -0,0 +1,107 @@
+# core/bulk.py
+"""
+Bulk creation of visits from a JSON or CSV batch.
+
+Every row is validated on its own (field types, end after start), then
+the whole batch is checked with a fixed number of queries: one for the
+elderly profiles the user may schedule, one for the existing visits that
+could overlap. Valid rows are inserted with bulk_create in one
+transaction; invalid rows are reported and skipped.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from .billing import forget_invoices
+from .caching import bump
+from .forms import BulkScheduleRowForm
+from .intervals import find_conflicts
+from .search import get_backend
+from .task_catalogue import sync_schedule_tasks
+
+FORMATS = ('json', 'csv')
+# Conflict marker for visits already in the database
+EXISTING = 'existing'
+
+
+def read_rows(data, data_format):
+    """
+    Parse ``data`` (text) into a list of dicts: a JSON array of objects (or
+    ``{"schedules": [...]}``), or CSV with a header row.
+    Raises ValueError if it cannot be parsed.
+    """
+    if data_format == 'json':
+        rows = json.loads(data)
+        if isinstance(rows, dict):
+            rows = rows.get('schedules')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("Expected a JSON array of schedule objects.")
+        return rows
+    if data_format == 'csv':
+        try:
+            return list(csv.DictReader(io.StringIO(data)))
+        except csv.Error as e:
+            raise ValueError(f"Invalid CSV: {e}")
+    raise ValueError(f"Unknown format {data_format!r}, expected one of {', '.join(FORMATS)}.")
+
+
+def create_schedules(rows, family=None, batch_size=None, dry_run=False):
+    """
+    Validate ``rows`` (dicts of BulkScheduleRowForm fields) and create a
+    Schedule for each valid one.
+
+    ``family`` limits the elderly profiles that may be scheduled to that
+    user's. Returns ``(schedules, errors)``, where ``errors`` is a list of
+    ``{'row': n, 'errors': {field: [messages]}}`` with 1-based row numbers.
+    With ``dry_run`` nothing is written and the schedules are unsaved.
+    """
+    from .models import ElderlyProfile, Schedule
+
+    errors = {}
+    candidates = []
+    for number, row in enumerate(rows, 1):
+        form = BulkScheduleRowForm(row)
+        if not form.is_valid():
+            errors[number] = {field: list(messages) for field, messages in form.errors.items()}
+            continue
+        schedule = form.save(commit=False)
+        schedule.elderly_id = form.cleaned_data['elderly']
+        candidates.append((number, schedule))
+
+    elderly = ElderlyProfile.objects.filter(id__in={schedule.elderly_id for _, schedule in candidates})
+    if family is not None:
+        elderly = elderly.filter(family_member=family)
+    allowed = set(elderly.values_list('id', flat=True))
+    for number, schedule in candidates:
+        if schedule.elderly_id not in allowed:
+            errors[number] = {'elderly': ["Unknown elderly profile, or not one of yours."]}
+    candidates = [(number, schedule) for number, schedule in candidates if number not in errors]
+
+    with transaction.atomic():
+        # Checked inside the transaction so a concurrent upload cannot slip
+        # an overlapping visit in between the check and the insert
+        existing = Schedule.objects.filter(
+            elderly_id__in={schedule.elderly_id for _, schedule in candidates},
+            date__in={schedule.date for _, schedule in candidates},
+        ).values_list('elderly_id', 'date', 'start_time', 'end_time')
+        clashes = find_conflicts(
+            [((s.elderly_id, s.date), s.start_time, s.end_time, number) for number, s in candidates],
+            existing=[((elderly_id, day), start, end, EXISTING) for elderly_id, day, start, end in existing],
+        )
+        for number, other in clashes:
+            message = "Overlaps an existing visit." if other is EXISTING else f"Overlaps row {other}."
+            errors[number] = {'__all__': [message]}
+        schedules = [schedule for number, schedule in candidates if number not in errors]
+
+        if schedules and not dry_run:
+            Schedule.objects.bulk_create(schedules, batch_size=batch_size or settings.BULK_SCHEDULE_BATCH_SIZE)
+            # bulk_create() skips post_save, so do the signal handlers' work once for the batch
+            sync_schedule_tasks(schedules)
+            get_backend().index_elderly({schedule.elderly_id for schedule in schedules})
+            forget_invoices((schedule.elderly_id, schedule.date) for schedule in schedules)
+            transaction.on_commit(lambda: bump('search'))
+
+    return schedules, [{'row': number, 'errors': errors[number]} for number in sorted(errors)]
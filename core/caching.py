@@ -0,0 +1,79 @@
+# core/caching.py
+"""
+Versioned fragment cache for the dashboards.
+
+Each cached fragment depends on one or more *scopes* (e.g. "elderly" or
+"family:42"). A scope has a version number stored in the cache; the
+fragment key embeds the current versions, so bumping a scope from a signal
+makes every dependent fragment miss without having to find and delete it.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.backends.utils import csrf_input
+from django.utils.safestring import mark_safe
+
+# Rendered in place of {% csrf_token %} so cached HTML is not tied to one session
+CSRF_PLACEHOLDER = '<!--csrf-->'
+
+
+def version_key(scope):
+    return f'version:{scope}'
+
+
+def scope_versions(scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock, not 1, so a version evicted from the
+            # cache can never come back to a number used by old fragments
+            versions[key] = time.time_ns()
+            cache.add(key, versions[key], None)
+    return [versions[key] for key in keys]
+
+
+async def ascope_versions(scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = time.time_ns()
+            await cache.aadd(key, versions[key], None)
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def cached_fragment(request, name, scopes, render):
+    """
+    Return the HTML produced by ``render()``, cached under ``name`` and the
+    current versions of ``scopes``. ``render`` should use CSRF_PLACEHOLDER
+    for the CSRF field, which is filled in for ``request`` on every call.
+    """
+    versions = '.'.join(str(version) for version in scope_versions(scopes))
+    key = f'fragment:{name}:{versions}'
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, settings.DASHBOARD_CACHE_TIMEOUT)
+    return mark_safe(html.replace(CSRF_PLACEHOLDER, csrf_input(request)))
+
+
+async def acached_fragment(request, name, scopes, render):
+    """cached_fragment() for async views; ``render`` is a coroutine function."""
+    versions = '.'.join(str(version) for version in await ascope_versions(scopes))
+    key = f'fragment:{name}:{versions}'
+    html = await cache.aget(key)
+    if html is None:
+        html = await render()
+        await cache.aset(key, html, settings.DASHBOARD_CACHE_TIMEOUT)
+    return mark_safe(html.replace(CSRF_PLACEHOLDER, csrf_input(request)))
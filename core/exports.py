@@ -0,0 +1,74 @@
+# core/exports.py
+import csv
+import json
+
+from django.conf import settings
+
+from .billing import visit_cost, visit_minutes
+from .models import Schedule
+
+SCHEDULE_EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('start_time', 'start_time'),
+    ('end_time', 'end_time'),
+    ('elderly_id', 'elderly_id'),
+    ('elderly_name', 'elderly__name'),
+    ('family_email', 'elderly__family_member__email'),
+    ('caregiver_name', 'caregiver__name'),
+    ('location', 'location'),
+    ('task_list', 'task_list'),
+    ('hourly_rate', 'hourly_rate'),
+    ('minutes', 'minutes'),
+)
+EXPORT_COLUMNS = [name for name, _ in SCHEDULE_EXPORT_FIELDS] + ['amount']
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def schedule_export_queryset(start=None, end=None, family=None):
+    queryset = Schedule.objects.all()
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+    if family:
+        if family.isdigit():
+            queryset = queryset.filter(elderly__family_member_id=family)
+        else:
+            queryset = queryset.filter(elderly__family_member__email=family)
+    return queryset.order_by('date', 'start_time', 'id')
+
+
+def schedule_rows(queryset):
+    """
+    Yield export rows as tuples, streaming from the database in chunks.
+
+    values_list() keeps the joins in the one query and skips model
+    instantiation; iterator() keeps only one chunk in memory at a time.
+    """
+    lookups = [lookup for _, lookup in SCHEDULE_EXPORT_FIELDS]
+    rows = (queryset
+            .annotate(minutes=visit_minutes())
+            .values_list(*lookups)
+            .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+    for row in rows:
+        # hourly_rate and minutes are the last two columns
+        yield row + (visit_cost(row[-1], row[-2]),)
+
+
+def csv_stream(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_stream(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + '\n'
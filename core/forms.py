@@ -2,7 +2,7 @@
 from django import forms
 from .models import CustomUser
 from django.contrib.auth.forms import UserCreationForm
-from .models import CaregiverProfile, ElderlyProfile, Schedule
+from .models import CaregiverProfile, ElderlyProfile, Schedule, ScheduleRule
 
 
 class SignUpForm(UserCreationForm):
@@ -15,19 +15,31 @@ class SignUpForm(UserCreationForm):
 class CaregiverProfileForm(forms.ModelForm):
     class Meta:
         model = CaregiverProfile
-        fields = ['name', 'phone', 'address', 'dob', 'gender', 'emergency_contact']
+        fields = ['name', 'phone', 'address', 'dob', 'gender', 'emergency_contact',
+                  'hourly_rate', 'skills', 'available_from', 'available_to']
         widgets = {
             'dob': forms.DateInput(attrs={'type': 'date'}),
+            'available_from': forms.TimeInput(attrs={'type': 'time'}),
+            'available_to': forms.TimeInput(attrs={'type': 'time'}),
         }
 
 class ElderlyProfileForm(forms.ModelForm):
     class Meta:
         model = ElderlyProfile
-        fields = ['name', 'dob', 'gender', 'med_condition', 'location']
+        fields = ['name', 'dob', 'gender', 'med_condition', 'location', 'caregiver_gender_preference']
         widgets = {
             'dob': forms.DateInput(attrs={'type': 'date'}),
         }
 
+class CaregiverImportForm(CaregiverProfileForm):
+    """A row of a caregiver import: the profile plus the account to create."""
+    email = forms.EmailField()
+    username = forms.CharField(max_length=150, required=False)
+
+class ElderlyImportForm(ElderlyProfileForm):
+    """A row of an elderly import; ``family_email`` names the family account."""
+    family_email = forms.EmailField()
+
 class ScheduleForm(forms.ModelForm):
     class Meta:
         model = Schedule
@@ -37,3 +49,81 @@ class ScheduleForm(forms.ModelForm):
             'start_time': forms.TimeInput(attrs={'type': 'time'}),
             'end_time': forms.TimeInput(attrs={'type': 'time'}),
         }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        elderly = cleaned_data.get('elderly')
+        date = cleaned_data.get('date')
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if start_time is None or end_time is None:
+            return cleaned_data
+        if end_time <= start_time:
+            self.add_error('end_time', "End time must be after start time.")
+            return cleaned_data
+        if elderly is None or date is None:
+            return cleaned_data
+
+        overlapping = Schedule.overlapping(date, start_time, end_time).exclude(pk=self.instance.pk)
+        if overlapping.filter(elderly=elderly).exists():
+            raise forms.ValidationError(f"{elderly.name} already has a visit at this time.")
+        if self.instance.caregiver_id and overlapping.filter(caregiver_id=self.instance.caregiver_id).exists():
+            raise forms.ValidationError("The assigned caregiver already has a visit at this time.")
+        return cleaned_data
+
+
+class BulkScheduleRowForm(forms.ModelForm):
+    """
+    One row of a bulk schedule upload. ``elderly`` is a plain id and overlaps
+    are not checked here: core.bulk checks both for the whole batch at once.
+    """
+    elderly = forms.IntegerField(min_value=1)
+
+    class Meta:
+        model = Schedule
+        fields = ['date', 'start_time', 'end_time', 'location', 'task_list', 'hourly_rate']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if start_time is not None and end_time is not None and end_time <= start_time:
+            self.add_error('end_time', "End time must be after start time.")
+        return cleaned_data
+
+
+class ScheduleRuleForm(forms.ModelForm):
+    WEEKDAY_CHOICES = (
+        ('0', 'Monday'), ('1', 'Tuesday'), ('2', 'Wednesday'), ('3', 'Thursday'),
+        ('4', 'Friday'), ('5', 'Saturday'), ('6', 'Sunday'),
+    )
+    weekdays = forms.MultipleChoiceField(
+        choices=WEEKDAY_CHOICES, required=False, widget=forms.CheckboxSelectMultiple,
+        help_text="For weekly visits; defaults to the weekday of the start date.",
+    )
+
+    class Meta:
+        model = ScheduleRule
+        fields = ['elderly', 'frequency', 'interval', 'weekdays', 'start_date', 'until', 'count',
+                  'start_time', 'end_time', 'location', 'task_list', 'hourly_rate']
+        widgets = {
+            'start_date': forms.DateInput(attrs={'type': 'date'}),
+            'until': forms.DateInput(attrs={'type': 'date'}),
+            'start_time': forms.TimeInput(attrs={'type': 'time'}),
+            'end_time': forms.TimeInput(attrs={'type': 'time'}),
+        }
+
+    def clean_weekdays(self):
+        return ','.join(self.cleaned_data['weekdays'])
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_time = cleaned_data.get('start_time')
+        end_time = cleaned_data.get('end_time')
+        if start_time and end_time and end_time <= start_time:
+            self.add_error('end_time', "End time must be after start time.")
+        start_date = cleaned_data.get('start_date')
+        until = cleaned_data.get('until')
+        if start_date and until and until < start_date:
+            self.add_error('until', "The end date must not be before the start date.")
+        return cleaned_data
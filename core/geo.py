@@ -0,0 +1,167 @@
+# core/geo.py
+import csv
+import math
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer(path=None):
+    """Read the offline gazetteer (name,latitude,longitude) into a dict."""
+    places = {}
+    with open(path or settings.GAZETTEER_PATH, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            places[normalize_place(row['name'])] = (float(row['latitude']), float(row['longitude']))
+    return places
+
+
+def normalize_place(name):
+    return ' '.join(name.lower().replace('.', ' ').split())
+
+
+def geocode(text):
+    """
+    Resolve a free-text location/address to (latitude, longitude).
+
+    The whole string is tried first, then each comma-separated part from the
+    most specific (first) to the least specific (last), so
+    "House 12, Road 5, Dhanmondi, Dhaka" resolves to Dhanmondi.
+    Returns (None, None) if nothing matches.
+    """
+    if not text:
+        return None, None
+    places = load_gazetteer()
+    candidates = [text] + text.split(',')
+    for candidate in candidates:
+        coords = places.get(normalize_place(candidate))
+        if coords:
+            return coords
+    return None, None
+
+
+def locate(text):
+    """Return (latitude, longitude, geohash) for a free-text location."""
+    latitude, longitude = geocode(text)
+    if latitude is None:
+        return None, None, ''
+    return latitude, longitude, geohash_encode(latitude, longitude)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision):
+    """Return the (lat, lon) size in degrees of a geohash cell."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """
+    Return the geohash prefixes covering a circle of ``radius_km``.
+
+    Picks the finest precision whose cells are at least as large as the
+    circle's extent in latitude and longitude, then returns the cell
+    containing the centre plus its eight neighbours. Every point within the
+    radius lies in one of these cells. Returns [] when even the coarsest
+    cells are too small (a huge radius, or a circle reaching a pole).
+    """
+    # The same sphere as haversine_km(), so the cells cover what it accepts
+    angle = radius_km / EARTH_RADIUS_KM
+    cos_lat = math.cos(math.radians(latitude))
+    if angle >= math.pi / 2 or math.sin(angle) >= cos_lat:
+        return []
+    dlat = math.degrees(angle)
+    # The widest longitude span of a circle on a sphere
+    dlon = math.degrees(math.asin(math.sin(angle) / cos_lat))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lon = geohash_cell_size(precision)
+        if cell_lat >= dlat and cell_lon >= dlon:
+            break
+    else:
+        return []
+
+    prefixes = set()
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            lat = min(max(latitude + i * cell_lat, -90.0), 90.0)
+            lon = (longitude + j * cell_lon + 180.0) % 360.0 - 180.0
+            prefixes.add(geohash_encode(lat, lon, precision))
+    return sorted(prefixes)
+
+
+def filter_within(queryset, latitude, longitude, radius_km):
+    """
+    Narrow ``queryset`` to rows whose geohash falls in the cells covering the
+    circle. Each prefix becomes an index range scan on ``geohash``; the
+    result is a superset of the circle, see :func:`within_radius`. When no
+    cells cover it, every geocoded row is returned.
+    """
+    prefixes = covering_prefixes(latitude, longitude, radius_km)
+    if not prefixes:
+        return queryset.exclude(geohash='')
+    condition = Q()
+    for prefix in prefixes:
+        # '{' sorts directly after 'z', the last geohash character.
+        condition |= Q(geohash__gte=prefix, geohash__lt=prefix + '{')
+    return queryset.filter(condition)
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """
+    Return ``[(distance_km, obj), ...]`` for rows within ``radius_km``,
+    nearest first.
+    """
+    results = []
+    for obj in filter_within(queryset, latitude, longitude, radius_km):
+        distance = haversine_km(latitude, longitude, obj.latitude, obj.longitude)
+        if distance <= radius_km:
+            results.append((distance, obj))
+    results.sort(key=lambda item: item[0])
+    return results
+
+
+def elderly_near(caregiver, radius_km):
+    """Elderly profiles within ``radius_km`` of the caregiver's address."""
+    from .models import ElderlyProfile
+
+    if caregiver.latitude is None:
+        return []
+    return within_radius(ElderlyProfile.objects.all(), caregiver.latitude, caregiver.longitude, radius_km)
@@ -0,0 +1,51 @@
+# core/hashers.py
+"""
+Password hashers whose cost comes from settings (see PASSWORD_HASHER and
+the PASSWORD_* cost settings).
+
+They keep Django's algorithm names, so existing hashes still verify. When
+a cost setting changes, must_update() reports the stored hash as stale and
+Django rehashes the password at the user's next successful login.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_KB
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    @property
+    def maxmem(self):
+        # scrypt needs about 128 * n * r bytes; OpenSSL's default cap is
+        # 32 MiB, which a raised work factor would exceed
+        return 2 * 128 * self.work_factor * self.block_size * self.parallelism
@@ -0,0 +1,119 @@
+# core/images.py
+"""
+Responsive image variants for the static images.
+
+``manage.py build_images`` resizes every JPEG/PNG under IMAGE_SOURCE_DIRS to
+IMAGE_WIDTHS and re-encodes it as AVIF, WebP and JPEG. The files are
+written to IMAGE_BUILD_DIR (a static files directory) with content hashes
+in their names, so they can be cached forever. The manifest at
+IMAGE_MANIFEST_PATH maps each source image to its variants; the
+``{% responsive_image %}`` tag reads it to build <picture> srcsets.
+"""
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# Best first: browsers take the first <source> type they support
+FORMATS = {
+    'avif': {'extension': 'avif', 'mime': 'image/avif', 'pillow': 'AVIF'},
+    'webp': {'extension': 'webp', 'mime': 'image/webp', 'pillow': 'WEBP'},
+    'jpeg': {'extension': 'jpg', 'mime': 'image/jpeg', 'pillow': 'JPEG'},
+}
+
+
+def load_manifest(path=None):
+    try:
+        with open(path or settings.IMAGE_MANIFEST_PATH, encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+_manifest = (None, {})
+
+
+def manifest_entry(name):
+    """Manifest entry of a static image, reloading the manifest when it changes."""
+    global _manifest
+    path = settings.IMAGE_MANIFEST_PATH
+    try:
+        version = (path, os.stat(path).st_mtime)
+    except FileNotFoundError:
+        return None
+    if _manifest[0] != version:
+        _manifest = (version, load_manifest(path))
+    return _manifest[1].get('images', {}).get(name)
+
+
+def source_images(source_dirs=None):
+    """Yield (static name, path) for every source image."""
+    for source_dir in source_dirs or settings.IMAGE_SOURCE_DIRS:
+        source_dir = Path(source_dir)
+        for path in sorted(source_dir.rglob('*')):
+            if path.suffix.lower() in SOURCE_EXTENSIONS and path.is_file():
+                yield path.relative_to(source_dir).as_posix(), path
+
+
+def file_hash(data):
+    return hashlib.md5(data, usedforsecurity=False).hexdigest()[:12]
+
+
+def encode(image, image_format, quality, icc_profile):
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    options = {'quality': quality}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if image_format == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    elif image_format == 'webp':
+        options['method'] = 6
+    buffer = io.BytesIO()
+    image.save(buffer, FORMATS[image_format]['pillow'], **options)
+    return buffer.getvalue()
+
+
+def build_image(name, path, build_dir, widths, quality, formats):
+    """
+    Write the variants of one image and return its manifest entry:
+    ``{'source_hash', 'bytes', 'width', 'height', 'variants': {format: [[width, name, bytes], ...]}}``.
+    Widths larger than the original are replaced by the original width.
+    """
+    from PIL import Image, ImageOps
+
+    data = Path(path).read_bytes()
+    with Image.open(io.BytesIO(data)) as original:
+        icc_profile = original.info.get('icc_profile')
+        # Apply the EXIF rotation, since the metadata is not copied over
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+        entry = {'source_hash': file_hash(data), 'bytes': len(data),
+                 'width': original.width, 'height': original.height, 'variants': {}}
+
+        stem, _ = os.path.splitext(name)
+        for width in sorted({min(width, original.width) for width in widths}):
+            height = round(original.height * width / original.width)
+            resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+            for image_format in formats:
+                if image_format == 'jpeg' and resized.mode == 'RGBA':
+                    # JPEG has no alpha; such images are served as WebP/AVIF or the original PNG
+                    continue
+                encoded = encode(resized, image_format, quality[image_format], icc_profile)
+                variant = f'{stem}-{width}w.{file_hash(encoded)}.{FORMATS[image_format]["extension"]}'
+                target = Path(build_dir) / variant
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(encoded)
+                entry['variants'].setdefault(image_format, []).append([width, variant, len(encoded)])
+    return entry
+
+
+def bytes_saved(entry):
+    """Original size minus the size of the best full-width variant."""
+    largest = [variants[-1][2] for variants in entry['variants'].values()]
+    return entry['bytes'] - min(largest) if largest else 0
@@ -0,0 +1,266 @@
+# core/imports.py
+"""
+Bulk import of elderly and caregiver profiles from CSV or Excel files.
+
+Rows are read one at a time and handled in batches. Each batch is
+validated with the profile ModelForms, deduplicated against the database
+and against earlier rows with a few set-based queries, and written with
+bulk_create in one transaction. bulk_create() skips Model.save() and the
+post_save signals, so the geocoding, search indexing and cache
+invalidation they would do is done here once per batch.
+"""
+import csv
+import datetime
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth.base_user import BaseUserManager
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .caching import bump
+from .forms import CaregiverImportForm, ElderlyImportForm
+from .geo import locate
+from .search import get_backend
+
+FORMATS = ('csv', 'xlsx')
+
+
+class ProfileImportError(Exception):
+    pass
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        yield from csv.DictReader(fh)
+
+
+def read_xlsx(path):
+    """Rows of the first sheet as dicts keyed by the header row. Needs openpyxl."""
+    try:
+        import openpyxl
+    except ImportError:
+        raise ProfileImportError("Reading Excel files needs openpyxl (pip install openpyxl).")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name).strip() if name is not None else '' for name in next(rows, ())]
+        for values in rows:
+            yield {name: cell_value(value) for name, value in zip(header, values) if name}
+    finally:
+        workbook.close()
+
+
+def cell_value(value):
+    """Turn an Excel cell into what the form fields expect."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        # Excel has no date-only type: a midnight datetime is a date
+        return value.date() if value.time() == datetime.time() else value.isoformat(sep=' ')
+    if isinstance(value, float) and value.is_integer():
+        # Phone numbers typed into a numeric cell
+        return str(int(value))
+    return value
+
+
+def read_rows(path, data_format):
+    readers = {'csv': read_csv, 'xlsx': read_xlsx}
+    if data_format not in readers:
+        raise ProfileImportError(f"Unknown format {data_format!r}, expected one of {', '.join(FORMATS)}.")
+    return readers[data_format](path)
+
+
+def batches(rows, size, start=0):
+    """Yield lists of ``(row_number, row)`` of ``size`` rows, skipping the first ``start``."""
+    numbered = enumerate(rows, 1)
+    for _ in islice(numbered, start):
+        pass
+    while True:
+        batch = list(islice(numbered, size))
+        if not batch:
+            return
+        yield batch
+
+
+def form_errors(form):
+    return {field: list(messages) for field, messages in form.errors.items()}
+
+
+def new_users(emails, usernames, role):
+    """Build unsaved accounts with unusable passwords; they set one via password reset."""
+    from .models import CustomUser
+
+    users = []
+    for email, username in zip(emails, usernames):
+        user = CustomUser(email=email, username=username or email, role=role)
+        user.set_unusable_password()
+        users.append(user)
+    return users
+
+
+def import_caregivers(batch):
+    """
+    Create an account and a CaregiverProfile for each new row of ``batch``.
+    Rows whose email or phone is already known are skipped. Returns
+    ``(created, skipped, errors)`` with errors keyed by row number.
+    """
+    from .models import CaregiverProfile, CustomUser
+
+    errors = {}
+    valid = []
+    for number, row in batch:
+        form = CaregiverImportForm(row)
+        if form.is_valid():
+            valid.append((number, form))
+        else:
+            errors[number] = form_errors(form)
+
+    emails = {BaseUserManager.normalize_email(form.cleaned_data['email']) for _, form in valid}
+    usernames = {form.cleaned_data['username'] for _, form in valid} | emails
+    phones = {form.cleaned_data['phone'].strip() for _, form in valid}
+    seen_emails = set(CustomUser.objects.filter(email__in=emails).values_list('email', flat=True))
+    seen_phones = set(CaregiverProfile.objects.filter(phone__in=phones).values_list('phone', flat=True))
+    taken_usernames = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+    skipped = 0
+    accepted = []
+    for number, form in valid:
+        email = BaseUserManager.normalize_email(form.cleaned_data['email'])
+        phone = form.cleaned_data['phone'].strip()
+        username = form.cleaned_data['username'] or email
+        if email in seen_emails or phone in seen_phones:
+            skipped += 1
+            continue
+        if username in taken_usernames:
+            errors[number] = {'username': ["A user with that username already exists."]}
+            continue
+        seen_emails.add(email)
+        seen_phones.add(phone)
+        taken_usernames.add(username)
+        profile = form.save(commit=False)
+        profile.phone = phone
+        profile.latitude, profile.longitude, profile.geohash = locate(profile.address)
+        accepted.append((email, form.cleaned_data['username'], profile))
+
+    with transaction.atomic():
+        users = CustomUser.objects.bulk_create(new_users(
+            [email for email, _, _ in accepted], [username for _, username, _ in accepted], 'caregiver'))
+        for user, (_, _, profile) in zip(users, accepted):
+            profile.user = user
+        CaregiverProfile.objects.bulk_create([profile for _, _, profile in accepted])
+    return len(accepted), skipped, errors
+
+
+def import_elderly(batch):
+    """
+    Create an ElderlyProfile for each new row of ``batch``, creating the
+    family accounts that do not exist yet. Family emails match whatever
+    their case. A row is a duplicate when the family already has a profile
+    with the same name and date of birth. Returns ``(created, skipped,
+    errors)`` with errors keyed by row number; each row is counted once.
+    """
+    from .models import CustomUser, ElderlyProfile
+
+    errors = {}
+    valid = []
+    for number, row in batch:
+        form = ElderlyImportForm(row)
+        if form.is_valid():
+            valid.append((number, form))
+        else:
+            errors[number] = form_errors(form)
+
+    emails = {form.cleaned_data['family_email'].lower() for _, form in valid}
+    # Lower('email') is indexed, see CustomUser.Meta
+    families = {
+        user.email.lower(): user
+        for user in CustomUser.objects.alias(email_lower=Lower('email')).filter(
+            email_lower__in=emails).only('id', 'email', 'role')
+    }
+    seen = set(ElderlyProfile.objects.filter(
+        family_member__in=[user.id for user in families.values()],
+    ).values_list(Lower('family_member__email'), 'name', 'dob'))
+    # New family accounts use the email as username, which must be free
+    taken = set(CustomUser.objects.filter(username__in=emails - set(families)).values_list('username', flat=True))
+
+    skipped = 0
+    accepted = []
+    for number, form in valid:
+        email = form.cleaned_data['family_email'].lower()
+        if email in families and families[email].role != 'family':
+            errors[number] = {'family_email': ["This account is not a family account."]}
+            continue
+        if email in taken:
+            errors[number] = {'family_email': ["A user with this email as username already exists."]}
+            continue
+        key = (email, form.cleaned_data['name'], form.cleaned_data['dob'])
+        if key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+        profile = form.save(commit=False)
+        profile.latitude, profile.longitude, profile.geohash = locate(profile.location)
+        accepted.append((email, profile))
+
+    with transaction.atomic():
+        missing = sorted({email for email, _ in accepted} - set(families))
+        for user in CustomUser.objects.bulk_create(new_users(missing, [None] * len(missing), 'family')):
+            families[user.email] = user
+        for email, profile in accepted:
+            profile.family_member = families[email]
+        profiles = ElderlyProfile.objects.bulk_create([profile for _, profile in accepted])
+        get_backend().index_elderly([profile.id for profile in profiles])
+        scopes = {f'family:{profile.family_member_id}' for profile in profiles}
+        transaction.on_commit(lambda: bump('elderly', *scopes))
+    return len(accepted), skipped, errors
+
+
+IMPORTERS = {
+    'caregiver': import_caregivers,
+    'elderly': import_elderly,
+}
+
+
+class Checkpoint:
+    """
+    Progress of an import, saved as JSON after every committed batch so a
+    crashed import can resume after the last batch written. The file's
+    size and mtime are recorded to refuse resuming against a changed file.
+    """
+
+    def __init__(self, path, source, kind):
+        self.path = path
+        stat = os.stat(source)
+        self.identity = {'source': os.path.abspath(source), 'kind': kind,
+                         'size': stat.st_size, 'mtime': stat.st_mtime}
+        self.rows_done = self.created = self.skipped = self.rejected = 0
+
+    def load(self):
+        """Restore saved progress; returns False if there is none."""
+        try:
+            with open(self.path, encoding='utf-8') as fh:
+                state = json.load(fh)
+        except FileNotFoundError:
+            return False
+        if {key: state.get(key) for key in self.identity} != self.identity:
+            raise ProfileImportError(f"{self.path} belongs to another file or the file has changed.")
+        self.rows_done = state['rows_done']
+        self.created = state['created']
+        self.skipped = state['skipped']
+        self.rejected = state['rejected']
+        return True
+
+    def save(self):
+        state = dict(self.identity, rows_done=self.rows_done, created=self.created,
+                     skipped=self.skipped, rejected=self.rejected)
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(state, fh)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
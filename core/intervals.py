@@ -0,0 +1,56 @@
+# core/intervals.py
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+
+class IntervalIndex:
+    """
+    Non-overlapping [start, end) intervals grouped by key (e.g. elderly and
+    date), kept sorted by start.
+
+    Because accepted intervals never overlap, their ends are sorted too, and
+    the only interval that can overlap a new one is the last interval
+    starting before the new one ends. Each lookup is one bisect, so checking
+    n slots costs O(n log n) instead of comparing every pair.
+    """
+
+    def __init__(self):
+        self._intervals = defaultdict(list)
+
+    def overlapping(self, key, start, end):
+        """Return the item of the interval overlapping [start, end), or None."""
+        intervals = self._intervals.get(key)
+        if not intervals:
+            return None
+        i = bisect_left(intervals, (end,))
+        if i and intervals[i - 1][1] > start:
+            return intervals[i - 1][2]
+        return None
+
+    def add(self, key, start, end, item=None):
+        """
+        Add [start, end) under ``key`` unless it overlaps an existing
+        interval. Returns the conflicting item, or None if it was added.
+        """
+        conflict = self.overlapping(key, start, end)
+        if conflict is None:
+            insort(self._intervals[key], (start, end, item), key=lambda iv: iv[:2])
+        return conflict
+
+
+def find_conflicts(slots, existing=()):
+    """
+    Return ``[(item, conflicting_item), ...]`` for every slot in ``slots``
+    that overlaps an ``existing`` slot or an earlier slot of the batch.
+
+    Both arguments are iterables of ``(key, start, end, item)``.
+    """
+    index = IntervalIndex()
+    for key, start, end, item in existing:
+        index.add(key, start, end, item)
+    conflicts = []
+    for key, start, end, item in slots:
+        conflict = index.add(key, start, end, item)
+        if conflict is not None:
+            conflicts.append((item, conflict))
+    return conflicts
@@ -0,0 +1,106 @@
+# core/management/commands/bench_asgi.py
+import asyncio
+import statistics
+import time
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.models import CustomUser
+
+PAGES = {
+    'caregiver': ('caregiver_dashboard', 'async_caregiver_dashboard'),
+    'family': ('family_dashboard', 'async_family_dashboard'),
+}
+
+
+async def get(app, path, query_string, cookie):
+    """Send one GET through the ASGI app in-process; returns the status code."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query_string.encode(), 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    request_sent = False
+    status = None
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django cancels this wait once the
+        # response is sent
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+async def load(app, path, query_string, cookie, requests, concurrency):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            status = await get(app, path, query_string, cookie)
+            latencies.append(time.perf_counter() - started)
+            errors += status != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+class Command(BaseCommand):
+    help = ("Load-test the sync and async versions of a dashboard through the ASGI handler "
+            "and compare their throughput.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="User to log in as; their role picks the dashboard.")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--query', default='', help="Query string to send, e.g. 'q=diabetes'.")
+        parser.add_argument('--no-cache', action='store_true', help="Render the tables on every request.")
+
+    def handle(self, *args, **options):
+        try:
+            user = CustomUser.objects.get(email=options['email'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+        if user.role not in PAGES:
+            raise CommandError(f"No dashboard to benchmark for role {user.role!r}")
+
+        client = Client()
+        client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        app = get_asgi_application()
+
+        timeout = 0 if options['no_cache'] else settings.DASHBOARD_CACHE_TIMEOUT
+        with override_settings(DASHBOARD_CACHE_TIMEOUT=timeout):
+            for url_name in PAGES[user.role]:
+                path = reverse(url_name)
+                # Warm up: first-request imports, template loading, the cache
+                asyncio.run(load(app, path, options['query'], cookie, 10, 1))
+                elapsed, latencies, errors = asyncio.run(load(
+                    app, path, options['query'], cookie, options['requests'], options['concurrency']))
+                latencies.sort()
+                self.stdout.write(
+                    f"{url_name:<28} {options['requests'] / elapsed:8.1f} req/s  "
+                    f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+                    f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms  "
+                    f"errors {errors}"
+                )
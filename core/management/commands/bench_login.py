@@ -0,0 +1,86 @@
+# core/management/commands/bench_login.py
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from core.models import CustomUser
+
+PASSWORD = 'correct horse battery staple'
+
+
+class Command(BaseCommand):
+    help = ("Measure logins per second through the login view (session, database and the hashing pool) "
+            "for each configured hasher at the current cost settings, one client at a time and with "
+            "concurrent clients, also per core used. Creates temporary users in the configured database and "
+            "deletes them, so it only runs with DEBUG on.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help="Logins per measurement.")
+        parser.add_argument('--clients', type=int, default=2 * settings.LOGIN_HASH_WORKERS,
+                            help="Concurrent clients; past LOGIN_HASH_QUEUE some logins get a 503.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG:
+            # The concurrent clients log in on their own connections, so the
+            # users cannot live in a rolled-back transaction
+            raise CommandError("bench_login writes users to the configured database; run it with DEBUG on, "
+                               "not against production.")
+        logins, clients = options['logins'], options['clients']
+        # Hashing runs on the pool, so it can use at most this many cores
+        self.cores = min(settings.LOGIN_HASH_WORKERS, clients, os.cpu_count() or 1)
+        self.stdout.write(
+            f"{logins} logins each, {clients} concurrent clients, hashing pool of "
+            f"{settings.LOGIN_HASH_WORKERS} threads on {os.cpu_count()} cores"
+        )
+        # Every login comes from the same address and email: lift the throttle
+        with override_settings(RATE_LIMITS={}, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, path in settings.PASSWORD_HASHER_CLASSES.items():
+                try:
+                    encoded = make_password(PASSWORD, hasher=import_string(path)())
+                except ValueError as e:
+                    # e.g. argon2-cffi is not installed
+                    self.stdout.write(f"{name:<8} skipped: {e}")
+                    continue
+                self.bench(name, encoded, logins, clients)
+
+    def bench(self, name, encoded, logins, clients):
+        email = f'bench-login-{name}@example.invalid'
+        user = CustomUser.objects.create(username=email, email=email, password=encoded, role='family')
+        try:
+            with override_settings(PASSWORD_HASHERS=[*dict.fromkeys([
+                    settings.PASSWORD_HASHER_CLASSES[name], *settings.PASSWORD_HASHERS])]):
+                serial, _ = self.run_logins(email, logins, 1)
+                pooled, statuses = self.run_logins(email, logins, clients)
+        finally:
+            user.delete()
+
+        refused = ', '.join(f"{count} x {status}" for status, count in sorted(statuses.items()) if status != 302)
+        self.stdout.write(
+            f"{name:<8} {serial:8.1f} logins/s one at a time   "
+            f"{pooled:8.1f} logins/s with {clients} clients   "
+            f"{pooled / self.cores:8.1f} logins/s per core ({self.cores} used)"
+            + (f"   (not logged in: {refused})" if refused else "")
+        )
+
+    def run_logins(self, email, logins, clients):
+        """Logins per second, and the count of each response status."""
+        url = reverse('login')
+
+        def log_in(_):
+            # One client per login, so each starts without a session
+            return Client().post(url, {'email': email, 'password': PASSWORD}).status_code
+
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            started = time.perf_counter()
+            statuses = Counter(pool.map(log_in, range(logins)))
+            elapsed = time.perf_counter() - started
+        return logins / elapsed, statuses
@@ -0,0 +1,58 @@
+# core/management/commands/bench_matching.py
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core.matching import CaregiverFeatures, ScheduleFeatures, rank
+
+
+class Command(BaseCommand):
+    help = "Benchmark the matching engine on synthetic schedules and caregivers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedules', type=int, default=5000)
+        parser.add_argument('--caregivers', type=int, default=5000)
+        parser.add_argument('--tasks', type=int, default=40)
+        parser.add_argument('-k', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=512)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        n_s, n_c, n_t = options['schedules'], options['caregivers'], options['tasks']
+
+        # Points scattered over roughly a 40 km square around Dhaka
+        start = rng.integers(6 * 60, 18 * 60, n_s)
+        schedules = ScheduleFeatures(
+            ids=np.arange(n_s),
+            lat=23.8 + rng.uniform(-0.2, 0.2, n_s),
+            lon=90.4 + rng.uniform(-0.2, 0.2, n_s),
+            start=start,
+            end=start + rng.integers(60, 240, n_s),
+            rate=rng.uniform(5, 20, n_s),
+            gender=rng.integers(-1, 2, n_s),
+            tasks=(rng.random((n_s, n_t)) < 0.1).astype(np.float32),
+        )
+        available_from = rng.integers(5 * 60, 12 * 60, n_c)
+        caregivers = CaregiverFeatures(
+            ids=np.arange(n_c),
+            lat=23.8 + rng.uniform(-0.2, 0.2, n_c),
+            lon=90.4 + rng.uniform(-0.2, 0.2, n_c),
+            available_from=available_from,
+            available_to=available_from + rng.integers(4 * 60, 14 * 60, n_c),
+            rate=rng.uniform(5, 20, n_c),
+            gender=rng.integers(0, 2, n_c),
+            skills=(rng.random((n_c, n_t)) < 0.3).astype(np.float32),
+        )
+
+        started = time.perf_counter()
+        matches = rank(schedules, caregivers, k=options['k'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        matched = sum(1 for ranked in matches.values() if ranked)
+        pairs = n_s * n_c
+        self.stdout.write(
+            f"{n_s} schedules x {n_c} caregivers: {elapsed:.2f}s "
+            f"({pairs / elapsed / 1e6:.1f}M pairs/s), {matched} schedules matched"
+        )
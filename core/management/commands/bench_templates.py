@@ -0,0 +1,65 @@
+# core/management/commands/bench_templates.py
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template import Context, engines
+from django.template.engine import Engine
+
+from core.caching import CSRF_PLACEHOLDER
+from core.models import ElderlyProfile
+from core.profiling import profile_templates
+
+
+class Command(BaseCommand):
+    help = ("Render caregiver_dashboard.html with a large elderly table, with and without the cached "
+            "template loader, and print per-template and per-block render times. Needs no database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5, help="Renders per loader.")
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        # Unsaved instances: this measures rendering, not queries
+        elderly_list = [
+            ElderlyProfile(id=i, name=f'Elderly {i}', dob=date(1940, 1, 1) + timedelta(days=i % 9000),
+                           med_condition='Diabetes' if i % 2 else 'Hypertension', location=f'Street {i % 500}')
+            for i in range(1, rows + 1)
+        ]
+
+        configured = engines['django'].engine
+        loader_setups = {
+            'cached loader': [('django.template.loaders.cached.Loader', settings.TEMPLATE_SOURCE_LOADERS)],
+            'no cache': settings.TEMPLATE_SOURCE_LOADERS,
+        }
+
+        self.stdout.write(f"caregiver_dashboard.html with {rows} rows, {repeat} renders per loader")
+        for label, loaders in loader_setups.items():
+            engine = Engine(dirs=configured.dirs, loaders=loaders, libraries=configured.libraries,
+                            debug=configured.debug)
+            # First render, which parses the templates
+            self.render(engine, elderly_list)
+            with profile_templates() as profile:
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    html = self.render(engine, elderly_list)
+                elapsed = (time.perf_counter() - started) / repeat
+
+            self.stdout.write(f"\n{label}: {elapsed * 1000:.1f} ms per render, {len(html) / 1024:.0f} KB of HTML")
+            for kind, times in (('template', profile.templates), ('block', profile.blocks)):
+                for key, renders, seconds in times.rows():
+                    self.stdout.write(f"  {kind:<8} {key:<45} {renders // repeat:>6} x  {seconds * 1000 / repeat:8.2f} ms")
+
+    def render(self, engine, elderly_list):
+        table = engine.get_template('core/caregiver_elderly_table.html').render(Context({
+            'elderly_list': elderly_list,
+            'page': None,
+            'csrf_placeholder': CSRF_PLACEHOLDER,
+        }))
+        return engine.get_template('core/caregiver_dashboard.html').render(Context({
+            'profile': None,
+            'elderly_table': table,
+            'query': '',
+        }))
@@ -0,0 +1,83 @@
+# core/management/commands/build_images.py
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.images import FORMATS, build_image, bytes_saved, file_hash, load_manifest, source_images
+
+
+class Command(BaseCommand):
+    help = ("Build resized AVIF/WebP/JPEG variants of the static images with content-hashed "
+            "names, write the manifest used by {% responsive_image %} and report the bytes saved.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild images that have not changed.")
+
+    def handle(self, *args, **options):
+        try:
+            from PIL import features
+        except ImportError:
+            raise CommandError("build_images needs Pillow (pip install pillow).")
+
+        formats = [image_format for image_format in FORMATS if image_format == 'jpeg' or features.check(image_format)]
+        for image_format in FORMATS:
+            if image_format not in formats:
+                self.stderr.write(f"This Pillow build cannot write {image_format.upper()}; skipping it.")
+        build_options = {'widths': sorted(settings.IMAGE_WIDTHS), 'quality': settings.IMAGE_QUALITY, 'formats': formats}
+
+        build_dir = Path(settings.IMAGE_BUILD_DIR)
+        previous = load_manifest()
+        if previous.get('options') != build_options:
+            previous = {}
+        images = previous.get('images', {})
+        manifest = {'options': build_options, 'images': {}}
+
+        total_before = total_after = 0
+        for name, path in source_images():
+            entry = images.get(name)
+            unchanged = (
+                not options['force'] and entry and entry['source_hash'] == file_hash(path.read_bytes())
+                and all((build_dir / variant).exists()
+                        for variants in entry['variants'].values() for _, variant, _ in variants)
+            )
+            if not unchanged:
+                entry = build_image(name, path, build_dir, settings.IMAGE_WIDTHS, settings.IMAGE_QUALITY, formats)
+            manifest['images'][name] = entry
+
+            saved = bytes_saved(entry)
+            total_before += entry['bytes']
+            total_after += entry['bytes'] - saved
+            sizes = ', '.join(
+                f"{image_format} {variants[-1][2] / 1024:.0f} KB"
+                for image_format, variants in entry['variants'].items()
+            )
+            self.stdout.write(
+                f"{name}{'' if unchanged else ' (built)'}: {entry['bytes'] / 1024:.0f} KB original; "
+                f"at {max(settings.IMAGE_WIDTHS)}px or less: {sizes}"
+            )
+
+        # Drop variants of older builds
+        wanted = {
+            variant for entry in manifest['images'].values()
+            for variants in entry['variants'].values() for _, variant, _ in variants
+        }
+        if build_dir.exists():
+            for path in build_dir.rglob('*'):
+                if path.is_file() and path.relative_to(build_dir).as_posix() not in wanted:
+                    path.unlink()
+
+        manifest_path = Path(settings.IMAGE_MANIFEST_PATH)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(manifest, indent=1), encoding='utf-8')
+        os.replace(tmp_path, manifest_path)
+
+        if total_before:
+            self.stdout.write(
+                f"{len(manifest['images'])} images: {total_before / 1024:.0f} KB of originals, "
+                f"{total_after / 1024:.0f} KB for the best full-width variants "
+                f"({(total_before - total_after) / 1024:.0f} KB, {100 * (1 - total_after / total_before):.0f}% saved)"
+            )
@@ -0,0 +1,27 @@
+# core/management/commands/generate_invoices.py
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.billing import generate_invoices
+
+
+class Command(BaseCommand):
+    help = "Regenerate the per-family invoice totals of a month (default: last month)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="YYYY-MM")
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                month = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError("--month must be YYYY-MM")
+        else:
+            month = (date.today().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        started = time.perf_counter()
+        count = generate_invoices(month)
+        self.stdout.write(f"{month:%Y-%m}: {count} invoices in {time.perf_counter() - started:.2f}s")
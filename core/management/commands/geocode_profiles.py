@@ -0,0 +1,28 @@
+# core/management/commands/geocode_profiles.py
+from django.core.management.base import BaseCommand
+
+from core.geo import locate
+from core.models import CaregiverProfile, ElderlyProfile
+
+
+class Command(BaseCommand):
+    help = "Geocode elderly locations and caregiver addresses against the offline gazetteer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, source in ((ElderlyProfile, 'location'), (CaregiverProfile, 'address')):
+            batch = []
+            resolved = 0
+            for obj in model.objects.only('id', source).iterator(chunk_size=batch_size):
+                obj.latitude, obj.longitude, obj.geohash = locate(getattr(obj, source))
+                resolved += obj.latitude is not None
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    model.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+                    batch = []
+            if batch:
+                model.objects.bulk_update(batch, ['latitude', 'longitude', 'geohash'])
+            self.stdout.write(f"{model.__name__}: {resolved} located")
@@ -0,0 +1,53 @@
+# core/management/commands/import_profiles.py
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import FORMATS, IMPORTERS, Checkpoint, ProfileImportError, batches, read_rows
+
+
+class Command(BaseCommand):
+    help = ("Import elderly or caregiver profiles from a CSV or Excel (.xlsx) file. "
+            "Progress is checkpointed after every batch; re-running resumes after the last one.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Default: from the file extension.")
+        parser.add_argument('--batch-size', type=int, default=settings.PROFILE_IMPORT_BATCH_SIZE)
+        parser.add_argument('--checkpoint', help="Default: <path>.checkpoint.json")
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        data_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        import_batch = IMPORTERS[options['kind']]
+        try:
+            checkpoint = Checkpoint(options['checkpoint'] or f'{path}.checkpoint.json', path, options['kind'])
+            if not options['restart'] and checkpoint.load():
+                self.stdout.write(f"Resuming after row {checkpoint.rows_done}")
+            rows = read_rows(path, data_format)
+
+            started = time.perf_counter()
+            for batch in batches(rows, options['batch_size'], start=checkpoint.rows_done):
+                created, skipped, errors = import_batch(batch)
+                for number, row_errors in sorted(errors.items()):
+                    self.stderr.write(f"row {number}: " + '; '.join(
+                        f"{field}: {' '.join(messages)}" for field, messages in row_errors.items()))
+                checkpoint.rows_done = batch[-1][0]
+                checkpoint.created += created
+                checkpoint.skipped += skipped
+                checkpoint.rejected += len(errors)
+                checkpoint.save()
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"row {checkpoint.rows_done}: {checkpoint.created} created")
+        except (OSError, ProfileImportError) as e:
+            raise CommandError(e)
+
+        checkpoint.delete()
+        self.stdout.write(
+            f"{checkpoint.created} {options['kind']} profiles created, {checkpoint.skipped} duplicates skipped, "
+            f"{checkpoint.rejected} rows rejected in {time.perf_counter() - started:.2f}s"
+        )
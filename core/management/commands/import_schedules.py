@@ -0,0 +1,48 @@
+# core/management/commands/import_schedules.py
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import FORMATS, create_schedules, read_rows
+from core.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Create visits in bulk from a JSON or CSV file (one schedule per row)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Default: from the file extension.")
+        parser.add_argument('--family', help="Email of the family user; only their elderly profiles may be scheduled.")
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--dry-run', action='store_true', help="Validate only.")
+
+    def handle(self, *args, **options):
+        data_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        family = None
+        if options['family']:
+            try:
+                family = CustomUser.objects.get(email=options['family'])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"No user with email {options['family']}")
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as fh:
+                rows = read_rows(fh.read(), data_format)
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        started = time.perf_counter()
+        schedules, errors = create_schedules(
+            rows, family=family, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        for error in errors:
+            messages = '; '.join(
+                f"{field}: {' '.join(field_errors)}" if field != '__all__' else ' '.join(field_errors)
+                for field, field_errors in error['errors'].items()
+            )
+            self.stderr.write(f"row {error['row']}: {messages}")
+        verb = "would be created" if options['dry_run'] else "created"
+        self.stdout.write(
+            f"{len(schedules)} visits {verb}, {len(errors)} rows rejected "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
@@ -0,0 +1,18 @@
+# core/management/commands/match_caregivers.py
+from django.core.management.base import BaseCommand
+
+from core.matching import match_open_schedules
+
+
+class Command(BaseCommand):
+    help = "Print the top-k caregiver matches for every open upcoming schedule."
+
+    def add_arguments(self, parser):
+        parser.add_argument('-k', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=512)
+
+    def handle(self, *args, **options):
+        matches = match_open_schedules(k=options['k'], batch_size=options['batch_size'])
+        for schedule_id, ranked in matches.items():
+            ranked = ', '.join(f"{caregiver_id} ({score:.2f})" for caregiver_id, score in ranked) or '-'
+            self.stdout.write(f"schedule {schedule_id}: {ranked}")
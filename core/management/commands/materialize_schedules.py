@@ -0,0 +1,21 @@
+# core/management/commands/materialize_schedules.py
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import ScheduleRule
+from core.recurrence import materialize
+
+
+class Command(BaseCommand):
+    help = "Write the next N days of every active recurring schedule as Schedule rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SCHEDULE_MATERIALIZE_DAYS)
+
+    def handle(self, *args, **options):
+        rules = ScheduleRule.objects.filter(Q(until__isnull=True) | Q(until__gte=date.today()))
+        created = materialize(rules.iterator(), days=options['days'])
+        self.stdout.write(f"{created} visits created")
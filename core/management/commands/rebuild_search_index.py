@@ -0,0 +1,12 @@
+# core/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from core.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of elderly profiles."
+
+    def handle(self, *args, **options):
+        get_backend().rebuild()
+        self.stdout.write("Search index rebuilt")
@@ -0,0 +1,224 @@
+# core/matching.py
+"""
+Caregiver matching engine.
+
+Schedules and caregivers are turned into flat NumPy feature arrays once, then
+scored in batches of schedules against every caregiver at the same time, so
+the work is a handful of array operations per batch rather than a Python loop
+per (schedule, caregiver) pair.
+"""
+import datetime
+
+import numpy as np
+
+from .geo import EARTH_RADIUS_KM
+from .task_catalogue import parse_task_list
+
+DEFAULT_WEIGHTS = {
+    'distance': 0.35,
+    'skills': 0.30,
+    'rate': 0.25,
+    'availability': 0.10,
+}
+MAX_DISTANCE_KM = 30.0
+# Score given to a criterion we cannot evaluate (missing coordinates, rate...)
+UNKNOWN_SCORE = 0.5
+
+
+def to_minutes(value):
+    if value is None:
+        return np.nan
+    return value.hour * 60 + value.minute
+
+
+class Vocabulary:
+    """Maps task/skill and gender strings to column indexes."""
+
+    def __init__(self):
+        self.index = {}
+
+    def add(self, names):
+        return [self.index.setdefault(name, len(self.index)) for name in names]
+
+    def __len__(self):
+        return len(self.index)
+
+
+def one_hot(rows, width):
+    matrix = np.zeros((len(rows), max(width, 1)), dtype=np.float32)
+    for i, columns in enumerate(rows):
+        matrix[i, columns] = 1.0
+    return matrix
+
+
+class ScheduleFeatures:
+    def __init__(self, ids, lat, lon, start, end, rate, gender, tasks):
+        self.ids = np.asarray(ids)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.rate = np.asarray(rate, dtype=np.float64)
+        # -1 means "no gender preference"
+        self.gender = np.asarray(gender, dtype=np.int32)
+        self.tasks = tasks
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class CaregiverFeatures:
+    def __init__(self, ids, lat, lon, available_from, available_to, rate, gender, skills):
+        self.ids = np.asarray(ids)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.available_from = np.asarray(available_from, dtype=np.float64)
+        self.available_to = np.asarray(available_to, dtype=np.float64)
+        self.rate = np.asarray(rate, dtype=np.float64)
+        self.gender = np.asarray(gender, dtype=np.int32)
+        self.skills = skills
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def build_features(schedules, caregivers):
+    """
+    Build feature arrays from Schedule (with ``elderly`` selected) and
+    CaregiverProfile instances, sharing one task/skill and gender vocabulary.
+    """
+    words = Vocabulary()
+    genders = Vocabulary()
+
+    task_rows = [words.add(parse_task_list(s.task_list)) for s in schedules]
+    skill_rows = [words.add(parse_task_list(c.skills)) for c in caregivers]
+
+    schedule_features = ScheduleFeatures(
+        ids=[s.id for s in schedules],
+        lat=[np.nan if s.elderly.latitude is None else s.elderly.latitude for s in schedules],
+        lon=[np.nan if s.elderly.longitude is None else s.elderly.longitude for s in schedules],
+        start=[to_minutes(s.start_time) for s in schedules],
+        end=[to_minutes(s.end_time) for s in schedules],
+        rate=[float(s.hourly_rate) for s in schedules],
+        gender=[
+            genders.add([s.elderly.caregiver_gender_preference.strip().lower()])[0]
+            if s.elderly.caregiver_gender_preference.strip() else -1
+            for s in schedules
+        ],
+        tasks=one_hot(task_rows, len(words)),
+    )
+    caregiver_features = CaregiverFeatures(
+        ids=[c.id for c in caregivers],
+        lat=[np.nan if c.latitude is None else c.latitude for c in caregivers],
+        lon=[np.nan if c.longitude is None else c.longitude for c in caregivers],
+        available_from=[to_minutes(c.available_from) for c in caregivers],
+        available_to=[to_minutes(c.available_to) for c in caregivers],
+        rate=[np.nan if c.hourly_rate is None else float(c.hourly_rate) for c in caregivers],
+        gender=[genders.add([c.gender.strip().lower()])[0] for c in caregivers],
+        skills=one_hot(skill_rows, len(words)),
+    )
+    return schedule_features, caregiver_features
+
+
+def distance_matrix(lat1, lon1, lat2, lon2):
+    """Haversine distances in km between every pair of points (NaN-safe)."""
+    lat1 = np.radians(lat1)[:, None]
+    lon1 = np.radians(lon1)[:, None]
+    lat2 = np.radians(lat2)[None, :]
+    lon2 = np.radians(lon2)[None, :]
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def score_batch(schedules, caregivers, rows, weights=None, max_distance_km=MAX_DISTANCE_KM):
+    """
+    Score the schedules at ``rows`` (a slice) against every caregiver.
+
+    Returns a (len(rows), len(caregivers)) float32 matrix where infeasible
+    pairs (too far, outside availability, wrong gender) are ``-inf``.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    c = caregivers
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        distance = distance_matrix(schedules.lat[rows], schedules.lon[rows], c.lat, c.lon)
+        distance_known = ~np.isnan(distance)
+        distance_score = np.where(distance_known, np.clip(1.0 - distance / max_distance_km, 0.0, 1.0), UNKNOWN_SCORE)
+
+        start = schedules.start[rows][:, None]
+        end = schedules.end[rows][:, None]
+        window_known = ~(np.isnan(c.available_from) | np.isnan(c.available_to))[None, :]
+        available = (c.available_from[None, :] <= start) & (c.available_to[None, :] >= end)
+        availability_score = np.where(window_known, 1.0, UNKNOWN_SCORE)
+
+        rate = schedules.rate[rows][:, None] / c.rate[None, :]
+        rate_score = np.where(np.isnan(rate), UNKNOWN_SCORE, np.clip(rate, 0.0, 1.0))
+
+        tasks = schedules.tasks[rows]
+        task_count = tasks.sum(axis=1)
+        covered = tasks @ c.skills.T
+        skills_score = np.where(task_count[:, None] > 0, covered / task_count[:, None], 1.0)
+
+    score = (weights['distance'] * distance_score
+             + weights['availability'] * availability_score
+             + weights['rate'] * rate_score
+             + weights['skills'] * skills_score).astype(np.float32)
+
+    preference = schedules.gender[rows][:, None]
+    infeasible = (distance_known & (distance > max_distance_km))
+    infeasible |= window_known & ~available
+    infeasible |= (preference >= 0) & (c.gender[None, :] != preference)
+    score[infeasible] = -np.inf
+    return score
+
+
+def top_k(scores, k):
+    """Column indexes and scores of the k best entries of each row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp), np.empty((scores.shape[0], 0), dtype=scores.dtype)
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+def rank(schedules, caregivers, k=5, batch_size=512, weights=None, max_distance_km=MAX_DISTANCE_KM):
+    """
+    Return ``{schedule_id: [(caregiver_id, score), ...]}`` with at most ``k``
+    feasible caregivers per schedule, best first.
+
+    Schedules are processed ``batch_size`` at a time so the score matrix
+    stays at ``batch_size x len(caregivers)`` regardless of the total.
+    """
+    matches = {}
+    for offset in range(0, len(schedules), batch_size):
+        rows = slice(offset, offset + batch_size)
+        scores = score_batch(schedules, caregivers, rows, weights, max_distance_km)
+        best, best_scores = top_k(scores, k)
+        for schedule_id, columns, values in zip(schedules.ids[rows], best, best_scores):
+            matches[schedule_id.item()] = [
+                (caregivers.ids[col].item(), float(value))
+                for col, value in zip(columns, values)
+                if np.isfinite(value)
+            ]
+    return matches
+
+
+def open_schedules():
+    from .models import Schedule
+
+    return (Schedule.objects
+            .filter(caregiver__isnull=True, date__gte=datetime.date.today())
+            .select_related('elderly'))
+
+
+def match_open_schedules(k=5, schedules=None, caregivers=None, **kwargs):
+    """Rank caregivers for every open (unassigned, upcoming) schedule."""
+    from .models import CaregiverProfile
+
+    schedules = list(open_schedules() if schedules is None else schedules)
+    caregivers = list(CaregiverProfile.objects.all() if caregivers is None else caregivers)
+    schedule_features, caregiver_features = build_features(schedules, caregivers)
+    return rank(schedule_features, caregiver_features, k=k, **kwargs)
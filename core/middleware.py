@@ -0,0 +1,250 @@
+# core/middleware.py
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+from .profiling import profile_templates
+from .ratelimit import parse_rate, rate_limit_store
+
+logger = logging.getLogger('core.queries')
+template_logger = logging.getLogger('core.templates')
+
+IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalise SQL so the same query with different parameters compares equal."""
+    return IN_LIST_RE.sub('(...)', WHITESPACE_RE.sub(' ', sql.strip()))
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts and times queries.
+
+    Unlike connection.queries it works with DEBUG off and does not keep
+    every statement in memory, only a counter per fingerprint.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """{fingerprint: count} for queries issued more than once (likely N+1)."""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, SQL time and duplicate queries per request.
+
+    Enabled with QUERY_INSTRUMENTATION = True. Results are sent as a
+    Server-Timing header and logged as JSON on the ``core.queries`` logger;
+    requests over their QUERY_BUDGETS entry (keyed by URL name) are logged
+    as warnings. Queries run while a streaming response is consumed are not
+    counted.
+
+    Works in both handler modes. Under ASGI the ORM queries from the
+    request's sync_to_async thread, which has its own connection object, so
+    the recorder is installed there.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        # connection is looked up inside the thread, for that thread's object
+        recording = await sync_to_async(lambda: connection.execute_wrapper(recorder))()
+        await sync_to_async(recording.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.__exit__)(None, None, None)
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def report(self, request, response, recorder, total):
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+            f'app;dur={total * 1000:.1f}'
+        )
+
+        url_name = request.resolver_match.view_name if request.resolver_match else None
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.duration * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'duplicates': recorder.duplicates,
+            'budget': budget,
+        }
+        level = logging.WARNING if budget is not None and recorder.count > budget else logging.INFO
+        logger.log(level, json.dumps(record))
+
+
+class TemplateProfilingMiddleware:
+    """
+    Time each template and {% block %} rendered per request (see
+    core.profiling). Enabled with TEMPLATE_PROFILING = True. The total is
+    added to the Server-Timing header and the breakdown is logged as JSON
+    on the ``core.templates`` logger.
+
+    Works in both handler modes; the profile is held in a ContextVar, which
+    the sync_to_async threads of a request share with its event loop task.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TEMPLATE_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with profile_templates() as profile:
+            response = self.get_response(request)
+        self.report(request, response, profile)
+        return response
+
+    async def __acall__(self, request):
+        with profile_templates() as profile:
+            response = await self.get_response(request)
+        self.report(request, response, profile)
+        return response
+
+    def report(self, request, response, profile):
+        timing = f'tpl;dur={profile.total * 1000:.1f};desc="{sum(profile.templates.counts.values())} templates"'
+        response['Server-Timing'] = ', '.join(filter(None, [response.get('Server-Timing'), timing]))
+        template_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'url_name': request.resolver_match.view_name if request.resolver_match else None,
+            **profile.as_dict(),
+        }))
+
+
+class RateLimitMiddleware:
+    """
+    Throttle POSTs to the views named in RATE_LIMITS, per client IP and per
+    submitted form field (e.g. the email), before the view (and so
+    authenticate()) runs. Rejected requests get a 429 with Retry-After. Any
+    other request costs a method check.
+
+    Works in both handler modes, so under ASGI the async views are not
+    handed to a thread on its account; the async path uses the store's
+    ahit().
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        for key, count, period in self.hits(request):
+            retry_after = rate_limit_store().hit(key, count, period)
+            if retry_after is not None:
+                return too_many_attempts(retry_after)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        for key, count, period in self.hits(request):
+            retry_after = await rate_limit_store().ahit(key, count, period)
+            if retry_after is not None:
+                return too_many_attempts(retry_after)
+        return await self.get_response(request)
+
+    def hits(self, request):
+        """The (key, count, period) to record for this request, if any."""
+        if request.method != 'POST':
+            return []
+        try:
+            url_name = resolve(request.path_info).view_name
+        except Resolver404:
+            return []
+        limits = settings.RATE_LIMITS.get(url_name)
+        if not limits:
+            return []
+
+        hits = []
+        for field, rate in limits.items():
+            if field == 'ip':
+                value = client_ip(request)
+            else:
+                value = request.POST.get(field, '').strip().lower()
+            if value:
+                hits.append((f'{url_name}:{field}:{value}', *parse_rate(rate)))
+        return hits
+
+
+def too_many_attempts(retry_after):
+    response = HttpResponse('Too many attempts. Please wait and try again.', status=429, content_type='text/plain')
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def client_ip(request):
+    """
+    The client address from RATE_LIMIT_IP_HEADER. For X-Forwarded-For the
+    last entry is used: the one added by our own proxy, which the client
+    cannot forge.
+    """
+    value = request.META.get(settings.RATE_LIMIT_IP_HEADER, '')
+    return value.rsplit(',', 1)[-1].strip()
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_geocoded_locations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='caregiverprofile',
+            name='available_from',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='caregiverprofile',
+            name='available_to',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='caregiverprofile',
+            name='hourly_rate',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='caregiverprofile',
+            name='skills',
+            field=models.TextField(blank=True, help_text='Comma-separated skills'),
+        ),
+        migrations.AddField(
+            model_name='elderlyprofile',
+            name='caregiver_gender_preference',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='caregiver',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.caregiverprofile'),
+        ),
+    ]
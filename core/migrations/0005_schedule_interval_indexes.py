@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_caregiver_matching'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['elderly', 'date', 'start_time'], name='core_schedu_elderly_f0e972_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['caregiver', 'date', 'start_time'], name='core_schedu_caregiv_dc0d34_idx'),
+        ),
+    ]
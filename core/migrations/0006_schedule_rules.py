@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_schedule_interval_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly')], max_length=10)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('weekdays', models.CharField(blank=True, help_text='Comma-separated weekday numbers, 0=Monday', max_length=20)),
+                ('start_date', models.DateField()),
+                ('until', models.DateField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(blank=True, null=True)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('location', models.CharField(max_length=255)),
+                ('task_list', models.TextField(help_text='Comma-separated tasks')),
+                ('hourly_rate', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('materialized_until', models.DateField(blank=True, null=True)),
+                ('caregiver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.caregiverprofile')),
+                ('elderly', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.elderlyprofile')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='rule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.schedulerule'),
+        ),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=models.UniqueConstraint(fields=('rule', 'date'), name='unique_rule_occurrence'),
+        ),
+    ]
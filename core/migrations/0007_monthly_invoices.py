@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_schedule_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyInvoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('visits', models.PositiveIntegerField()),
+                ('minutes', models.PositiveIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('family', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('family', 'month'), name='unique_family_month_invoice')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def parse_task_lists(apps, schema_editor):
+    Schedule = apps.get_model('core', 'Schedule')
+    Task = apps.get_model('core', 'Task')
+    ScheduleTask = apps.get_model('core', 'ScheduleTask')
+
+    task_ids = {}
+    links = []
+    for schedule_id, task_list in Schedule.objects.values_list('id', 'task_list').iterator(chunk_size=2000):
+        seen = set()
+        for name in task_list.split(','):
+            name = ' '.join(name.split()).lower()
+            if not name or name in seen:
+                continue
+            seen.add(name)
+            if name not in task_ids:
+                task_ids[name] = Task.objects.create(name=name).id
+            links.append(ScheduleTask(schedule_id=schedule_id, task_id=task_ids[name]))
+            if len(links) >= 2000:
+                ScheduleTask.objects.bulk_create(links)
+                links = []
+    ScheduleTask.objects.bulk_create(links)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_monthly_invoices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScheduleTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed', models.BooleanField(default=False)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.schedule')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.task')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='tasks',
+            field=models.ManyToManyField(blank=True, through='core.ScheduleTask', to='core.task'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduletask',
+            index=models.Index(fields=['task', 'completed', 'schedule'], name='core_schedu_task_id_4ae63d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scheduletask',
+            constraint=models.UniqueConstraint(fields=('schedule', 'task'), name='unique_schedule_task'),
+        ),
+        migrations.RunPython(parse_task_lists, migrations.RunPython.noop),
+    ]
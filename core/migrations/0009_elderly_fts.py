@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:05
+
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE core_elderly_fts USING fts5("
+        "name, med_condition, location, tasks, tokenize='unicode61', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO core_elderly_fts (rowid, name, med_condition, location, tasks) "
+        "SELECT e.id, e.name, e.med_condition, e.location, "
+        "COALESCE((SELECT group_concat(name, ' ') FROM ("
+        "  SELECT DISTINCT t.name FROM core_scheduletask st "
+        "  JOIN core_task t ON t.id = st.task_id "
+        "  JOIN core_schedule s ON s.id = st.schedule_id "
+        "  WHERE s.elderly_id = e.id)), '') "
+        "FROM core_elderlyprofile e"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS core_elderly_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_task_catalogue'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
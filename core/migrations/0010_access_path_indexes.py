@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_elderly_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='caregiverprofile',
+            index=models.Index(fields=['phone'], name='core_caregi_phone_ba3534_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='caregiverprofile',
+            index=models.Index(fields=['gender'], name='core_caregi_gender_de5568_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='elderlyprofile',
+            index=models.Index(fields=['location'], name='core_elderl_locatio_55c9d9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='elderlyprofile',
+            index=models.Index(fields=['gender'], name='core_elderl_gender_ed8dd7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['date', 'start_time'], name='core_schedu_date_fae110_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['location', 'date'], name='core_schedu_locatio_f26b45_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:40
+
+from django.db import migrations
+
+
+def enable_wal(apps, schema_editor):
+    # WAL is stored in the database file, so it is set once here rather than
+    # on every connection. It cannot be changed inside a transaction.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = WAL')
+
+
+def disable_wal(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = DELETE')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, disable_wal),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_sqlite_wal'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='caregiverprofile',
+            name='core_caregi_gender_de5568_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='elderlyprofile',
+            name='core_elderl_gender_ed8dd7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='monthlyinvoice',
+            index=models.Index(fields=['month'], name='core_monthl_month_801458_idx'),
+        ),
+    ]
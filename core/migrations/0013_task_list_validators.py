@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:25
+
+import core.task_catalogue
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_gender_and_invoice_month_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='schedule',
+            name='task_list',
+            field=models.TextField(help_text='Comma-separated tasks', validators=[core.task_catalogue.validate_task_list]),
+        ),
+        migrations.AlterField(
+            model_name='schedulerule',
+            name='task_list',
+            field=models.TextField(help_text='Comma-separated tasks', validators=[core.task_catalogue.validate_task_list]),
+        ),
+    ]
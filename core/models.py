@@ -1,7 +1,12 @@
 # core/models.py
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.conf import settings
+from .billing import visit_cost
+from .geo import locate
+from .recurrence import expand
+from .task_catalogue import TASK_NAME_MAX_LENGTH, validate_task_list
 
 
 class CustomUser(AbstractUser):
@@ -15,6 +20,14 @@ class CustomUser(AbstractUser):
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive email matching, e.g. family accounts in imports
+            models.Index(Lower('email'), name='core_customuser_email_lower'),
+        ]
+
+
 class CaregiverProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
@@ -23,6 +36,22 @@ class CaregiverProfile(models.Model):
     dob = models.DateField()
     gender = models.CharField(max_length=20)
     emergency_contact = models.CharField(max_length=50)
+    hourly_rate = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    skills = models.TextField(blank=True, help_text="Comma-separated skills")
+    available_from = models.TimeField(null=True, blank=True)
+    available_to = models.TimeField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['phone']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.latitude, self.longitude, self.geohash = locate(self.address)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -34,18 +63,139 @@ class ElderlyProfile(models.Model):
     gender = models.CharField(max_length=20)
     med_condition = models.TextField()
     location = models.CharField(max_length=255)
+    caregiver_gender_preference = models.CharField(max_length=20, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['location']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.latitude, self.longitude, self.geohash = locate(self.location)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 class Schedule(models.Model):
     elderly = models.ForeignKey(ElderlyProfile, on_delete=models.CASCADE)
+    caregiver = models.ForeignKey(CaregiverProfile, on_delete=models.SET_NULL, null=True, blank=True)
+    rule = models.ForeignKey('ScheduleRule', on_delete=models.SET_NULL, null=True, blank=True)
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
     location = models.CharField(max_length=255)
-    task_list = models.TextField(help_text="Comma-separated tasks")
+    task_list = models.TextField(help_text="Comma-separated tasks", validators=[validate_task_list])
+    tasks = models.ManyToManyField('Task', through='ScheduleTask', blank=True)
     hourly_rate = models.DecimalField(max_digits=8, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['elderly', 'date', 'start_time']),
+            models.Index(fields=['caregiver', 'date', 'start_time']),
+            models.Index(fields=['date', 'start_time']),
+            models.Index(fields=['location', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['rule', 'date'], name='unique_rule_occurrence'),
+        ]
+
+    @classmethod
+    def overlapping(cls, date, start_time, end_time):
+        """Schedules on ``date`` whose time range overlaps [start_time, end_time)."""
+        return cls.objects.filter(date=date, start_time__lt=end_time, end_time__gt=start_time)
+
+    @property
+    def minutes(self):
+        return (self.end_time.hour * 60 + self.end_time.minute) - (self.start_time.hour * 60 + self.start_time.minute)
+
+    @property
+    def cost(self):
+        return visit_cost(self.minutes, self.hourly_rate)
+
+    def __str__(self):
+        return f"{self.elderly.name} - {self.date}"
+
+class ScheduleRule(models.Model):
+    """A recurring visit; occurrences are expanded on demand, see core.recurrence."""
+    FREQUENCY_CHOICES = (
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+    )
+    elderly = models.ForeignKey(ElderlyProfile, on_delete=models.CASCADE)
+    caregiver = models.ForeignKey(CaregiverProfile, on_delete=models.SET_NULL, null=True, blank=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)
+    weekdays = models.CharField(max_length=20, blank=True, help_text="Comma-separated weekday numbers, 0=Monday")
+    start_date = models.DateField()
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    location = models.CharField(max_length=255)
+    task_list = models.TextField(help_text="Comma-separated tasks", validators=[validate_task_list])
+    hourly_rate = models.DecimalField(max_digits=8, decimal_places=2)
+    materialized_until = models.DateField(null=True, blank=True)
+
+    def weekday_list(self):
+        return [int(day) for day in self.weekdays.split(',') if day.strip()]
+
+    def occurrences(self, window_start=None, window_end=None):
+        return expand(
+            self.start_date, self.frequency, self.interval, self.weekday_list(),
+            until=self.until, count=self.count, window_start=window_start, window_end=window_end,
+        )
+
+    def __str__(self):
+        return f"{self.elderly.name} - {self.get_frequency_display()} from {self.start_date}"
+
+
+class MonthlyInvoice(models.Model):
+    """Cached billing totals of a family for a closed month, see core.billing."""
+    family = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    month = models.DateField(help_text="First day of the month")
+    visits = models.PositiveIntegerField()
+    minutes = models.PositiveIntegerField()
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['family', 'month'], name='unique_family_month_invoice'),
+        ]
+        # generate_invoices() replaces a whole month at once
+        indexes = [
+            models.Index(fields=['month']),
+        ]
+
+    def __str__(self):
+        return f"{self.family} - {self.month:%Y-%m}"
+
+
+class Task(models.Model):
+    """Task catalogue; Schedule.task_list is parsed into these, see core.task_catalogue."""
+    name = models.CharField(max_length=TASK_NAME_MAX_LENGTH, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ScheduleTask(models.Model):
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE)
+    completed = models.BooleanField(default=False)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['schedule', 'task'], name='unique_schedule_task'),
+        ]
+        indexes = [
+            models.Index(fields=['task', 'completed', 'schedule']),
+        ]
+
     def __str__(self):
-        return f"{self.elderly.name} - {self.date}"
\ No newline at end of file
+        return f"{self.schedule} - {self.task}"
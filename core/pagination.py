@@ -0,0 +1,137 @@
+# core/pagination.py
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connection
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """
+    Keyset (cursor) pagination on the primary key.
+
+    Instead of OFFSET/COUNT, each page is fetched with ``id > cursor`` (or
+    ``id < cursor`` when paging backwards), so the cost of a page does not
+    depend on how deep into the table it is or on the size of the table.
+    """
+
+    def __init__(self, queryset, after=None, before=None, page_size=25):
+        window = self._window(queryset, after, before, page_size)
+        self._paginate(list(window))
+
+    @classmethod
+    async def acreate(cls, queryset, after=None, before=None, page_size=25):
+        """Build a page from an async view, fetching it with async iteration."""
+        page = cls.__new__(cls)
+        window = page._window(queryset, after, before, page_size)
+        page._paginate([row async for row in window])
+        return page
+
+    def _window(self, queryset, after, before, page_size):
+        """The query for one page plus a look-ahead row."""
+        self.page_size = page_size
+        self.after = parse_cursor(after)
+        self.before = parse_cursor(before)
+        if self.before is not None:
+            return queryset.filter(id__lt=self.before).order_by('-id')[:page_size + 1]
+        if self.after is not None:
+            queryset = queryset.filter(id__gt=self.after)
+        return queryset.order_by('id')[:page_size + 1]
+
+    def _paginate(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.before is not None:
+            rows.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_next = has_more
+            self.has_previous = self.after is not None
+
+        self.object_list = rows
+        if not rows:
+            self.has_next = self.has_previous = False
+
+    @property
+    def next_cursor(self):
+        if self.has_next:
+            return self.object_list[-1].id
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous:
+            return self.object_list[0].id
+        return None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def parse_cursor(value):
+    """Return the cursor as an int, or None if it is missing or malformed."""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
+
+def estimated_row_count(model):
+    """
+    Cheap row estimate for ``model``'s table without a COUNT(*): PostgreSQL's
+    planner statistics, or the highest primary key on other databases.
+    Returns None when no estimate is available.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        return row[0] if row and row[0] >= 0 else None
+    return model._default_manager.aggregate(highest=Max('pk'))['highest'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that never runs an unbounded COUNT(*).
+
+    Unfiltered changelists over large tables use estimated_row_count();
+    filtered ones count at most ``max_count`` matching rows, so paging stops
+    there and the filter should be narrowed instead.
+
+    The primary key estimate counts deleted rows too, so the last pages it
+    promises can be empty. Asking for one counts the table for real and
+    serves the real last page instead.
+    """
+    max_count = 10000
+    estimated = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate > self.max_count:
+                self.estimated = True
+                return estimate
+        return queryset.order_by()[:self.max_count].count()
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # A page number taken from the estimate, after page() corrected it
+            if self.estimated and int(number) > self.num_pages:
+                return self.num_pages
+            raise
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimated and page.number > 1 and not page.object_list:
+            self.count = self.object_list.count()
+            self.__dict__.pop('num_pages', None)
+            page = super().page(self.num_pages)
+        return page
@@ -0,0 +1,112 @@
+# core/profiling.py
+"""
+Template render profiling.
+
+Inside ``with profile_templates() as profile:`` every template and
+{% block %} rendered by the current thread (or asyncio task) is timed.
+Times are inclusive: a template's time includes the templates it extends
+and includes, and the blocks rendered in it. ``profile.total`` counts only
+the outermost renders.
+
+Template._render and BlockNode.render are wrapped the first time a profile
+is started; outside a profile the wrappers only read a context variable.
+TemplateProfilingMiddleware uses this per request.
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+
+_profile = ContextVar('template_profile', default=None)
+_install_lock = threading.Lock()
+
+
+class RenderTimes:
+    """Render count and total seconds per template or block."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.seconds = Counter()
+
+    def add(self, key, seconds):
+        self.counts[key] += 1
+        self.seconds[key] += seconds
+
+    def rows(self):
+        """(key, renders, seconds), slowest first."""
+        return [(key, self.counts[key], seconds) for key, seconds in self.seconds.most_common()]
+
+    def as_dict(self):
+        return {key: {'renders': count, 'ms': round(seconds * 1000, 2)} for key, count, seconds in self.rows()}
+
+
+class TemplateProfile:
+    def __init__(self):
+        self.templates = RenderTimes()
+        # Keyed "<template rendered>:<block name>"
+        self.blocks = RenderTimes()
+        self.total = 0.0
+        self.depth = 0
+
+    def as_dict(self):
+        return {
+            'template_ms': round(self.total * 1000, 2),
+            'templates': self.templates.as_dict(),
+            'blocks': self.blocks.as_dict(),
+        }
+
+
+def _template_key(template, context):
+    return template.name or '<string>'
+
+
+def _block_key(block, context):
+    return f"{getattr(context.template, 'name', None) or '<string>'}:{block.name}"
+
+
+def _profiled(render, times, key):
+    def profiled_render(node, context):
+        profile = _profile.get()
+        if profile is None:
+            return render(node, context)
+        profile.depth += 1
+        started = time.perf_counter()
+        try:
+            return render(node, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            profile.depth -= 1
+            getattr(profile, times).add(key(node, context), elapsed)
+            if times == 'templates' and not profile.depth:
+                profile.total += elapsed
+
+    profiled_render.profiled = True
+    return profiled_render
+
+
+def install():
+    """
+    Wrap the render methods. Whatever is installed at the time is wrapped,
+    so this also works under the test runner's own instrumentation; it is
+    a no-op when the wrappers are already in place.
+    """
+    with _install_lock:
+        if not getattr(Template._render, 'profiled', False):
+            Template._render = _profiled(Template._render, 'templates', _template_key)
+        if not getattr(BlockNode.render, 'profiled', False):
+            BlockNode.render = _profiled(BlockNode.render, 'blocks', _block_key)
+
+
+@contextmanager
+def profile_templates():
+    install()
+    profile = TemplateProfile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
@@ -0,0 +1,130 @@
+# core/ratelimit.py
+"""
+Rate limit stores for RateLimitMiddleware.
+
+A limit is written "<count>/<period>", e.g. "5/m" for five per minute
+(periods: s, m, h, d). ``store.hit(key, count, period)`` records one
+attempt and returns None if it is allowed, or the number of seconds to
+wait before retrying; ``await store.ahit(...)`` is the same for async
+requests.
+
+LocMemStore keeps a token bucket per key in process memory: the cheapest
+option, but each worker process counts separately. CacheStore keeps an
+approximate sliding window in a Django cache (e.g. Redis) shared by every
+worker, using only atomic add/incr operations.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'5/m' -> (5, 60)."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period]
+
+
+class LocMemStore:
+    """
+    Token buckets holding up to ``count`` tokens and refilling at
+    ``count / period`` per second. The least recently used buckets are
+    dropped past ``max_keys``; a dropped bucket was idle, so it would have
+    been nearly full anyway.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hit(self, key, count, period, now=None):
+        now = time.monotonic() if now is None else now
+        refill = count / period
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (count, now))
+            tokens = min(count, tokens + (now - updated) * refill)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                retry_after = None
+            else:
+                self.buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / refill
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return retry_after
+
+    async def ahit(self, key, count, period, now=None):
+        # Only memory and a briefly held lock: no need for a thread
+        return self.hit(key, count, period, now)
+
+
+class CacheStore:
+    """
+    Sliding window approximated from two fixed-window counters: the
+    previous window's count is weighted by how much of it still overlaps
+    the sliding window.
+    """
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def hit(self, key, count, period, now=None):
+        now = time.time() if now is None else now
+        window = int(now // period)
+        current_key = f'ratelimit:{key}:{window}'
+        # Kept for two periods, so it is still there as the previous window
+        if self.cache.add(current_key, 1, 2 * period):
+            current = 1
+        else:
+            try:
+                current = self.cache.incr(current_key)
+            except ValueError:
+                # Expired between add() and incr()
+                self.cache.set(current_key, 1, 2 * period)
+                current = 1
+        previous = self.cache.get(f'ratelimit:{key}:{window - 1}', 0)
+        return self.retry_after(count, period, now, window, current, previous)
+
+    async def ahit(self, key, count, period, now=None):
+        """hit() through the cache's async API."""
+        now = time.time() if now is None else now
+        window = int(now // period)
+        current_key = f'ratelimit:{key}:{window}'
+        if await self.cache.aadd(current_key, 1, 2 * period):
+            current = 1
+        else:
+            try:
+                current = await self.cache.aincr(current_key)
+            except ValueError:
+                await self.cache.aset(current_key, 1, 2 * period)
+                current = 1
+        previous = await self.cache.aget(f'ratelimit:{key}:{window - 1}', 0)
+        return self.retry_after(count, period, now, window, current, previous)
+
+    @staticmethod
+    def retry_after(count, period, now, window, current, previous):
+        elapsed = now / period - window
+        if previous * (1 - elapsed) + current <= count:
+            return None
+        if previous and current < count:
+            # Wait until enough of the previous window has slid out
+            needed = 1 - (count - current) / previous
+            return max((needed - elapsed) * period, 1)
+        return max((1 - elapsed) * period, 1)
+
+
+@lru_cache(maxsize=None)
+def get_store(path, options):
+    return import_string(path)(**dict(options))
+
+
+def rate_limit_store():
+    return get_store(settings.RATE_LIMIT_STORE, tuple(sorted(settings.RATE_LIMIT_STORE_OPTIONS.items())))
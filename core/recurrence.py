@@ -0,0 +1,132 @@
+# core/recurrence.py
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .caching import bump
+from .intervals import find_conflicts
+from .search import get_backend
+from .task_catalogue import sync_schedule_tasks
+
+DAILY = 'daily'
+WEEKLY = 'weekly'
+
+
+def expand(start_date, frequency, interval=1, weekdays=(), until=None, count=None,
+           window_start=None, window_end=None):
+    """
+    Lazily yield the dates of a recurrence rule that fall in
+    [window_start, window_end].
+
+    ``count`` is the total number of occurrences from ``start_date``. The
+    generator jumps straight to the first period of the window instead of
+    walking every occurrence since ``start_date``, so expanding a window far
+    in the future costs the same as expanding the first one. With no
+    ``until``, ``count`` or ``window_end`` the generator is infinite.
+    """
+    interval = max(interval, 1)
+    window_start = max(window_start or start_date, start_date)
+    if until is not None:
+        window_end = until if window_end is None else min(window_end, until)
+
+    if frequency == DAILY:
+        period = -(-(window_start - start_date).days // interval)
+        while count is None or period < count:
+            day = start_date + timedelta(days=period * interval)
+            if window_end is not None and day > window_end:
+                return
+            yield day
+            period += 1
+        return
+
+    days = sorted(set(weekdays)) or [start_date.weekday()]
+    first_monday = start_date - timedelta(days=start_date.weekday())
+    skipped_in_first_week = sum(1 for wd in days if wd < start_date.weekday())
+    period = (window_start - first_monday).days // 7 // interval
+    seen = max(period * len(days) - skipped_in_first_week, 0)
+    while True:
+        monday = first_monday + timedelta(weeks=period * interval)
+        for wd in days:
+            day = monday + timedelta(days=wd)
+            if day < start_date:
+                continue
+            if count is not None and seen >= count:
+                return
+            if window_end is not None and day > window_end:
+                return
+            if day >= window_start:
+                yield day
+            seen += 1
+        period += 1
+
+
+def materialize(rules, days=None, today=None):
+    """
+    Write Schedule rows for the next ``days`` days of each rule.
+
+    Only dates after the rule's ``materialized_until`` are expanded, and
+    dates the rule already has a visit on, or clashing with an existing
+    visit of the same elderly person or of the rule's caregiver, are
+    skipped, so re-running is harmless. Each rule is locked while it is
+    expanded, so concurrent runs do not both write it. Returns the number
+    of visits created.
+    """
+    from .models import Schedule, ScheduleRule
+
+    today = today or date.today()
+    horizon = today + timedelta(days=settings.SCHEDULE_MATERIALIZE_DAYS if days is None else days)
+    created = 0
+    for rule in rules:
+        with transaction.atomic():
+            # A concurrent run waits here, then sees the horizon this one saved
+            rule.materialized_until = ScheduleRule.objects.select_for_update().values_list(
+                'materialized_until', flat=True).get(pk=rule.pk)
+            window_start = today
+            if rule.materialized_until is not None:
+                window_start = max(window_start, rule.materialized_until + timedelta(days=1))
+            if window_start > horizon:
+                continue
+
+            fields = ('id', 'rule_id', 'date', 'start_time', 'end_time')
+            elderly_visits = list(Schedule.objects.filter(
+                elderly_id=rule.elderly_id, date__range=(window_start, horizon)).only(*fields))
+            caregiver_visits = []
+            if rule.caregiver_id is not None:
+                caregiver_visits = list(Schedule.objects.filter(
+                    caregiver_id=rule.caregiver_id, date__range=(window_start, horizon),
+                ).exclude(elderly_id=rule.elderly_id).only(*fields))
+            done = {visit.date for visit in elderly_visits if visit.rule_id == rule.id}
+            visits = [
+                Schedule(
+                    elderly_id=rule.elderly_id, caregiver_id=rule.caregiver_id, rule=rule, date=day,
+                    start_time=rule.start_time, end_time=rule.end_time, location=rule.location,
+                    task_list=rule.task_list, hourly_rate=rule.hourly_rate,
+                )
+                for day in rule.occurrences(window_start, horizon)
+                if day not in done
+            ]
+            clashing = set()
+            # Checked separately: two booked visits may overlap each other
+            for booked in (elderly_visits, caregiver_visits):
+                clashes = find_conflicts(
+                    [(visit.date, visit.start_time, visit.end_time, visit) for visit in visits],
+                    existing=[(visit.date, visit.start_time, visit.end_time, visit) for visit in booked],
+                )
+                clashing.update(id(visit) for visit, _ in clashes)
+            visits = [visit for visit in visits if id(visit) not in clashing]
+
+            if visits:
+                # The rule is locked and its existing dates were dropped above,
+                # so every visit left is a new row; unique_rule_occurrence
+                # would fail the run rather than let a duplicate through
+                Schedule.objects.bulk_create(visits)
+                # bulk_create() skips post_save, so link the task catalogue,
+                # reindex and drop the cached task searches here
+                sync_schedule_tasks(Schedule.objects.filter(rule=rule, date__in=[visit.date for visit in visits]))
+                get_backend().index_elderly([rule.elderly_id])
+                transaction.on_commit(lambda: bump('search'))
+            rule.materialized_until = horizon
+            rule.save(update_fields=['materialized_until'])
+        created += len(visits)
+    return created
@@ -0,0 +1,148 @@
+# core/search.py
+"""
+Full-text search over elderly profiles (name, medical condition, location
+and the tasks of their visits).
+
+The backend is chosen with the SEARCH_BACKEND setting, which follows
+DB_ENGINE by default. SQLiteFTSBackend keeps an FTS5 table in sync through
+signals (see core.signals); PostgresSearchBackend computes a tsvector on the
+fly and needs no extra table.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    return WORD_RE.findall(query.lower())
+
+
+class SearchBackend:
+    def index_elderly(self, elderly_ids):
+        """(Re)index the given elderly profiles."""
+
+    def remove_elderly(self, elderly_ids):
+        """Drop the given elderly profiles from the index."""
+
+    def rebuild(self):
+        """Reindex every elderly profile."""
+
+    def search(self, query, limit=100):
+        """Return elderly ids matching ``query``, best match first."""
+        raise NotImplementedError
+
+
+def elderly_documents(elderly_ids=None):
+    """Yield (id, name, med_condition, location, tasks) for indexing."""
+    from .models import ElderlyProfile, ScheduleTask
+
+    profiles = ElderlyProfile.objects.all()
+    tasks = ScheduleTask.objects.all()
+    if elderly_ids is not None:
+        profiles = profiles.filter(id__in=elderly_ids)
+        tasks = tasks.filter(schedule__elderly_id__in=elderly_ids)
+
+    task_names = {}
+    for elderly_id, name in tasks.values_list('schedule__elderly_id', 'task__name').distinct():
+        task_names.setdefault(elderly_id, []).append(name)
+    for elderly_id, name, med_condition, location in profiles.values_list(
+            'id', 'name', 'med_condition', 'location').iterator(chunk_size=2000):
+        yield elderly_id, name, med_condition, location, ' '.join(task_names.get(elderly_id, ()))
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    FTS5 index in the ``core_elderly_fts`` virtual table (created by a
+    migration), rowid = ElderlyProfile.id. Every search term is matched as a
+    prefix and results are ordered by bm25 rank.
+
+    The table only exists on SQLite; on other databases indexing is skipped
+    and searches find nothing.
+    """
+    table = 'core_elderly_fts'
+
+    def available(self):
+        return connection.vendor == 'sqlite'
+
+    def index_elderly(self, elderly_ids):
+        elderly_ids = list(elderly_ids)
+        if not elderly_ids or not self.available():
+            return
+        self.remove_elderly(elderly_ids)
+        with connection.cursor() as cursor:
+            self._insert(cursor, list(elderly_documents(elderly_ids)))
+
+    def remove_elderly(self, elderly_ids):
+        elderly_ids = list(elderly_ids)
+        if not elderly_ids or not self.available():
+            return
+        placeholders = ', '.join(['%s'] * len(elderly_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', elderly_ids)
+
+    def rebuild(self):
+        if not self.available():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            batch = []
+            for document in elderly_documents():
+                batch.append(document)
+                if len(batch) >= 2000:
+                    self._insert(cursor, batch)
+                    batch = []
+            self._insert(cursor, batch)
+
+    def _insert(self, cursor, documents):
+        if documents:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, name, med_condition, location, tasks) VALUES (%s, %s, %s, %s, %s)',
+                documents,
+            )
+
+    def search(self, query, limit=100):
+        terms = search_terms(query)
+        if not terms or not self.available():
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s ORDER BY rank LIMIT %s',
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector/tsquery search for PostgreSQL; the vector is computed per query."""
+
+    def search(self, query, limit=100):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+        from django.contrib.postgres.aggregates import StringAgg
+
+        from .models import ElderlyProfile
+
+        terms = search_terms(query)
+        if not terms:
+            return []
+        vector = (SearchVector('name', weight='A')
+                  + SearchVector('med_condition', 'location', weight='B')
+                  + SearchVector(StringAgg('schedule__tasks__name', ' ', distinct=True), weight='C'))
+        tsquery = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw')
+        return list(
+            ElderlyProfile.objects
+            .annotate(rank=SearchRank(vector, tsquery))
+            .filter(rank__gt=0)
+            .order_by('-rank')
+            .values_list('id', flat=True)[:limit]
+        )
+
+
+@lru_cache(maxsize=1)
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
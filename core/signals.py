@@ -0,0 +1,108 @@
+# core/signals.py
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import caches
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .backends import user_cache_key
+from .billing import forget_invoices
+from .caching import bump
+from .models import CustomUser, ElderlyProfile, Schedule
+from .search import get_backend
+from .task_catalogue import sync_schedule_tasks
+
+
+@receiver(post_save, sender=Schedule)
+def sync_tasks_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_schedule_tasks([instance])
+
+
+@receiver(post_save, sender=ElderlyProfile)
+def index_elderly_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index_elderly([instance.id])
+
+
+@receiver(post_delete, sender=ElderlyProfile)
+def unindex_elderly_on_delete(sender, instance, **kwargs):
+    get_backend().remove_elderly([instance.id])
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def index_elderly_tasks(sender, instance, raw=False, **kwargs):
+    # Runs after sync_tasks_on_save, so the elderly's task names are current
+    if not raw:
+        get_backend().index_elderly([instance.elderly_id])
+
+
+@receiver(pre_save, sender=Schedule)
+def remember_billed_visit(sender, instance, raw=False, **kwargs):
+    # An edit can move a visit to another month or elderly person, whose
+    # invoice is then stale as well
+    instance._billed_as = None
+    if not raw and not instance._state.adding and instance.pk:
+        instance._billed_as = Schedule.objects.filter(pk=instance.pk).values_list('elderly_id', 'date').first()
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def invalidate_invoices(sender, instance, raw=False, **kwargs):
+    if not raw:
+        visits = [(instance.elderly_id, instance.date)]
+        if getattr(instance, '_billed_as', None):
+            visits.append(instance._billed_as)
+        forget_invoices(visits)
+
+
+@receiver(pre_save, sender=ElderlyProfile)
+def remember_family(sender, instance, raw=False, **kwargs):
+    # A profile moved to another family leaves that family's table stale too
+    instance._family_was = None
+    if not raw and not instance._state.adding and instance.pk:
+        instance._family_was = ElderlyProfile.objects.filter(pk=instance.pk).values_list(
+            'family_member_id', flat=True).first()
+
+
+@receiver(post_save, sender=ElderlyProfile)
+@receiver(post_delete, sender=ElderlyProfile)
+def invalidate_elderly_tables(sender, instance, **kwargs):
+    families = {instance.family_member_id, getattr(instance, '_family_was', None)} - {None}
+    bump('elderly', *[f'family:{family_id}' for family_id in families])
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def invalidate_task_search(sender, instance, **kwargs):
+    # Dashboard tables show no schedule columns; only task search results change
+    bump('search')
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Also runs for last_login updates at login and for new users reusing an id
+    if settings.USER_CACHE_ALIAS is None:
+        return
+    caches[settings.USER_CACHE_ALIAS].delete(user_cache_key(instance.pk))
+
+
+@receiver(user_logged_in)
+def cache_logged_in_user(sender, request, user, **kwargs):
+    # Connected after django.contrib.auth's last_login update, so the first
+    # page after login does not load the user again
+    if settings.USER_CACHE_ALIAS is None:
+        return
+    caches[settings.USER_CACHE_ALIAS].set(user_cache_key(user.pk), user, settings.USER_CACHE_TIMEOUT)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
@@ -0,0 +1,13 @@
+// core/static/core/js/site.js
+// Loaded with defer on every page, so the DOM is parsed when this runs.
+
+(function () {
+    // Sign up: the admin code is only asked for the admin role
+    const roleSelect = document.querySelector('select[name=role]');
+    const adminCode = document.getElementById('admin-code');
+    if (roleSelect && adminCode) {
+        roleSelect.addEventListener('change', function () {
+            adminCode.style.display = this.value === 'admin' ? 'block' : 'none';
+        });
+    }
+})();
@@ -0,0 +1,293 @@
+# core/staticfiles.py
+"""
+Static files: a storage that precompresses what collectstatic writes, and a
+WSGI/ASGI wrapper that serves STATIC_ROOT without entering Django.
+
+CompressedManifestStaticFilesStorage is ManifestStaticFilesStorage (content
+hashes in file names, staticfiles.json manifest) that also minifies the
+app's own CSS/JS and writes ``.gz`` and, when the ``brotli`` package is
+installed, ``.br`` siblings of every compressible file.
+
+StaticFilesWSGI / StaticFilesASGI index STATIC_ROOT once at startup and
+answer requests under STATIC_URL from that index, picking the precompressed
+variant the client accepts; each variant has its own ETag. Files named in
+the manifest are served with ``Cache-Control: immutable``; since their
+names change with their content they can be cached for a year.
+"""
+import gzip
+import json
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from urllib.parse import unquote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ico')
+# Below this, compression headers cost more than they save
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
+# Only our own stylesheets and scripts are minified; third-party ones
+# (e.g. the admin's) are collected as they are
+MINIFY_PREFIXES = ('core/css/', 'core/js/')
+
+# Quoted strings and comments, so that neither is mistaken for the other
+CSS_TOKEN_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)""", re.S)
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(css):
+    """Drop comments and redundant whitespace, leaving quoted strings alone."""
+    # Comments go first, so the whitespace around them collapses too
+    css = CSS_TOKEN_RE.sub(lambda match: '' if match.group().startswith('/*') else match.group(), css)
+    parts = CSS_TOKEN_RE.split(css)
+    for i in range(0, len(parts), 2):
+        part = CSS_SPACE_RE.sub(' ', parts[i])
+        part = CSS_PUNCTUATION_RE.sub(r'\1', part)
+        parts[i] = part.replace(': ', ':').replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def minify_js(js):
+    """
+    Drop indentation, blank lines and whole-line ``//`` comments. Line
+    breaks are kept, so automatic semicolon insertion is unaffected.
+    """
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def compress_file(path):
+    """Write ``path.gz`` (and ``path.br``) when they are smaller than ``path``."""
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as fh:
+                fh.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def hashed_name(self, name, content=None, filename=None):
+        hashed = super().hashed_name(name, content, filename)
+        # build_images already names its variants "<name>.<content hash>.<ext>"
+        file_hash = os.path.splitext(hashed)[0].rsplit('.', 1)[-1]
+        if os.path.splitext(name)[0].endswith(f'.{file_hash}'):
+            return name
+        return hashed
+
+    def _save(self, name, content):
+        minify = MINIFIERS.get(os.path.splitext(name)[1])
+        if minify is not None and name.startswith(MINIFY_PREFIXES):
+            content = ContentFile(minify(b''.join(content.chunks()).decode('utf-8')).encode('utf-8'))
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in names:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress_file(self.path(name))
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type in ('application/javascript', 'image/svg+xml'):
+            self.content_type += '; charset=utf-8'
+        # Each encoding is a different representation with its own strong ETag
+        self.etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        self.headers = [
+            ('Cache-Control', IMMUTABLE if immutable else f'public, max-age={settings.STATIC_MAX_AGE}'),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        # Content-Encoding -> (path, size, ETag), best first
+        self.encodings = {}
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if os.path.exists(path + suffix):
+                self.encodings[encoding] = (path + suffix, os.path.getsize(path + suffix),
+                                            f'{self.etag[:-1]}-{encoding}"')
+        if self.encodings:
+            self.headers.append(('Vary', 'Accept-Encoding'))
+
+    def response(self, method, accept_encoding, if_none_match):
+        """Return (status, headers, path or None) for a GET or HEAD."""
+        if method not in ('GET', 'HEAD'):
+            return 405, [('Allow', 'GET, HEAD')], None
+        path, size, etag, headers = self.path, self.size, self.etag, list(self.headers)
+        encoding = self.choose_encoding(accept_encoding)
+        if encoding:
+            path, size, etag = self.encodings[encoding]
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('ETag', etag))
+        if if_none_match and etag_matches(etag, if_none_match):
+            return 304, [header for header in headers if header[0] != 'Content-Encoding'], None
+        headers += [('Content-Type', self.content_type), ('Content-Length', str(size))]
+        return 200, headers, path if method == 'GET' else None
+
+    def choose_encoding(self, accept_encoding):
+        """
+        The precompressed variant to send, or None for the file itself: the
+        accepted encoding with the highest q-value (ours first on a tie),
+        unless the client explicitly ranks identity higher.
+        """
+        weights = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = weights.get(encoding, weights.get('*', 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        if best_q < weights.get('identity', 0.0):
+            return None
+        return best
+
+
+def parse_accept_encoding(header):
+    """{coding: q-value} from an Accept-Encoding header; q=0 refuses a coding."""
+    weights = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.lower()] = q
+    return weights
+
+
+def etag_matches(etag, if_none_match):
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if if_none_match.strip() == '*':
+        return True
+    return etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+
+
+def index_static_root(root=None, url=None):
+    """Map request paths to StaticFile for every file under STATIC_ROOT."""
+    root = str(root or settings.STATIC_ROOT or '')
+    url = '/' + (url or settings.STATIC_URL).lstrip('/')
+    if not root or not os.path.isdir(root):
+        return {}
+    try:
+        with open(os.path.join(root, 'staticfiles.json'), encoding='utf-8') as fh:
+            hashed = set(json.load(fh)['paths'].values())
+    except (FileNotFoundError, KeyError, ValueError):
+        hashed = set()
+
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(('.gz', '.br')) and os.path.exists(os.path.join(directory, filename[:-3])):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            files[url + name] = StaticFile(path, immutable=name in hashed)
+    return files
+
+
+def read_chunks(path):
+    with open(path, 'rb') as fh:
+        while chunk := fh.read(CHUNK_SIZE):
+            yield chunk
+
+
+class StaticFilesWSGI:
+    """Serve STATIC_ROOT in front of a WSGI application."""
+
+    def __init__(self, application):
+        self.application = application
+        self.files = index_static_root()
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+
+    def __call__(self, environ, start_response):
+        path = unquote(environ.get('PATH_INFO', ''))
+        static_file = self.files.get(path) if path.startswith(self.prefix) else None
+        if static_file is None:
+            return self.application(environ, start_response)
+
+        status, headers, file_path = static_file.response(
+            environ['REQUEST_METHOD'], environ.get('HTTP_ACCEPT_ENCODING', ''), environ.get('HTTP_IF_NONE_MATCH', ''))
+        start_response(f'{status} {STATUS_TEXT[status]}', headers)
+        if file_path is None:
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper:
+            return file_wrapper(open(file_path, 'rb'), CHUNK_SIZE)
+        return read_chunks(file_path)
+
+
+class StaticFilesASGI:
+    """Serve STATIC_ROOT in front of an ASGI application."""
+
+    def __init__(self, application):
+        self.application = application
+        self.files = index_static_root()
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+
+    async def __call__(self, scope, receive, send):
+        static_file = None
+        if scope['type'] == 'http' and scope['path'].startswith(self.prefix):
+            static_file = self.files.get(scope['path'])
+        if static_file is None:
+            return await self.application(scope, receive, send)
+
+        request_headers = dict(scope['headers'])
+        status, headers, file_path = static_file.response(
+            scope['method'],
+            request_headers.get(b'accept-encoding', b'').decode('latin-1'),
+            request_headers.get(b'if-none-match', b'').decode('latin-1'),
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+        })
+        if file_path is None:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        # File reads block, so they run on a worker thread, not the event loop
+        fh = await sync_to_async(open, thread_sensitive=False)(file_path, 'rb')
+        try:
+            read = sync_to_async(fh.read, thread_sensitive=False)
+            chunk = await read(CHUNK_SIZE)
+            while True:
+                next_chunk = await read(CHUNK_SIZE) if len(chunk) == CHUNK_SIZE else b''
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': bool(next_chunk)})
+                if not next_chunk:
+                    break
+                chunk = next_chunk
+        finally:
+            fh.close()
+
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 405: 'Method Not Allowed'}
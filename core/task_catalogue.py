@@ -0,0 +1,81 @@
+# core/task_catalogue.py
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+# Task.name's max_length
+TASK_NAME_MAX_LENGTH = 100
+
+
+def parse_task_list(text):
+    """Split a comma-separated task list into unique, normalised task names."""
+    names = []
+    for name in (text or '').split(','):
+        name = ' '.join(name.split()).lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def validate_task_list(text):
+    """Reject task lists with a task name too long for the catalogue."""
+    too_long = [name for name in parse_task_list(text) if len(name) > TASK_NAME_MAX_LENGTH]
+    if too_long:
+        raise ValidationError(
+            "Task names can be at most %(limit)d characters: %(names)s.",
+            code='task_name_too_long',
+            params={'limit': TASK_NAME_MAX_LENGTH, 'names': ', '.join(f'"{name[:30]}..."' for name in too_long)},
+        )
+
+
+def sync_schedule_tasks(schedules):
+    """
+    Bring the ScheduleTask rows of ``schedules`` in line with their
+    ``task_list``, keeping the completion state of tasks that remain.
+
+    Works on the whole batch with a fixed number of queries, so it can
+    follow a bulk_create() of many schedules.
+    """
+    from .models import ScheduleTask, Task
+
+    wanted = {schedule.id: parse_task_list(schedule.task_list) for schedule in schedules}
+    if not wanted:
+        return
+    names = {name for task_names in wanted.values() for name in task_names}
+
+    with transaction.atomic():
+        Task.objects.bulk_create([Task(name=name) for name in names], ignore_conflicts=True)
+        task_ids = dict(Task.objects.filter(name__in=names).values_list('name', 'id'))
+
+        rows = {
+            (schedule_id, task_id): row_id
+            for row_id, schedule_id, task_id in ScheduleTask.objects.filter(
+                schedule_id__in=wanted,
+            ).values_list('id', 'schedule_id', 'task_id')
+        }
+        existing = set(rows)
+        desired = {
+            (schedule_id, task_ids[name])
+            for schedule_id, task_names in wanted.items()
+            for name in task_names
+        }
+        stale = existing - desired
+        if stale:
+            ScheduleTask.objects.filter(id__in=[rows[key] for key in stale]).delete()
+        ScheduleTask.objects.bulk_create(
+            [ScheduleTask(schedule_id=schedule_id, task_id=task_id) for schedule_id, task_id in desired - existing],
+            batch_size=1000,
+        )
+
+
+def visits_needing(task_name, day):
+    """Visits on ``day`` with ``task_name`` still to do; none for a blank name."""
+    from .models import Schedule
+
+    names = parse_task_list(task_name)
+    if not names:
+        return Schedule.objects.none()
+    return Schedule.objects.filter(
+        date=day,
+        scheduletask__task__name=names[0],
+        scheduletask__completed=False,
+    )
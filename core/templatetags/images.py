@@ -0,0 +1,41 @@
+# core/templatetags/images.py
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core.images import FORMATS, manifest_entry
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(name, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """
+    ``{% responsive_image 'core/images/photo.jpg' alt='...' sizes='(max-width: 600px) 100vw, 50vw' %}``
+
+    Renders a <picture> with AVIF/WebP/JPEG srcsets from the build_images
+    manifest, or a plain <img> of the original when it has not been built.
+    """
+    entry = manifest_entry(name)
+    if not entry:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="{}">', static(name), alt, css_class, loading)
+
+    variants = entry['variants']
+    sources = format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', (
+        (FORMATS[image_format]['mime'], srcset(variants[image_format]), sizes)
+        for image_format in FORMATS if image_format in variants and image_format != 'jpeg'
+    ))
+    # The <img> fallback: JPEG, or the original for images with transparency
+    fallback = variants.get('jpeg')
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async"></picture>',
+        sources,
+        static(fallback[-1][1]) if fallback else static(name),
+        srcset(fallback) if fallback else '',
+        sizes, entry['width'], entry['height'], alt, css_class, loading,
+    )
+
+
+def srcset(variants):
+    return ', '.join(f'{static(variant)} {width}w' for width, variant, _ in variants)
@@ -0,0 +1,95 @@
+# core/testing.py
+"""Helpers for the performance regression tests in core/tests.py."""
+import re
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import connection
+
+from .middleware import QueryRecorder
+
+# A whole index read in index order is still a full scan
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$')
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def query_plan(sql, params=()):
+    """Return the detail lines of SQLite's EXPLAIN QUERY PLAN for a statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_table_scans(sql, params=()):
+    """
+    Tables the statement reads with a full scan rather than through an
+    index. Scans of subquery results are not counted; their own plan lines
+    are.
+    """
+    tables = set(connection.introspection.table_names())
+    return [
+        match.group(1) for match in map(FULL_SCAN_RE.match, query_plan(sql, params))
+        if match and match.group(1) in tables
+    ]
+
+
+@contextmanager
+def capture_statements():
+    """
+    Collect ``(sql, params)`` for every SELECT, UPDATE and DELETE run on the
+    default connection inside the block, to EXPLAIN them afterwards.
+    """
+    statements = []
+
+    def capture(execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(EXPLAINED):
+            statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        yield statements
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        yield recorder
+
+
+def assert_query_budget(testcase, url_name, make_request):
+    """
+    Call ``make_request()`` and fail ``testcase`` if it issues more queries
+    than QUERY_BUDGETS allows for ``url_name``. Returns the response.
+    """
+    budget = settings.QUERY_BUDGETS[url_name]
+    with record_queries() as recorder:
+        response = make_request()
+    _check_budget(testcase, url_name, budget, recorder)
+    return response
+
+
+async def aassert_query_budget(testcase, url_name, make_request):
+    """
+    assert_query_budget() for AsyncClient requests; ``make_request()`` is
+    awaited. The async ORM queries from the sync_to_async thread, which has
+    its own connection object, so the recorder is installed there.
+    """
+    budget = settings.QUERY_BUDGETS[url_name]
+    recording = record_queries()
+    recorder = await sync_to_async(recording.__enter__)()
+    try:
+        response = await make_request()
+    finally:
+        await sync_to_async(recording.__exit__)(None, None, None)
+    _check_budget(testcase, url_name, budget, recorder)
+    return response
+
+
+def _check_budget(testcase, url_name, budget, recorder):
+    testcase.assertLessEqual(
+        recorder.count, budget,
+        f"{url_name} issued {recorder.count} queries (budget {budget}); repeated: {recorder.duplicates}",
+    )
@@ -1,3 +1,1455 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib
+import importlib.util
+import json
+import math
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import AsyncRequestFactory, Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import urls as core_urls
+
+from .backends import LoginBusy
+from .bulk import create_schedules
+from .billing import family_month_total, generate_invoices, monthly_totals, visit_cost
+from .caching import CSRF_PLACEHOLDER, scope_versions
+from .forms import ScheduleForm
+from .geo import EARTH_RADIUS_KM, covering_prefixes, elderly_near, filter_within, geohash_encode, haversine_km
+from .imports import Checkpoint, import_elderly
+from .matching import build_features, rank
+from .middleware import QueryInstrumentationMiddleware, RateLimitMiddleware, TemplateProfilingMiddleware
+from .models import (
+    CaregiverProfile, CustomUser, ElderlyProfile, MonthlyInvoice, Schedule, ScheduleRule, ScheduleTask, Task,
+)
+from .pagination import EstimatedCountPaginator, KeysetPage
+from .ratelimit import CacheStore
+from .recurrence import expand, materialize
+from .search import get_backend
+from .staticfiles import CHUNK_SIZE, StaticFile, StaticFilesASGI, StaticFilesWSGI, compress_file, minify_css
+from .task_catalogue import sync_schedule_tasks, visits_needing
+from .testing import aassert_query_budget, assert_query_budget, capture_statements, full_table_scans, record_queries
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class QueryPlanTests(TestCase):
+    """
+    Every statement the views, admin and jobs issue must read through an
+    index. The statements are captured while the pages and commands run,
+    then EXPLAINed.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        cls.caregiver_user = CustomUser.objects.create_user(
+            username='caregiver', email='caregiver@example.com', password='pass', role='caregiver')
+        cls.admin_user = CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', role='admin',
+            is_staff=True, is_superuser=True)
+        cls.caregiver = CaregiverProfile.objects.create(
+            user=cls.caregiver_user, name='Caregiver', phone='0170000000', address='Gulshan',
+            dob=date(1990, 1, 1), gender='female', emergency_contact='0170000001')
+        cls.elderly = [
+            ElderlyProfile.objects.create(
+                family_member=cls.family, name=f'Elderly {i}', dob=date(1940, 1, 1), gender='female',
+                med_condition='Diabetes', location='Banani')
+            for i in range(3)
+        ]
+        cls.day = date.today() + timedelta(days=1)
+        for i, elderly in enumerate(cls.elderly):
+            Schedule.objects.create(
+                elderly=elderly, caregiver=cls.caregiver if i else None, date=cls.day, start_time=time(9 + i),
+                end_time=time(10 + i), location='Banani', task_list='medication', hourly_rate=10)
+
+    # An unfiltered read in primary key order, or the users' unique email
+    # order (a list's first page, or a whole small list), walks the table or
+    # index and stops after the page
+    KEY_ORDER_RE = re.compile(r'ORDER BY "\w+"\."(id|email)" (ASC|DESC)( LIMIT \d+)?$')
+    # EstimatedCountPaginator's count, which stops after max_count rows
+    BOUNDED_COUNT_RE = re.compile(r'^SELECT COUNT\(\*\) FROM \(.* LIMIT \d+\) subquery$')
+
+    def assertIndexed(self, statements, whole_tables=()):
+        scans = []
+        for sql, params in statements:
+            if ' WHERE ' not in sql and (self.KEY_ORDER_RE.search(sql) or self.BOUNDED_COUNT_RE.match(sql)):
+                continue
+            tables = set(full_table_scans(sql, params)) - set(whole_tables)
+            if tables:
+                scans.append((sql, sorted(tables)))
+        self.assertEqual(scans, [])
+
+    def test_pages(self):
+        with capture_statements() as statements:
+            self.client.post(reverse('login'), {'email': 'family@example.com', 'password': 'pass'})
+            self.client.get(reverse('family_dashboard'))
+            self.client.post(reverse('set_schedule'), {
+                'elderly': self.elderly[0].id, 'date': self.day, 'start_time': '09:30', 'end_time': '12:00',
+                'location': 'Banani', 'task_list': 'medication', 'hourly_rate': '10'})
+            self.client.post(reverse('bulk_schedules'), [{
+                'elderly': self.elderly[0].id, 'date': self.day.isoformat(), 'start_time': '18:00',
+                'end_time': '19:00', 'location': 'Banani', 'task_list': 'walking', 'hourly_rate': '10'}],
+                content_type='application/json')
+
+            self.client.force_login(self.caregiver_user)
+            page = self.client.get(reverse('caregiver_dashboard'), {'page_size': 1})
+            self.client.get(reverse('caregiver_dashboard'), {'page_size': 1, 'after': self.elderly[0].id})
+            self.client.get(reverse('caregiver_dashboard'), {'page_size': 1, 'before': self.elderly[2].id})
+            self.client.get(reverse('caregiver_dashboard'), {'q': 'diab'})
+            self.client.post(reverse('confirm_caregiving', args=[self.elderly[0].id]))
+        self.assertEqual(page.status_code, 200)
+        self.assertIndexed(statements)
+
+    def test_admin(self):
+        self.client.force_login(self.admin_user)
+        schedule = Schedule.objects.first()
+        with capture_statements() as statements:
+            for url_name, params in (
+                ('admin:core_elderlyprofile_changelist', {}),
+                ('admin:core_elderlyprofile_changelist', {'q': 'diab'}),
+                ('admin:core_elderlyprofile_changelist', {'area': 'banani'}),
+                ('admin:core_caregiverprofile_changelist', {'phone': '0170000000'}),
+                ('admin:core_caregiverprofile_changelist', {'gender': 'female', 'phone': '0170000000'}),
+                ('admin:core_caregiverprofile_changelist', {'q': '0170'}),
+                ('admin:core_caregiverprofile_changelist', {'q': 'caregiver@example.com'}),
+                ('admin:core_customuser_changelist', {}),
+                ('admin:core_customuser_changelist', {'q': 'family@example.com'}),
+                ('admin:core_task_changelist', {}),
+                ('admin:core_task_changelist', {'q': 'medication'}),
+                ('admin:core_monthlyinvoice_changelist', {}),
+                ('admin:core_monthlyinvoice_changelist', {'q': 'family@example.com'}),
+                ('admin:core_schedule_changelist', {
+                    'date__gte': self.day.isoformat(), 'date__lt': (self.day + timedelta(days=7)).isoformat()}),
+                ('admin:core_schedule_changelist', {'area': 'banani'}),
+                ('admin:core_schedule_changelist', {'q': 'elderly'}),
+                ('admin:core_schedule_changelist', {'q': 'medication'}),
+                ('admin:core_schedulerule_changelist', {'q': 'elderly'}),
+                ('export_schedules', {'start': self.day.isoformat(), 'family': self.family.id}),
+            ):
+                response = self.client.get(reverse(url_name), params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.client.get(reverse('admin:core_schedule_change', args=[schedule.id]))
+        self.assertIndexed(statements)
+
+    def test_admin_exact_and_prefix_search(self):
+        self.client.force_login(self.admin_user)
+
+        def search(url_name, query):
+            response = self.client.get(reverse(url_name), {'q': query})
+            return list(response.context['cl'].result_list)
+
+        url_name = 'admin:core_caregiverprofile_changelist'
+        for query in ('0170', ' 0170000000 ', 'caregiver@example.com'):
+            with self.subTest(query=query):
+                self.assertEqual(search(url_name, query), [self.caregiver])
+        for query in ('0000', 'caregiver@example', '01700000001'):
+            with self.subTest(query=query):
+                self.assertEqual(search(url_name, query), [])
+        self.assertEqual(search('admin:core_customuser_changelist', 'family@example.com'), [self.family])
+        self.assertEqual([task.name for task in search('admin:core_task_changelist', ' Medication')], ['medication'])
+
+    def test_jobs(self):
+        rule = ScheduleRule.objects.create(
+            elderly=self.elderly[0], frequency='daily', start_date=self.day, start_time=time(7),
+            end_time=time(8), location='Banani', task_list='medication', hourly_rate=10)
+        visit = Schedule.objects.filter(elderly=self.elderly[0]).first()
+        with capture_statements() as statements:
+            call_command('materialize_schedules', stdout=StringIO())
+            call_command('generate_invoices', '--month', f'{self.day:%Y-%m}', stdout=StringIO())
+            family_month_total(self.family, self.day)
+            list(visits_needing('medication', self.day))
+            visit.delete()
+        # materialize_schedules reads every active rule, most of which have
+        # no end date: scanning them is the plan
+        self.assertIndexed(statements, whole_tables=['core_schedulerule'])
+
+
+class QueryBudgetTests(TestCase):
+    """Each view stays within its QUERY_BUDGETS entry with several rows present."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        cls.caregiver_user = CustomUser.objects.create_user(
+            username='caregiver', email='caregiver@example.com', password='pass', role='caregiver')
+        cls.admin_user = CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', role='admin',
+            is_staff=True, is_superuser=True)
+        CaregiverProfile.objects.create(
+            user=cls.caregiver_user, name='Caregiver', phone='0170000000', address='Gulshan',
+            dob=date(1990, 1, 1), gender='female', emergency_contact='0170000001')
+        cls.elderly = [
+            ElderlyProfile.objects.create(
+                family_member=cls.family, name=f'Elderly {i}', dob=date(1940, 1, 1), gender='female',
+                med_condition='Diabetes', location='Banani')
+            for i in range(5)
+        ]
+        tomorrow = date.today() + timedelta(days=1)
+        for i, elderly in enumerate(cls.elderly):
+            Schedule.objects.create(
+                elderly=elderly, date=tomorrow, start_time=time(8 + i), end_time=time(9 + i),
+                location='Banani', task_list='medication, walking', hourly_rate=10)
+
+    def assertWithinBudget(self, url_name, make_request):
+        return assert_query_budget(self, url_name, make_request)
+
+    def test_every_url_has_a_budget(self):
+        names = {pattern.name for pattern in core_urls.urlpatterns if pattern.name}
+        self.assertEqual(names - set(settings.QUERY_BUDGETS), set())
+
+    def test_login(self):
+        self.assertWithinBudget('login', lambda: self.client.post(
+            reverse('login'), {'email': 'family@example.com', 'password': 'pass'}))
+
+    def test_signup(self):
+        self.assertWithinBudget('signup', lambda: self.client.get(reverse('signup')))
+
+    def test_home(self):
+        self.assertWithinBudget('home', lambda: self.client.get(reverse('home')))
+
+    def test_caregiver_pages(self):
+        self.client.force_login(self.caregiver_user)
+        self.assertWithinBudget('caregiver_dashboard', lambda: self.client.get(reverse('caregiver_dashboard')))
+        self.assertWithinBudget('caregiver_dashboard', lambda: self.client.get(reverse('caregiver_dashboard'), {'q': 'eld'}))
+        self.assertWithinBudget('create_caregiver_profile', lambda: self.client.get(reverse('create_caregiver_profile')))
+        self.assertWithinBudget('confirm_caregiving', lambda: self.client.post(
+            reverse('confirm_caregiving', args=[self.elderly[0].id])))
+
+    def test_confirm_caregiving_needs_post_and_a_caregiver(self):
+        for url_name in ('confirm_caregiving', 'async_confirm_caregiving'):
+            url = reverse(url_name, args=[self.elderly[0].id])
+            with self.subTest(url_name=url_name):
+                self.client.force_login(self.caregiver_user)
+                self.assertEqual(self.client.get(url).status_code, 405)
+                self.client.force_login(self.family)
+                self.assertEqual(self.client.post(url).status_code, 302)
+                self.assertFalse(Schedule.objects.filter(caregiver__isnull=False).exists())
+
+    def test_family_pages(self):
+        self.client.force_login(self.family)
+        self.assertWithinBudget('family_dashboard', lambda: self.client.get(reverse('family_dashboard')))
+        self.assertWithinBudget('create_elderly_profile', lambda: self.client.get(reverse('create_elderly_profile')))
+        self.assertWithinBudget('set_schedule', lambda: self.client.get(reverse('set_schedule')))
+        self.assertWithinBudget('set_recurring_schedule', lambda: self.client.get(reverse('set_recurring_schedule')))
+
+    async def test_async_pages(self):
+        # AsyncClient runs the views on the event loop, as under ASGI
+        async def within_budget(url_name, path, data=None, method='get'):
+            return await aassert_query_budget(
+                self, url_name, lambda: getattr(self.async_client, method)(path, data))
+
+        await self.async_client.aforce_login(self.caregiver_user)
+        response = await within_budget('async_caregiver_dashboard', reverse('async_caregiver_dashboard'))
+        self.assertContains(response, 'Elderly 4')
+        await within_budget('async_caregiver_dashboard', reverse('async_caregiver_dashboard'), {'q': 'eld'})
+        response = await within_budget(
+            'async_confirm_caregiving', reverse('async_confirm_caregiving', args=[self.elderly[0].id]), method='post')
+        self.assertRedirects(response, reverse('async_caregiver_dashboard'), fetch_redirect_response=False)
+        self.assertTrue(await Schedule.objects.filter(
+            elderly=self.elderly[0], caregiver__user=self.caregiver_user).aexists())
+
+        await self.async_client.aforce_login(self.family)
+        response = await within_budget('async_family_dashboard', reverse('async_family_dashboard'))
+        self.assertContains(response, 'Elderly 0')
+        response = await within_budget('async_set_schedule', reverse('async_set_schedule'))
+        self.assertContains(response, f'<option value="{self.elderly[0].id}">')
+
+    def test_bulk_schedules(self):
+        other_family = CustomUser.objects.create_user(
+            username='other', email='other@example.com', password='pass', role='family')
+        stranger = ElderlyProfile.objects.create(
+            family_member=other_family, name='Stranger', dob=date(1940, 1, 1), gender='male',
+            med_condition='None', location='Banani')
+        day = (date.today() + timedelta(days=1)).isoformat()
+        visit = {'date': day, 'location': 'Banani', 'task_list': 'Medication, bathing', 'hourly_rate': '10'}
+        rows = [
+            dict(visit, elderly=elderly.id, start_time='18:00', end_time='19:00') for elderly in self.elderly
+        ] + [
+            dict(visit, elderly=self.elderly[0].id, start_time='18:30', end_time='20:00'),  # overlaps row 1
+            dict(visit, elderly=self.elderly[1].id, start_time='09:00', end_time='09:30'),  # overlaps a saved visit
+            dict(visit, elderly=self.elderly[2].id, start_time='12:00', end_time='11:00'),
+            dict(visit, elderly=stranger.id, start_time='12:00', end_time='13:00'),
+        ]
+
+        self.client.force_login(self.family)
+        response = self.assertWithinBudget('bulk_schedules', lambda: self.client.post(
+            reverse('bulk_schedules'), rows, content_type='application/json'))
+        self.assertEqual(response.status_code, 201)
+        result = response.json()
+        self.assertEqual(result['created'], 5)
+        self.assertEqual([error['row'] for error in result['errors']], [6, 7, 8, 9])
+        self.assertEqual(result['errors'][0]['errors'], {'__all__': ['Overlaps row 1.']})
+        self.assertEqual(result['errors'][1]['errors'], {'__all__': ['Overlaps an existing visit.']})
+        self.assertIn('end_time', result['errors'][2]['errors'])
+        self.assertIn('elderly', result['errors'][3]['errors'])
+        self.assertEqual(ScheduleTask.objects.filter(schedule__start_time=time(18), task__name='bathing').count(), 5)
+
+    def test_export(self):
+        self.client.force_login(self.admin_user)
+
+        def export():
+            response = self.client.get(reverse('export_schedules'))
+            b''.join(response.streaming_content)
+            return response
+
+        self.assertWithinBudget('export_schedules', export)
+
+    @override_settings(USER_CACHE_ALIAS='default', SESSION_ENGINE=settings.SESSION_ENGINES['cached_db'])
+    def test_session_and_user_come_from_the_cache(self):
+        self.client.force_login(self.family)
+        self.client.get(reverse('family_dashboard'))
+        with record_queries() as recorder:
+            self.client.get(reverse('family_dashboard'))
+        self.assertEqual(recorder.count, 0)
+
+        # Saving the user invalidates the cached copy
+        self.family.first_name = 'Changed'
+        self.family.save()
+        response = self.client.get(reverse('family_dashboard'))
+        self.assertEqual(response.wsgi_request.user.first_name, 'Changed')
+
+    @override_settings(USER_CACHE_ALIAS=None)
+    def test_user_comes_from_the_database_without_a_shared_cache(self):
+        self.client.force_login(self.family)
+        self.client.get(reverse('family_dashboard'))
+        # update() sends no signals; without the user cache it still applies at once
+        CustomUser.objects.filter(pk=self.family.pk).update(is_active=False)
+        response = self.client.get(reverse('family_dashboard'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    def test_server_timing_header(self):
+        client = Client()
+        client.force_login(self.family)
+        with self.assertLogs('core.queries', 'INFO') as logs:
+            response = client.get(reverse('family_dashboard'))
+        self.assertIn('"url_name": "family_dashboard"', logs.output[0])
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+
+    @override_settings(QUERY_INSTRUMENTATION=True)
+    async def test_server_timing_header_async(self):
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(QueryInstrumentationMiddleware(view)))
+        await self.async_client.aforce_login(self.family)
+        with self.assertLogs('core.queries', 'INFO') as logs:
+            response = await self.async_client.get(reverse('async_family_dashboard'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['url_name'], 'async_family_dashboard')
+        # The async ORM's queries are counted too
+        self.assertGreater(record['queries'], 0)
+        self.assertIn(f'desc="{record["queries"]} queries"', response['Server-Timing'])
+
+    @override_settings(TEMPLATE_PROFILING=True)
+    def test_template_profiling(self):
+        client = Client()
+        client.force_login(self.caregiver_user)
+        with self.assertLogs('core.templates', 'INFO') as logs:
+            response = client.get(reverse('caregiver_dashboard'))
+        self.assertRegex(response['Server-Timing'], r'tpl;dur=[\d.]+;desc="\d+ templates"$')
+        record = json.loads(logs.records[0].getMessage())
+        # The table itself may come from the fragment cache
+        self.assertLessEqual({'core/caregiver_dashboard.html', 'core/base.html'}, set(record['templates']))
+        self.assertIn('core/caregiver_dashboard.html:content', record['blocks'])
+
+    @override_settings(TEMPLATE_PROFILING=True)
+    async def test_template_profiling_async(self):
+        async def view(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(TemplateProfilingMiddleware(view)))
+        await self.async_client.aforce_login(self.caregiver_user)
+        with self.assertLogs('core.templates', 'INFO') as logs:
+            response = await self.async_client.get(reverse('async_caregiver_dashboard'))
+        self.assertRegex(response['Server-Timing'], r'tpl;dur=[\d.]+;desc="\d+ templates"$')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['url_name'], 'async_caregiver_dashboard')
+        self.assertIn('core/caregiver_dashboard.html', record['templates'])
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.admin_user)
+        for url_name in ('admin:core_schedule_changelist', 'admin:core_elderlyprofile_changelist',
+                         'admin:core_caregiverprofile_changelist'):
+            with self.subTest(url_name=url_name):
+                response = self.assertWithinBudget(url_name, lambda: self.client.get(reverse(url_name)))
+                self.assertEqual(response.status_code, 200)
+
+    def test_admin_schedule_change_form(self):
+        self.client.force_login(self.admin_user)
+        schedule = Schedule.objects.first()
+        self.assertWithinBudget('admin:core_schedule_change', lambda: self.client.get(
+            reverse('admin:core_schedule_change', args=[schedule.id])))
+
+
+class ImportProfilesTests(TestCase):
+    columns = ['email', 'name', 'phone', 'address', 'dob', 'gender', 'emergency_contact']
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', newline='') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(self.columns)
+            writer.writerow(['a@example.com', 'A', '0171', 'Gulshan', '1990-01-01', 'female', '0'])
+            writer.writerow(['b@example.com', 'B', '0171', 'Banani', '1990-01-01', 'male', '0'])  # same phone
+            writer.writerow(['c@example.com', 'C', '0173', 'Banani', 'not a date', 'male', '0'])
+            writer.writerow(['d@example.com', 'D', '0174', 'Banani', '1990-01-01', 'male', '0'])
+        self.addCleanup(os.remove, self.path)
+
+    def import_profiles(self):
+        call_command('import_profiles', 'caregiver', self.path, '--batch-size', '2',
+                     stdout=StringIO(), stderr=StringIO())
+
+    def test_import_dedupes_and_resumes(self):
+        # A previous run crashed after committing the first batch
+        checkpoint = Checkpoint(f'{self.path}.checkpoint.json', self.path, 'caregiver')
+        checkpoint.rows_done = 2
+        checkpoint.save()
+
+        self.import_profiles()
+        self.assertEqual(list(CaregiverProfile.objects.values_list('name', flat=True)), ['D'])
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+        self.import_profiles()
+        profiles = CaregiverProfile.objects.select_related('user').order_by('name')
+        self.assertEqual([(p.name, p.user.email, p.user.role) for p in profiles],
+                         [('A', 'a@example.com', 'caregiver'), ('D', 'd@example.com', 'caregiver')])
+        self.assertIsNotNone(profiles[0].latitude)
+        self.assertFalse(profiles[0].user.has_usable_password())
+
+    def test_elderly_rows_have_one_outcome_each(self):
+        family = CustomUser.objects.create_user(
+            username='family', email='Family@Example.com', password='pass', role='family')
+        CustomUser.objects.create_user(
+            username='squatter@example.com', email='someone@example.com', password='pass', role='family')
+
+        def row(email, name='Rahima'):
+            return {'family_email': email, 'name': name, 'dob': '1940-01-01', 'gender': 'female',
+                    'med_condition': 'None', 'location': 'Banani'}
+
+        created, skipped, errors = import_elderly(enumerate([
+            row('family@example.com'),
+            row('FAMILY@example.com'),  # the same profile, whatever the case
+            row('squatter@example.com'),
+            row('squatter@example.com'),  # would be a duplicate of the row above
+            row('new@example.com', 'Karim'),
+        ], start=1))
+        self.assertEqual((created, skipped), (2, 1))
+        self.assertEqual(sorted(errors), [3, 4])
+        self.assertEqual(created + skipped + len(errors), 5)
+        self.assertEqual(list(ElderlyProfile.objects.filter(name='Rahima').values_list('family_member', flat=True)),
+                         [family.id])
+        self.assertTrue(CustomUser.objects.filter(email='new@example.com', role='family').exists())
+
+
+class LoginTests(TestCase):
+    def test_login_rehashes_after_cost_change(self):
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = CustomUser.objects.create_user(
+                username='family', email='family@example.com', password='pass', role='family')
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            response = self.client.post(reverse('login'), {'email': 'family@example.com', 'password': 'pass'})
+        self.assertRedirects(response, reverse('family_dashboard'), fetch_redirect_response=False)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_login_refused_when_hashing_pool_is_full(self):
+        with mock.patch('core.backends.run_in_pool', side_effect=LoginBusy):
+            response = self.client.post(reverse('login'), {'email': 'family@example.com', 'password': 'pass'})
+        self.assertContains(response, "handling a lot of logins", status_code=503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertContains(self.client.post(reverse('login'), {'email': 'nobody@example.com', 'password': 'pass'}),
+                            "Invalid credentials")
+
+    async def test_async_login_awaits_the_hashing_pool(self):
+        await sync_to_async(CustomUser.objects.create_user)(
+            username='family', email='family@example.com', password='pass', role='family')
+        with mock.patch('core.backends.run_in_pool', side_effect=AssertionError("blocked a thread")):
+            response = await self.async_client.post(
+                reverse('async_login'), {'email': 'family@example.com', 'password': 'pass'})
+            self.assertRedirects(response, reverse('family_dashboard'), fetch_redirect_response=False)
+            response = await self.async_client.post(
+                reverse('async_login'), {'email': 'family@example.com', 'password': 'wrong'})
+            self.assertContains(response, "Invalid credentials")
+        with mock.patch('core.backends.arun_in_pool', side_effect=LoginBusy):
+            response = await self.async_client.post(
+                reverse('async_login'), {'email': 'family@example.com', 'password': 'pass'})
+        self.assertContains(response, "handling a lot of logins", status_code=503)
+
+    def test_bench_login_refuses_to_run_without_debug(self):
+        with self.assertRaisesMessage(CommandError, "DEBUG on"):
+            call_command('bench_login', stdout=StringIO())
+
+    def test_admin_login_shows_a_full_hashing_pool_as_a_form_error(self):
+        with mock.patch('core.backends.run_in_pool', side_effect=LoginBusy):
+            response = self.client.post(reverse('admin:login'), {'username': 'admin@example.com', 'password': 'pass'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].errors.as_data()['__all__'][0].code, 'busy')
+
+
+class RateLimitTests(TestCase):
+    @override_settings(RATE_LIMITS={'login': {'email': '2/m'}})
+    def test_login_throttled_per_email_before_authenticate(self):
+        credentials = {'email': 'throttled@example.com', 'password': 'wrong'}
+        with mock.patch('core.backends.run_in_pool', return_value=False) as run_in_pool:
+            for _ in range(2):
+                self.assertEqual(self.client.post(reverse('login'), credentials).status_code, 200)
+            response = self.client.post(reverse('login'), credentials)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(run_in_pool.call_count, 2)
+            self.assertGreater(int(response['Retry-After']), 0)
+            # Other emails and GETs are not affected
+            self.assertEqual(self.client.post(reverse('login'), dict(credentials, email='other@example.com')).status_code, 200)
+            self.assertEqual(self.client.get(reverse('login')).status_code, 200)
+
+    def test_cache_store_sliding_window(self):
+        store = CacheStore()
+        self.assertIsNone(store.hit('test', 2, 60, now=600.0))
+        self.assertIsNone(store.hit('test', 2, 60, now=601.0))
+        self.assertIsNotNone(store.hit('test', 2, 60, now=602.0))
+        # Early in the next window most of the previous one still counts
+        self.assertIsNotNone(store.hit('test', 2, 60, now=665.0))
+        self.assertIsNone(store.hit('test', 2, 60, now=725.0))
+
+    async def test_cache_store_async_sliding_window(self):
+        store = CacheStore()
+        self.assertIsNone(await store.ahit('atest', 2, 60, now=600.0))
+        self.assertIsNone(await store.ahit('atest', 2, 60, now=601.0))
+        self.assertIsNotNone(await store.ahit('atest', 2, 60, now=602.0))
+        self.assertIsNotNone(await store.ahit('atest', 2, 60, now=665.0))
+        self.assertIsNone(await store.ahit('atest', 2, 60, now=725.0))
+
+    @override_settings(RATE_LIMITS={'login': {'email': '1/m'}})
+    async def test_async_requests_are_checked_on_the_event_loop(self):
+        async def view(request):
+            return HttpResponse()
+
+        middleware = RateLimitMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = AsyncRequestFactory().post(reverse('login'), {'email': 'async@example.com'})
+        self.assertEqual((await middleware(request)).status_code, 200)
+        self.assertEqual((await middleware(request)).status_code, 429)
+
+    @override_settings(RATE_LIMITS={'admin:login': {'username': '2/m'}})
+    def test_admin_login_throttled(self):
+        credentials = {'username': 'admin@example.com', 'password': 'wrong'}
+        with mock.patch('core.backends.run_in_pool', return_value=False):
+            for _ in range(2):
+                self.assertEqual(self.client.post(reverse('admin:login'), credentials).status_code, 200)
+            self.assertEqual(self.client.post(reverse('admin:login'), credentials).status_code, 429)
+
+
+class StaticFilesTests(SimpleTestCase):
+    def test_accept_encoding_q_values(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'site.css')
+            for suffix in ('', '.gz', '.br'):
+                with open(path + suffix, 'w') as fh:
+                    fh.write('body { margin: 0; }\n')
+            static_file = StaticFile(path, immutable=False)
+
+        for accept_encoding, expected in (
+            ('gzip, deflate, br', 'br'),
+            ('gzip, deflate', 'gzip'),
+            ('br;q=0, gzip', 'gzip'),
+            ('br;q=0.5, gzip;q=0.8', 'gzip'),
+            ('gzip;q=0', None),
+            ('GZIP ; Q=0.0', None),
+            ('x-gzip', None),  # a substring is not the coding
+            ('*', 'br'),
+            ('*, br;q=0', 'gzip'),
+            ('identity, gzip;q=0.5', None),
+            ('', None),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(static_file.choose_encoding(accept_encoding), expected)
+
+    def test_serves_precompressed_hashed_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            css = os.path.join(root, 'site.0123456789ab.css')
+            with open(css, 'w') as fh:
+                fh.write('body { margin: 0; }\n' * 50)
+            compress_file(css)
+            with open(os.path.join(root, 'staticfiles.json'), 'w') as fh:
+                json.dump({'paths': {'site.css': 'site.0123456789ab.css'}}, fh)
+
+            with override_settings(STATIC_ROOT=root):
+                app = StaticFilesWSGI(lambda environ, start_response: [])
+
+            def get(**headers):
+                response = {}
+                environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/static/site.0123456789ab.css', **headers}
+                body = b''.join(app(environ, lambda status, headers: response.update(status=status, headers=dict(headers))))
+                return response['status'], response['headers'], body
+
+            status, headers, body = get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(status, '200 OK')
+            self.assertEqual(headers['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', headers['Cache-Control'])
+            self.assertEqual(gzip.decompress(body), b'body { margin: 0; }\n' * 50)
+            self.assertEqual(get(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=headers['ETag'])[0],
+                             '304 Not Modified')
+            # The uncompressed file is another representation, with another ETag
+            status, identity_headers, body = get(HTTP_IF_NONE_MATCH=headers['ETag'])
+            self.assertEqual(status, '200 OK')
+            self.assertNotEqual(identity_headers['ETag'], headers['ETag'])
+            self.assertEqual(body, b'body { margin: 0; }\n' * 50)
+
+    async def test_asgi_streams_large_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            data = os.urandom(CHUNK_SIZE * 2 + 10)
+            with open(os.path.join(root, 'big.bin'), 'wb') as fh:
+                fh.write(data)
+            with override_settings(STATIC_ROOT=root):
+                app = StaticFilesASGI(None)
+
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {'type': 'http', 'method': 'GET', 'path': '/static/big.bin', 'headers': []}
+            await app(scope, None, send)
+            self.assertEqual(messages[0]['status'], 200)
+            self.assertEqual([bool(m.get('more_body')) for m in messages[1:]], [True, True, False])
+            self.assertEqual(b''.join(m['body'] for m in messages[1:]), data)
+
+            etag = dict(messages[0]['headers'])[b'etag']
+            messages.clear()
+            await app(dict(scope, headers=[(b'if-none-match', b'W/' + etag)]), None, send)
+            self.assertEqual(messages[0]['status'], 304)
+
+    def test_pages_share_the_site_bundles(self):
+        response = Client().get(reverse('login'))
+        self.assertContains(response, 'core/css/site.css')
+        self.assertContains(response, 'core/js/site.js')
+        template_dir = os.path.join(settings.BASE_DIR, 'core', 'templates', 'core')
+        for name in os.listdir(template_dir):
+            with open(os.path.join(template_dir, name), encoding='utf-8') as fh:
+                html = fh.read()
+            self.assertNotIn('<style', html, name)
+            self.assertNotIn('<script>', html, name)
+        self.assertEqual(minify_css('/* a */ a , b > c {\n  content : "x  y" ;\n}\n'), 'a,b>c{content :"x  y"}')
+
+
+@skipUnless(importlib.util.find_spec('PIL'), "build_images needs Pillow")
+class ResponsiveImageTests(SimpleTestCase):
+    def setUp(self):
+        from PIL import Image
+
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        source_dir = os.path.join(root.name, 'src')
+        os.makedirs(os.path.join(source_dir, 'photos'))
+        Image.new('RGB', (1200, 800), (200, 120, 40)).save(os.path.join(source_dir, 'photos', 'pic.jpg'))
+        self.manifest_path = os.path.join(root.name, 'images.json')
+        settings_override = override_settings(
+            IMAGE_SOURCE_DIRS=[source_dir], IMAGE_BUILD_DIR=os.path.join(root.name, 'build'),
+            IMAGE_MANIFEST_PATH=self.manifest_path, IMAGE_WIDTHS=[480, 960, 1600])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def render(self):
+        return Template("{% load images %}{% responsive_image 'photos/pic.jpg' alt='Pic' sizes='50vw' %}").render(Context())
+
+    def test_unbuilt_image_falls_back_to_the_original(self):
+        self.assertHTMLEqual(self.render(), '<img src="/static/photos/pic.jpg" alt="Pic" class="" loading="lazy">')
+
+    def test_build_and_srcset(self):
+        call_command('build_images', stdout=StringIO(), stderr=StringIO())
+        with open(self.manifest_path, encoding='utf-8') as fh:
+            entry = json.load(fh)['images']['photos/pic.jpg']
+        self.assertEqual((entry['width'], entry['height']), (1200, 800))
+        for image_format, variants in entry['variants'].items():
+            extension = 'jpg' if image_format == 'jpeg' else image_format
+            # Widths past the original are capped at its width
+            self.assertEqual([width for width, _, _ in variants], [480, 960, 1200])
+            for width, name, size in variants:
+                self.assertRegex(name, rf'^photos/pic-{width}w\.[0-9a-f]{{12}}\.{extension}$')
+                self.assertEqual(os.path.getsize(os.path.join(settings.IMAGE_BUILD_DIR, name)), size)
+
+        html = self.render()
+        webp = ', '.join(f'/static/{name} {width}w' for width, name, _ in entry['variants']['webp'])
+        self.assertInHTML(f'<source type="image/webp" srcset="{webp}" sizes="50vw">', html)
+        jpeg = entry['variants']['jpeg']
+        self.assertInHTML(
+            f'<img src="/static/{jpeg[-1][1]}" srcset="{", ".join(f"/static/{n} {w}w" for w, n, _ in jpeg)}" '
+            f'sizes="50vw" width="1200" height="800" alt="Pic" class="" loading="lazy" decoding="async">', html)
+
+    def test_home_page_uses_the_tag(self):
+        response = Client().get(reverse('home'))
+        self.assertContains(response, 'core/images/IMG_4020.jpg')
+        self.assertContains(response, reverse('login'))
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        # Identical names and dates: the page boundaries must come from the id alone
+        cls.ids = [
+            ElderlyProfile.objects.create(
+                family_member=family, name='Same', dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location='Banani').id
+            for _ in range(7)
+        ]
+
+    def page(self, **cursor):
+        return KeysetPage(ElderlyProfile.objects.all(), page_size=3, **cursor)
+
+    def test_forward_and_back(self):
+        first = self.page()
+        self.assertEqual([e.id for e in first], self.ids[:3])
+        self.assertFalse(first.has_previous)
+        self.assertEqual(first.next_cursor, self.ids[2])
+
+        second = self.page(after=first.next_cursor)
+        self.assertEqual([e.id for e in second], self.ids[3:6])
+        self.assertEqual(second.previous_cursor, self.ids[3])
+
+        last = self.page(after=second.next_cursor)
+        self.assertEqual([e.id for e in last], self.ids[6:])
+        self.assertIsNone(last.next_cursor)
+
+        # Paging back returns the same pages, in ascending order
+        self.assertEqual([e.id for e in self.page(before=last.previous_cursor)], self.ids[3:6])
+        back = self.page(before=second.previous_cursor)
+        self.assertEqual([e.id for e in back], self.ids[:3])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_cursor_past_the_end_and_malformed(self):
+        empty = self.page(after=self.ids[-1])
+        self.assertEqual(list(empty), [])
+        self.assertIsNone(empty.next_cursor)
+        self.assertIsNone(empty.previous_cursor)
+        self.assertEqual([e.id for e in self.page(after='x')], self.ids[:3])
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        cls.profiles = [
+            ElderlyProfile.objects.create(
+                family_member=family, name=f'Elderly {i}', dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location='Banani')
+            for i in range(7)
+        ]
+
+    def paginator(self, max_count=3):
+        paginator = EstimatedCountPaginator(ElderlyProfile.objects.order_by('id'), 2)
+        paginator.max_count = max_count
+        return paginator
+
+    def test_filtered_count_stops_at_max_count(self):
+        paginator = EstimatedCountPaginator(ElderlyProfile.objects.filter(gender='female').order_by('id'), 2)
+        paginator.max_count = 3
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.estimated)
+
+    def test_empty_page_after_deletes_serves_the_last_page(self):
+        # The highest id stays, so the estimate still counts the deleted rows
+        ElderlyProfile.objects.filter(id__in=[p.id for p in self.profiles[:4]]).delete()
+        paginator = self.paginator()
+        self.assertEqual((paginator.count, paginator.num_pages), (7, 4))
+
+        page = paginator.page(4)
+        self.assertEqual([e.id for e in page], [self.profiles[6].id])
+        self.assertEqual((paginator.count, paginator.num_pages, page.number), (3, 2, 2))
+        # The admin's page links are built from the page number it asked for
+        self.assertEqual(list(paginator.get_elided_page_range(4)), [1, 2])
+
+    def test_pages_with_rows_keep_the_estimate(self):
+        paginator = self.paginator()
+        self.assertEqual([e.id for e in paginator.page('4')], [self.profiles[6].id])
+        self.assertEqual(paginator.count, 7)
+
+
+class GeoTests(TestCase):
+    def assertCovered(self, latitude, longitude, radius_km):
+        prefixes = covering_prefixes(latitude, longitude, radius_km)
+        self.assertTrue(prefixes)
+        angle_to_edge = radius_km / EARTH_RADIUS_KM
+        lat1, lon1 = math.radians(latitude), math.radians(longitude)
+        for bearing in map(math.radians, range(0, 360, 5)):
+            for fraction in (0.25, 0.5, 0.999999):
+                # The point at this bearing and distance on the haversine sphere
+                angle = angle_to_edge * fraction
+                lat2 = math.asin(math.sin(lat1) * math.cos(angle)
+                                 + math.cos(lat1) * math.sin(angle) * math.cos(bearing))
+                lon2 = lon1 + math.atan2(math.sin(bearing) * math.sin(angle) * math.cos(lat1),
+                                         math.cos(angle) - math.sin(lat1) * math.sin(lat2))
+                lat, lon = math.degrees(lat2), (math.degrees(lon2) + 180.0) % 360.0 - 180.0
+                self.assertLessEqual(haversine_km(latitude, longitude, lat, lon), radius_km)
+                self.assertTrue(any(geohash_encode(lat, lon).startswith(p) for p in prefixes),
+                                (latitude, longitude, radius_km, lat, lon))
+
+    def test_no_prefixes_when_cells_cannot_cover_the_circle(self):
+        self.assertEqual(covering_prefixes(23.79, 90.41, 8000), [])
+        self.assertEqual(covering_prefixes(89.9, 0.0, 50), [])
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        for name, location in (('Banani', 'Banani'), ('Unknown', 'Somewhere else')):
+            ElderlyProfile.objects.create(
+                family_member=family, name=name, dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location=location)
+        # No prefix filter then, only the geocoded rows
+        self.assertEqual([e.name for e in filter_within(ElderlyProfile.objects.all(), 23.79, 90.41, 8000)], ['Banani'])
+
+    def test_covering_prefixes_across_cell_boundaries(self):
+        # 0,0 is a corner of every geohash cell; the antimeridian wraps
+        for latitude, longitude in ((0.0, 0.0), (23.7925, 90.4078), (10.0, 179.999), (-33.9, -0.0001), (70.0, 20.0)):
+            for radius_km in (0.5, 2, 25, 500):
+                self.assertCovered(latitude, longitude, radius_km)
+
+    def test_elderly_near(self):
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        caregiver_user = CustomUser.objects.create_user(
+            username='caregiver', email='caregiver@example.com', password='pass', role='caregiver')
+        caregiver = CaregiverProfile.objects.create(
+            user=caregiver_user, name='Caregiver', phone='0170000000', address='House 1, Gulshan',
+            dob=date(1990, 1, 1), gender='female', emergency_contact='0170000001')
+        for name, location in (('Near', 'Banani'), ('Far', 'Uttara'), ('Unknown', 'Somewhere else')):
+            ElderlyProfile.objects.create(
+                family_member=family, name=name, dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location=location)
+
+        self.assertEqual([e.name for _, e in elderly_near(caregiver, 2)], ['Near'])
+        nearby = elderly_near(caregiver, 15)
+        self.assertEqual([e.name for _, e in nearby], ['Near', 'Far'])
+        self.assertLess(nearby[0][0], nearby[1][0])
+
+    def test_admin_area_filter(self):
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        admin_user = CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', role='admin',
+            is_staff=True, is_superuser=True)
+        for name, location in (('Banani', 'House 3, Banani'), ('Gulshan', 'Gulshan'), ('Unknown', 'Somewhere')):
+            elderly = ElderlyProfile.objects.create(
+                family_member=family, name=name, dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location=location)
+            Schedule.objects.create(elderly=elderly, date=date(2030, 1, 1), start_time=time(9), end_time=time(10),
+                                    location=location, task_list='medication', hourly_rate=10)
+        self.client.force_login(admin_user)
+
+        for url_name, name in (('admin:core_elderlyprofile_changelist', lambda e: e.name),
+                               ('admin:core_schedule_changelist', lambda s: s.elderly.name)):
+            for area, expected in (('banani', ['Banani']), ('gulshan', ['Gulshan']), ('atlantis', [])):
+                with self.subTest(url_name=url_name, area=area):
+                    response = self.client.get(reverse(url_name), {'area': area})
+                    self.assertEqual([name(row) for row in response.context['cl'].result_list], expected)
+
+
+class MatchingTests(SimpleTestCase):
+    def test_rank(self):
+        def elderly(preference=''):
+            return ElderlyProfile(latitude=23.7925, longitude=90.4078, caregiver_gender_preference=preference)
+
+        def caregiver(id, gender, skills, latitude=23.7937, available=(time(8), time(12))):
+            return CaregiverProfile(id=id, gender=gender, skills=skills, hourly_rate=10, latitude=latitude,
+                                    longitude=90.4066, available_from=available[0], available_to=available[1])
+
+        visit = dict(start_time=time(9), end_time=time(10), task_list='Medication, walking', hourly_rate=10)
+        schedules = [Schedule(id=1, elderly=elderly(), **visit), Schedule(id=2, elderly=elderly('Male'), **visit)]
+        caregivers = [
+            caregiver(10, 'female', 'medication, walking'),
+            caregiver(11, 'male', 'medication'),
+            caregiver(12, 'female', 'medication, walking', latitude=24.5),  # ~80 km away
+            caregiver(13, 'male', 'medication, walking', available=(time(12), time(18))),
+        ]
+        features = build_features(schedules, caregivers)
+
+        for batch_size in (1, 512):
+            matches = rank(*features, batch_size=batch_size)
+            self.assertEqual([c for c, _ in matches[1]], [10, 11])
+            self.assertGreater(matches[1][0][1], matches[1][1][1])
+            # Only the male caregiver who is available and close enough
+            self.assertEqual([c for c, _ in matches[2]], [11])
+        self.assertEqual([c for c, _ in rank(*features, k=1)[1]], [10])
+
+
+class ScheduleFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        caregiver_user = CustomUser.objects.create_user(
+            username='caregiver', email='caregiver@example.com', password='pass', role='caregiver')
+        cls.caregiver = CaregiverProfile.objects.create(
+            user=caregiver_user, name='Caregiver', phone='0170000000', address='Gulshan',
+            dob=date(1990, 1, 1), gender='female', emergency_contact='0170000001')
+        cls.elderly, cls.other = [
+            ElderlyProfile.objects.create(
+                family_member=family, name=name, dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location='Banani')
+            for name in ('Rahima', 'Karim')
+        ]
+        cls.day = date(2030, 1, 1)
+        cls.visit = Schedule.objects.create(
+            elderly=cls.elderly, caregiver=cls.caregiver, date=cls.day, start_time=time(9),
+            end_time=time(10), location='Banani', task_list='medication', hourly_rate=10)
+
+    def form(self, start, end, elderly=None, instance=None, task_list='medication'):
+        return ScheduleForm({
+            'elderly': (elderly or self.elderly).id, 'date': self.day, 'start_time': start, 'end_time': end,
+            'location': 'Banani', 'task_list': task_list, 'hourly_rate': '10',
+        }, instance=instance)
+
+    def test_task_names_must_fit_the_catalogue(self):
+        form = self.form('11:00', '12:00', task_list=f"medication, {'x' * 101}")
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['task_list'][0].code, 'task_name_too_long')
+        self.assertTrue(self.form('11:00', '12:00', task_list=f"medication, {'x' * 100}").is_valid())
+
+        # Bulk uploads and imports validate each row with the same field
+        row = {'elderly': self.elderly.id, 'date': '2030-01-02', 'start_time': '09:00', 'end_time': '10:00',
+               'location': 'Banani', 'task_list': 'y' * 101, 'hourly_rate': '10'}
+        schedules, errors = create_schedules([row], family=self.elderly.family_member)
+        self.assertEqual((schedules, [error['row'] for error in errors]), ([], [1]))
+        self.assertIn('task_list', errors[0]['errors'])
+
+    def test_end_must_follow_start(self):
+        for start, end in (('11:00', '10:00'), ('11:00', '11:00')):
+            form = self.form(start, end)
+            self.assertFalse(form.is_valid())
+            self.assertEqual(form.errors['end_time'], ["End time must be after start time."])
+
+    def test_overlaps(self):
+        form = self.form('09:30', '10:30')
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), ["Rahima already has a visit at this time."])
+        # Back-to-back visits and other people's visits are fine
+        self.assertTrue(self.form('10:00', '11:00').is_valid())
+        self.assertTrue(self.form('09:00', '10:00', elderly=self.other).is_valid())
+
+    def test_editing_a_visit(self):
+        # A visit does not clash with itself...
+        self.assertTrue(self.form('09:15', '10:15', instance=self.visit).is_valid())
+        # ...but its caregiver cannot be double-booked
+        other_visit = Schedule.objects.create(
+            elderly=self.other, caregiver=self.caregiver, date=self.day, start_time=time(12),
+            end_time=time(13), location='Banani', task_list='medication', hourly_rate=10)
+        form = self.form('12:30', '13:30', instance=self.visit)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), ["The assigned caregiver already has a visit at this time."])
+        self.assertTrue(self.form('12:30', '13:30', elderly=self.other, instance=other_visit).is_valid())
+
+
+class RecurrenceTests(TestCase):
+    def test_expand(self):
+        start = date(2030, 1, 2)  # a Wednesday
+        self.assertEqual(list(expand(start, 'daily', interval=2, count=3)),
+                         [date(2030, 1, 2), date(2030, 1, 4), date(2030, 1, 6)])
+        # Monday and Wednesday every other week; the Monday before the start is skipped
+        self.assertEqual(list(expand(start, 'weekly', interval=2, weekdays=[0, 2], count=4)),
+                         [date(2030, 1, 2), date(2030, 1, 14), date(2030, 1, 16), date(2030, 1, 28)])
+        self.assertEqual(list(expand(start, 'weekly', until=date(2030, 1, 20))),
+                         [date(2030, 1, 2), date(2030, 1, 9), date(2030, 1, 16)])
+
+    def test_expand_window_matches_a_full_walk(self):
+        start = date(2030, 1, 2)
+        for frequency, interval, weekdays in (('daily', 3, []), ('weekly', 2, [1, 4, 6]), ('weekly', 1, [])):
+            every = list(expand(start, frequency, interval, weekdays, count=200))
+            window = (date(2031, 3, 5), date(2031, 6, 30))
+            self.assertEqual(
+                list(expand(start, frequency, interval, weekdays, count=200, window_start=window[0], window_end=window[1])),
+                [day for day in every if window[0] <= day <= window[1]],
+            )
+
+    def test_materialize_is_idempotent(self):
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        elderly = ElderlyProfile.objects.create(
+            family_member=family, name='Elderly', dob=date(1940, 1, 1), gender='female',
+            med_condition='None', location='Banani')
+        today = date(2030, 1, 1)
+        Schedule.objects.create(
+            elderly=elderly, date=date(2030, 1, 3), start_time=time(9, 30), end_time=time(10, 30),
+            location='Banani', task_list='walking', hourly_rate=10)
+        rule = ScheduleRule.objects.create(
+            elderly=elderly, frequency='daily', start_date=today, start_time=time(9), end_time=time(10),
+            location='Banani', task_list='medication', hourly_rate=10)
+
+        # Jan 1-7, minus the clash on Jan 3
+        self.assertEqual(materialize([rule], days=6, today=today), 6)
+        self.assertEqual(materialize([rule], days=6, today=today), 0)
+        # Forgetting the horizon re-expands the same dates, but creates nothing
+        ScheduleRule.objects.filter(pk=rule.pk).update(materialized_until=None)
+        self.assertEqual(materialize([rule], days=6, today=today), 0)
+        self.assertEqual(materialize([rule], days=8, today=today), 2)
+        self.assertEqual(Schedule.objects.filter(rule=rule).count(), 8)
+        self.assertEqual(ScheduleTask.objects.filter(schedule__rule=rule, task__name='medication').count(), 8)
+
+    def test_materialize_skips_caregiver_clashes_and_drops_cached_searches(self):
+        families = [
+            CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='pass', role='family')
+            for name in ('family', 'other')
+        ]
+        elderly, other = [
+            ElderlyProfile.objects.create(
+                family_member=family, name=family.username, dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location='Banani')
+            for family in families
+        ]
+        caregiver_user = CustomUser.objects.create_user(
+            username='caregiver', email='caregiver@example.com', password='pass', role='caregiver')
+        caregiver = CaregiverProfile.objects.create(
+            user=caregiver_user, name='Caregiver', phone='0170000000', address='Gulshan',
+            dob=date(1990, 1, 1), gender='female', emergency_contact='0170000001')
+        today = date(2030, 1, 1)
+        # The caregiver already visits someone else on Jan 2
+        Schedule.objects.create(
+            elderly=other, caregiver=caregiver, date=date(2030, 1, 2), start_time=time(9, 30),
+            end_time=time(10, 30), location='Banani', task_list='walking', hourly_rate=10)
+        rule = ScheduleRule.objects.create(
+            elderly=elderly, caregiver=caregiver, frequency='daily', start_date=today, start_time=time(9),
+            end_time=time(10), location='Banani', task_list='medication', hourly_rate=10)
+
+        version = scope_versions(['search'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(materialize([rule], days=2, today=today), 2)
+        self.assertEqual(sorted(Schedule.objects.filter(rule=rule).values_list('date', flat=True)),
+                         [date(2030, 1, 1), date(2030, 1, 3)])
+        self.assertNotEqual(scope_versions(['search']), version)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', role='admin', is_staff=True)
+        families = [
+            CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='pass', role='family')
+            for name in ('family', 'other')
+        ]
+        caregiver_user = CustomUser.objects.create_user(
+            username='caregiver', email='caregiver@example.com', password='pass', role='caregiver')
+        caregiver = CaregiverProfile.objects.create(
+            user=caregiver_user, name='Nadia', phone='0170000000', address='Gulshan',
+            dob=date(1990, 1, 1), gender='female', emergency_contact='0170000001')
+        cls.visits = []
+        for family, name in zip(families, ('Rahima', 'Karim')):
+            elderly = ElderlyProfile.objects.create(
+                family_member=family, name=name, dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location='Banani')
+            for day, start, end in ((date(2030, 1, 2), time(9), time(10, 30)), (date(2030, 2, 1), time(14), time(15))):
+                cls.visits.append(Schedule.objects.create(
+                    elderly=elderly, caregiver=caregiver if name == 'Rahima' else None, date=day,
+                    start_time=start, end_time=end, location='Banani', task_list='medication, walking',
+                    hourly_rate='12.50'))
+
+    def export(self, **params):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(reverse('export_schedules'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.export(end='2030-01-31'))))
+        rahima, karim = self.visits[0], self.visits[2]
+        self.assertEqual(rows, [
+            ['id', 'date', 'start_time', 'end_time', 'elderly_id', 'elderly_name', 'family_email', 'caregiver_name',
+             'location', 'task_list', 'hourly_rate', 'minutes', 'amount'],
+            [str(rahima.id), '2030-01-02', '09:00:00', '10:30:00', str(rahima.elderly_id), 'Rahima',
+             'family@example.com', 'Nadia', 'Banani', 'medication, walking', '12.50', '90', '18.75'],
+            [str(karim.id), '2030-01-02', '09:00:00', '10:30:00', str(karim.elderly_id), 'Karim',
+             'other@example.com', '', 'Banani', 'medication, walking', '12.50', '90', '18.75'],
+        ])
+
+    def test_family_filter_and_ndjson(self):
+        lines = self.export(format='ndjson', family='other@example.com', start='2030-01-15').splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual((row['id'], row['elderly_name'], row['minutes'], row['amount']),
+                         (self.visits[3].id, 'Karim', 60, '12.50'))
+
+    def test_bad_parameters(self):
+        self.client.force_login(self.admin_user)
+        self.assertEqual(self.client.get(reverse('export_schedules'), {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_schedules'), {'start': '2030-13-01'}).status_code, 400)
+
+
+class BillingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.family, cls.other = [
+            CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='pass', role='family')
+            for name in ('family', 'other')
+        ]
+        cls.elderly, cls.other_elderly = [
+            ElderlyProfile.objects.create(
+                family_member=family, name=name, dob=date(1940, 1, 1), gender='female',
+                med_condition='None', location='Banani')
+            for family, name in ((cls.family, 'Rahima'), (cls.other, 'Karim'))
+        ]
+        cls.month = date(2020, 1, 1)
+
+    def visit(self, elderly, day, start, end, rate):
+        return Schedule.objects.create(
+            elderly=elderly, date=day, start_time=start, end_time=end, location='Banani',
+            task_list='medication', hourly_rate=rate)
+
+    def test_monthly_totals(self):
+        # 90 min at 10.15 + 30 min at 0.01: 15.225 + 0.005 = 15.23 after one rounding
+        self.visit(self.elderly, date(2020, 1, 5), time(9), time(10, 30), '10.15')
+        self.visit(self.elderly, date(2020, 1, 31), time(9), time(9, 30), '0.01')
+        self.visit(self.other_elderly, date(2020, 1, 1), time(8), time(9), '12.00')
+        self.visit(self.elderly, date(2020, 2, 1), time(9), time(10), '99.00')
+
+        totals = {row['family']: row for row in monthly_totals(self.month)}
+        self.assertEqual(totals[self.family.id], {
+            'family': self.family.id, 'visits': 2, 'minutes': 120, 'total': Decimal('15.23')})
+        self.assertEqual(totals[self.other.id]['total'], Decimal('12.00'))
+        self.assertEqual(visit_cost(90, Decimal('10.15')), Decimal('15.23'))
+
+        self.assertEqual(generate_invoices(self.month), 2)
+        self.assertEqual(MonthlyInvoice.objects.get(family=self.family, month=self.month).total, Decimal('15.23'))
+
+    def test_closed_month_is_cached_until_a_visit_changes(self):
+        visit = self.visit(self.elderly, date(2020, 1, 5), time(9), time(10), '10.00')
+        self.visit(self.other_elderly, date(2020, 1, 5), time(9), time(10), '10.00')
+        generate_invoices(self.month)
+        self.assertEqual(family_month_total(self.family, self.month), Decimal('10.00'))
+        with record_queries() as recorder:
+            family_month_total(self.family, self.month)
+        self.assertEqual(recorder.count, 1)
+
+        visit.end_time = time(11)
+        visit.save()
+        self.assertEqual(family_month_total(self.family, self.month), Decimal('20.00'))
+        # Only the edited family's invoice was dropped
+        self.assertTrue(MonthlyInvoice.objects.filter(family=self.other, month=self.month).exists())
+
+        # Moving the visit to February updates both months
+        family_month_total(self.family, date(2020, 2, 1))
+        visit.date = date(2020, 2, 3)
+        visit.save()
+        self.assertEqual(family_month_total(self.family, self.month), Decimal('0.00'))
+        self.assertEqual(family_month_total(self.family, date(2020, 2, 1)), Decimal('20.00'))
+
+        visit.delete()
+        self.assertEqual(family_month_total(self.family, date(2020, 2, 1)), Decimal('0.00'))
+
+
+class TaskCatalogueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        cls.elderly = ElderlyProfile.objects.create(
+            family_member=family, name='Elderly', dob=date(1940, 1, 1), gender='female',
+            med_condition='None', location='Banani')
+        cls.day = date(2030, 1, 1)
+
+    def schedule(self, task_list, **fields):
+        fields = {'start_time': time(9), 'end_time': time(10), **fields}
+        return Schedule(elderly=self.elderly, date=self.day, location='Banani', task_list=task_list,
+                        hourly_rate=10, **fields)
+
+    def tasks(self, schedule):
+        return dict(ScheduleTask.objects.filter(schedule=schedule).values_list('task__name', 'completed'))
+
+    def test_data_migration(self):
+        # bulk_create() sends no post_save, like rows that predate the migration
+        first, second = Schedule.objects.bulk_create([
+            self.schedule(' Medication ,walking, medication,,'),
+            self.schedule('Walking', start_time=time(11), end_time=time(12)),
+        ])
+        migration = importlib.import_module('core.migrations.0008_task_catalogue')
+        migration.parse_task_lists(apps, None)
+
+        self.assertEqual(self.tasks(first), {'medication': False, 'walking': False})
+        self.assertEqual(self.tasks(second), {'walking': False})
+        self.assertEqual(sorted(Task.objects.values_list('name', flat=True)), ['medication', 'walking'])
+
+    def test_sync_on_save_keeps_completed_tasks(self):
+        schedule = self.schedule('Medication, walking')
+        schedule.save()
+        ScheduleTask.objects.filter(schedule=schedule, task__name='medication').update(completed=True)
+        self.assertEqual(list(visits_needing('Walking', self.day)), [schedule])
+
+        schedule.task_list = 'medication, bathing'
+        with record_queries() as recorder:
+            sync_schedule_tasks([schedule])
+        self.assertEqual(self.tasks(schedule), {'medication': True, 'bathing': False})
+        # Task insert and lookup, link lookup, one delete, link insert
+        self.assertLessEqual(recorder.count, 7)
+        self.assertEqual(list(visits_needing('walking', self.day)), [])
+        self.assertEqual(list(visits_needing('medication', self.day)), [])
+
+    def test_visits_needing_a_blank_name(self):
+        self.schedule('medication').save()
+        for name in ('', '  ', ' , '):
+            self.assertEqual(list(visits_needing(name, self.day)), [])
+
+
+@skipUnless(connection.vendor == 'sqlite', "FTS5 is SQLite specific")
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.family = CustomUser.objects.create_user(
+            username='family', email='family@example.com', password='pass', role='family')
+        cls.other_family = CustomUser.objects.create_user(
+            username='other', email='walker@example.com', password='pass', role='family')
+        cls.amina = cls.profile('Amina Begum', 'Diabetes', 'Gulshan')
+        cls.walker = cls.profile('Karim Walker', 'Walking difficulty', 'Walkers Lane, Banani')
+        cls.nasima = cls.profile('Nasima', 'Hypertension', 'Dhanmondi', family=cls.other_family)
+
+    @classmethod
+    def profile(cls, name, med_condition, location, family=None):
+        return ElderlyProfile.objects.create(
+            family_member=family or cls.family, name=name, dob=date(1940, 1, 1), gender='female',
+            med_condition=med_condition, location=location)
+
+    def search(self, query):
+        return get_backend().search(query)
+
+    def test_prefix_and_ranking(self):
+        self.assertEqual(self.search('diab'), [self.amina.id])
+        self.assertEqual(self.search('AMI begu'), [self.amina.id])
+        self.assertEqual(self.search('diab gulshan'), [self.amina.id])
+        self.assertEqual(self.search('diab banani'), [])
+        self.assertEqual(self.search('  '), [])
+
+        Schedule.objects.create(
+            elderly=self.amina, date=date(2030, 1, 1), start_time=time(9), end_time=time(10),
+            location='Gulshan', task_list='Walking', hourly_rate=10)
+        # "walk" appears in three of Karim's columns and once in Amina's tasks
+        self.assertEqual(self.search('walk'), [self.walker.id, self.amina.id])
+
+    def test_signals_keep_the_index_in_sync(self):
+        self.amina.name = 'Amena Khatun'
+        self.amina.save()
+        self.assertEqual(self.search('amina'), [])
+        self.assertEqual(self.search('khatun'), [self.amina.id])
+
+        visit = Schedule.objects.create(
+            elderly=self.nasima, date=date(2030, 1, 1), start_time=time(9), end_time=time(10),
+            location='Dhanmondi', task_list='Physiotherapy', hourly_rate=10)
+        self.assertEqual(self.search('physio'), [self.nasima.id])
+        visit.task_list = 'Medication'
+        visit.save()
+        self.assertEqual(self.search('physio'), [])
+        visit.delete()
+        self.assertEqual(self.search('medication'), [])
+
+        self.nasima.delete()
+        self.assertEqual(self.search('nasima'), [])
+
+    def test_admin_search(self):
+        admin_user = CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', role='admin',
+            is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+
+        def search(query):
+            response = self.client.get(reverse('admin:core_elderlyprofile_changelist'), {'q': query})
+            return [e.id for e in response.context['cl'].result_list]
+
+        self.assertEqual(search('walk'), [self.walker.id])
+        self.assertEqual(search('walker@example.com'), [self.nasima.id])
+        Schedule.objects.create(
+            elderly=self.nasima, date=date(2030, 1, 1), start_time=time(9), end_time=time(10),
+            location='Dhanmondi', task_list='Walking', hourly_rate=10)
+        # Rank order, not the changelist's default newest first
+        self.assertEqual(search('walk'), [self.walker.id, self.nasima.id])
+
+    def test_admin_visit_and_rule_search(self):
+        admin_user = CustomUser.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', role='admin',
+            is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        visit = dict(date=date(2030, 1, 1), start_time=time(9), end_time=time(10), hourly_rate=10)
+        amina_visit = Schedule.objects.create(elderly=self.amina, location='Gulshan', task_list='Medication', **visit)
+        nasima_visit = Schedule.objects.create(
+            elderly=self.nasima, location='Dhanmondi', task_list='Blood  Pressure check', **visit)
+        rule = ScheduleRule.objects.create(
+            elderly=self.amina, frequency='weekly', start_date=date(2030, 1, 1), start_time=time(9),
+            end_time=time(10), location='Gulshan', task_list='medication', hourly_rate=10)
+
+        def search(url_name, query):
+            response = self.client.get(reverse(url_name), {'q': query})
+            return {row.id for row in response.context['cl'].result_list}
+
+        self.assertEqual(search('admin:core_schedule_changelist', 'amina diab'), {amina_visit.id})
+        self.assertEqual(search('admin:core_schedule_changelist', 'blood pressure CHECK'), {nasima_visit.id})
+        self.assertEqual(search('admin:core_schedulerule_changelist', 'gulsh'), {rule.id})
+        self.assertEqual(search('admin:core_schedulerule_changelist', 'nasima'), set())
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.family, cls.other_family = [
+            CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='pass', role='family')
+            for name in ('family', 'other')
+        ]
+        cls.caregiver_user = CustomUser.objects.create_user(
+            username='caregiver', email='caregiver@example.com', password='pass', role='caregiver')
+
+    def setUp(self):
+        cache.clear()
+
+    def profile(self, name, family=None):
+        return ElderlyProfile.objects.create(
+            family_member=family or self.family, name=name, dob=date(1940, 1, 1), gender='female',
+            med_condition='None', location='Banani')
+
+    def test_family_table_follows_saves_and_deletes(self):
+        rahima = self.profile('Rahima')
+        self.client.force_login(self.family)
+        self.assertContains(self.client.get(reverse('family_dashboard')), 'Rahima')
+        with record_queries() as cached:
+            self.client.get(reverse('family_dashboard'))
+
+        # Another family's profile does not invalidate this family's table
+        version = scope_versions([f'family:{self.family.id}'])
+        self.profile('Karim', family=self.other_family)
+        self.assertEqual(scope_versions([f'family:{self.family.id}']), version)
+        with record_queries() as warm:
+            self.assertNotContains(self.client.get(reverse('family_dashboard')), 'Karim')
+        self.assertEqual(warm.count, cached.count)
+
+        rahima.name = 'Rahima Khatun'
+        rahima.save()
+        self.assertContains(self.client.get(reverse('family_dashboard')), 'Rahima Khatun')
+        rahima.delete()
+        self.assertNotContains(self.client.get(reverse('family_dashboard')), 'Rahima')
+
+    def test_moving_a_profile_invalidates_both_families(self):
+        rahima = self.profile('Rahima')
+        self.client.force_login(self.family)
+        self.assertContains(self.client.get(reverse('family_dashboard')), 'Rahima')
+        rahima.family_member = self.other_family
+        rahima.save()
+        self.assertNotContains(self.client.get(reverse('family_dashboard')), 'Rahima')
+        self.client.force_login(self.other_family)
+        self.assertContains(self.client.get(reverse('family_dashboard')), 'Rahima')
+
+    def test_caregiver_table(self):
+        rahima = self.profile('Rahima')
+        self.client.force_login(self.caregiver_user)
+        response = self.client.get(reverse('caregiver_dashboard'))
+        self.assertContains(response, 'Rahima')
+        # The CSRF field is filled in per request, never cached
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+        self.profile('Karim')
+        self.assertContains(self.client.get(reverse('caregiver_dashboard')), 'Karim')
+        self.assertNotContains(self.client.get(reverse('caregiver_dashboard'), {'q': 'walk'}), 'Rahima')
+        # Visits only change task search results
+        Schedule.objects.create(
+            elderly=rahima, date=date(2030, 1, 1), start_time=time(9), end_time=time(10),
+            location='Banani', task_list='Walking', hourly_rate=10)
+        self.assertContains(self.client.get(reverse('caregiver_dashboard'), {'q': 'walk'}), 'Rahima')
+        rahima.delete()
+        self.assertNotContains(self.client.get(reverse('caregiver_dashboard')), 'Rahima')
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite specific")
+class SQLitePragmaTests(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        fresh = connections.create_connection('default')
+        try:
+            with fresh.cursor() as cursor:
+                values = {}
+                for pragma in ('synchronous', 'busy_timeout', 'cache_size', 'temp_store'):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    values[pragma] = cursor.fetchone()[0]
+        finally:
+            fresh.close()
+        self.assertEqual(values, {
+            'synchronous': 1,  # NORMAL
+            'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'],
+            'cache_size': settings.SQLITE_PRAGMAS['cache_size'],
+            'temp_store': 2,  # MEMORY
+        })
+
+    def test_wal_is_set_by_the_migration(self):
+        migration = importlib.import_module('core.migrations.0011_sqlite_wal')
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'wal.sqlite3')
+            database = connections.create_connection('default')
+            database.settings_dict = {**database.settings_dict, 'NAME': path}
+            try:
+                migration.enable_wal(apps, SimpleNamespace(connection=database))
+            finally:
+                database.close()
+            db = sqlite3.connect(path)
+            try:
+                self.assertEqual(db.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            finally:
+                db.close()
+
+
+class SettingsTests(SimpleTestCase):
+    """Each DJANGO_ENV imports in a fresh interpreter, as a server would start."""
+
+    def run_python(self, code, *args, **env):
+        environ = {key: value for key, value in os.environ.items()
+                   if key not in ('DJANGO_ENV', 'DJANGO_SETTINGS_MODULE', 'SECRET_KEY', 'ALLOWED_HOSTS')}
+        return subprocess.run([sys.executable, '-c', code, *args], cwd=settings.BASE_DIR, env={**environ, **env},
+                              capture_output=True, text=True)
+
+    def load(self, **env):
+        return self.run_python('import backend.settings as s; print(s.DJANGO_ENV, s.DEBUG, s.USER_CACHE_ALIAS)', **env)
+
+    def test_environments(self):
+        for env, output in (
+            ({}, 'dev True None'),
+            ({'DJANGO_ENV': 'test'}, 'test False None'),
+            ({'DJANGO_ENV': 'prod', 'SECRET_KEY': 'x', 'ALLOWED_HOSTS': 'example.com'}, 'prod False default'),
+        ):
+            with self.subTest(env=env):
+                result = self.load(**env)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertEqual(result.stdout.strip(), output)
+
+    def test_prod_requires_secret_key_and_allowed_hosts(self):
+        for env, missing in (({'ALLOWED_HOSTS': 'example.com'}, 'SECRET_KEY'), ({'SECRET_KEY': 'x'}, 'ALLOWED_HOSTS')):
+            with self.subTest(missing=missing):
+                result = self.load(DJANGO_ENV='prod', **env)
+                self.assertNotEqual(result.returncode, 0)
+                self.assertIn(f'ImproperlyConfigured: Set {missing}', result.stderr)
+
+    def test_manage_py_test_selects_the_test_settings(self):
+        code = (
+            "import os, runpy, sys\n"
+            "from unittest import mock\n"
+            "sys.argv = ['manage.py', sys.argv[1]]\n"
+            "with mock.patch('django.core.management.execute_from_command_line'):\n"
+            "    runpy.run_path('manage.py', run_name='__main__')\n"
+            "print(os.environ.get('DJANGO_ENV'))\n"
+        )
+        for command, env, output in (('test', {}, 'test'), ('runserver', {}, 'None'), ('test', {'DJANGO_ENV': 'dev'}, 'dev')):
+            with self.subTest(command=command, env=env):
+                result = self.run_python(code, command, **env)
+                self.assertEqual(result.stdout.strip(), output, result.stderr)
@@ -1,9 +1,9 @@
 
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
-    path('', views.redirect_to_login),
+    path('', views.home, name='home'),
     path('signup/', views.signup_view, name='signup'),
     path('login/', views.login_view, name='login'),
     path('caregiver-dashboard/', views.caregiver_dashboard, name='caregiver_dashboard'),
@@ -12,5 +12,14 @@ urlpatterns = [
     path('family-dashboard/', views.family_dashboard, name='family_dashboard'),
     path('family/create-elderly/', views.create_elderly_profile, name='create_elderly_profile'),
     path('family/set-schedule/', views.set_schedule, name='set_schedule'),
+    path('family/set-recurring-schedule/', views.set_recurring_schedule, name='set_recurring_schedule'),
+    path('family/bulk-schedules/', views.bulk_schedules, name='bulk_schedules'),
+    path('export/schedules/', views.export_schedules, name='export_schedules'),
+    # ASGI-native versions of the busiest pages (see core/async_views.py)
+    path('async/login/', async_views.login_view, name='async_login'),
+    path('async/caregiver-dashboard/', async_views.caregiver_dashboard, name='async_caregiver_dashboard'),
+    path('async/caregiver/confirm/<int:elderly_id>/', async_views.confirm_caregiving, name='async_confirm_caregiving'),
+    path('async/family-dashboard/', async_views.family_dashboard, name='async_family_dashboard'),
+    path('async/family/set-schedule/', async_views.set_schedule, name='async_set_schedule'),
 ]
 
@@ -1,6 +1,7 @@
 # core/views.py
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
+from .backends import LoginBusy
 from .forms import SignUpForm
 from core.factories.user_factory import UserFactory
 from django.contrib import messages
@@ -29,31 +30,60 @@ def signup_view(request):
     return render(request, 'core/signup.html', {'form': form})
 
 
+# Where each role lands after logging in
+LOGIN_DASHBOARDS = {
+    'caregiver': 'caregiver_dashboard',
+    'family': 'family_dashboard',
+    'admin': 'admin_dashboard',
+}
+
+
 def login_view(request):
     if request.method == 'POST':
-        user = authenticate(request, username=request.POST['email'], password=request.POST['password'])
+        try:
+            user = authenticate(request, username=request.POST['email'], password=request.POST['password'])
+        except LoginBusy:
+            return login_busy(request)
         if user:
             login(request, user)
-            if user.role == 'caregiver':
-                return redirect('caregiver_dashboard')
-            elif user.role == 'family':
-                return redirect('family_dashboard')
-            elif user.role == 'admin':
-                return redirect('admin_dashboard')
+            if user.role in LOGIN_DASHBOARDS:
+                return redirect(LOGIN_DASHBOARDS[user.role])
         else:
             messages.error(request, "Invalid credentials")
     return render(request, 'core/login.html')
+
+
+def login_busy(request):
+    """The hashing pool is full (see core.backends): ask to retry shortly."""
+    messages.error(request, "We're handling a lot of logins right now. Please try again in a moment.")
+    response = render(request, 'core/login.html', status=503)
+    response['Retry-After'] = '5'
+    return response
 # core/views.py
-from django.shortcuts import redirect
+from django.shortcuts import render
 
-def redirect_to_login(request):
-    return redirect('login')
+def home(request):
+    return render(request, 'core/home.html')
 # core/views.py
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
-from .forms import CaregiverProfileForm, ElderlyProfileForm, ScheduleForm
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_POST
+from .forms import CaregiverProfileForm, ElderlyProfileForm, ScheduleForm, ScheduleRuleForm
 from .models import CaregiverProfile, ElderlyProfile, Schedule
 from django.contrib import messages
+from django.conf import settings
+from datetime import date
+import hashlib
+from .bulk import create_schedules, read_rows
+from .caching import CSRF_PLACEHOLDER, cached_fragment
+from .exports import csv_stream, ndjson_stream, schedule_export_queryset, schedule_rows
+from .intervals import find_conflicts
+from .pagination import KeysetPage
+from .recurrence import materialize
+from .search import get_backend
 
 @login_required
 def caregiver_dashboard(request):
@@ -63,12 +93,56 @@ def caregiver_dashboard(request):
     except CaregiverProfile.DoesNotExist:
         profile = None
 
-    # List elderly profiles to show (all elderly + caregiving info)
-    elderly_list = ElderlyProfile.objects.all()
+    # List elderly profiles to show, one keyset page at a time
+    name, scopes, (query, after, before, page_size) = caregiver_table_params(request)
+    elderly_table = cached_fragment(
+        request, name, scopes, lambda: render_caregiver_table(query, after, before, page_size),
+    )
 
     return render(request, 'core/caregiver_dashboard.html', {
         'profile': profile,
+        'elderly_table': elderly_table,
+        'query': query,
+    })
+
+def caregiver_table_params(request):
+    """
+    Parse the caregiver table's query string. Returns the fragment cache
+    name, its scopes and ``(query, after, before, page_size)``.
+    """
+    page_size = settings.CAREGIVER_DASHBOARD_PAGE_SIZE
+    try:
+        page_size = min(max(int(request.GET['page_size']), 1), settings.CAREGIVER_DASHBOARD_MAX_PAGE_SIZE)
+    except (KeyError, ValueError):
+        pass
+    query = request.GET.get('q', '').strip()
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+
+    # The table is the same for every caregiver, so it is cached once per
+    # page/query rather than per user
+    params = (query, after, before, page_size)
+    name = 'caregiver-table:' + hashlib.md5(repr(params).encode()).hexdigest()
+    return name, ['elderly', 'search'] if query else ['elderly'], params
+
+def render_caregiver_table(query, after, before, page_size):
+    elderly_list = ElderlyProfile.objects.only('id', 'name', 'dob', 'med_condition', 'location')
+    if query:
+        # Best matches first; search results are not paginated
+        ids = get_backend().search(query, limit=page_size)
+        found = elderly_list.in_bulk(ids)
+        page = None
+        elderly_list = [found[elderly_id] for elderly_id in ids if elderly_id in found]
+    else:
+        page = KeysetPage(elderly_list, after=after, before=before, page_size=page_size)
+        elderly_list = page
+    return caregiver_table_html(elderly_list, page)
+
+def caregiver_table_html(elderly_list, page):
+    return render_to_string('core/caregiver_elderly_table.html', {
         'elderly_list': elderly_list,
+        'page': page,
+        'csrf_placeholder': CSRF_PLACEHOLDER,
     })
 
 @login_required
@@ -91,18 +165,59 @@ def create_caregiver_profile(request):
         form = CaregiverProfileForm()
     return render(request, 'core/create_caregiver_profile.html', {'form': form})
 
-@login_required
+def is_caregiver(user):
+    return user.is_authenticated and user.role == 'caregiver'
+
+def assign_open_visits(elderly, caregiver):
+    """
+    Give ``caregiver`` the elderly person's open upcoming visits, skipping any
+    that clash with visits the caregiver already has. Returns the number of
+    visits assigned and skipped.
+    """
+    open_visits = list(Schedule.objects.filter(
+        elderly=elderly, caregiver__isnull=True, date__gte=date.today(),
+    ).only('id', 'date', 'start_time', 'end_time'))
+    dates = {visit.date for visit in open_visits}
+    booked = Schedule.objects.filter(caregiver=caregiver, date__in=dates).only('id', 'date', 'start_time', 'end_time')
+    clashes = find_conflicts(
+        [(visit.date, visit.start_time, visit.end_time, visit.id) for visit in open_visits],
+        existing=[(visit.date, visit.start_time, visit.end_time, visit.id) for visit in booked],
+    )
+    skipped = {visit_id for visit_id, _ in clashes}
+    assigned = Schedule.objects.filter(
+        id__in=[visit.id for visit in open_visits if visit.id not in skipped],
+    ).update(caregiver=caregiver)
+    return assigned, len(skipped)
+
+def report_assignment(request, elderly, assigned, skipped):
+    messages.success(request, f'Caregiving for {elderly.name} confirmed ({assigned} visits assigned).')
+    if skipped:
+        messages.warning(request, f'{skipped} visits clash with your existing schedule and were not assigned.')
+
+@require_POST
+@user_passes_test(is_caregiver)
 def confirm_caregiving(request, elderly_id):
     elderly = get_object_or_404(ElderlyProfile, id=elderly_id)
-    # Here you can implement confirm logic: e.g. create a relationship, send notification, etc.
-    messages.success(request, f'Caregiving for {elderly.name} confirmed.')
+    try:
+        profile = request.user.caregiverprofile
+    except CaregiverProfile.DoesNotExist:
+        messages.error(request, 'Create your profile before confirming caregiving.')
+        return redirect('create_caregiver_profile')
+
+    assigned, skipped = assign_open_visits(elderly, profile)
+    report_assignment(request, elderly, assigned, skipped)
     return redirect('caregiver_dashboard')
 
 @login_required
 def family_dashboard(request):
     # List elderly profiles created by this family user
-    elderly_list = ElderlyProfile.objects.filter(family_member=request.user)
-    return render(request, 'core/family_dashboard.html', {'elderly_list': elderly_list})
+    elderly_table = cached_fragment(
+        request, f'family-table:{request.user.id}', [f'family:{request.user.id}'],
+        lambda: render_to_string('core/family_elderly_table.html', {
+            'elderly_list': ElderlyProfile.objects.filter(family_member=request.user),
+        }),
+    )
+    return render(request, 'core/family_dashboard.html', {'elderly_table': elderly_table})
 
 @login_required
 def create_elderly_profile(request):
@@ -131,3 +246,77 @@ def set_schedule(request):
     # Limit elderly choices to only those of logged in family member
     form.fields['elderly'].queryset = ElderlyProfile.objects.filter(family_member=request.user)
     return render(request, 'core/set_schedule.html', {'form': form})
+
+
+@login_required
+def set_recurring_schedule(request):
+    if request.method == 'POST':
+        form = ScheduleRuleForm(request.POST)
+        form.fields['elderly'].queryset = ElderlyProfile.objects.filter(family_member=request.user)
+        if form.is_valid():
+            rule = form.save()
+            created = materialize([rule])
+            messages.success(request, f'Recurring schedule set ({created} upcoming visits added).')
+            return redirect('family_dashboard')
+    else:
+        form = ScheduleRuleForm()
+    form.fields['elderly'].queryset = ElderlyProfile.objects.filter(family_member=request.user)
+    return render(request, 'core/set_recurring_schedule.html', {'form': form})
+
+
+def is_staff_or_admin(user):
+    return user.is_authenticated and (user.is_staff or user.role == 'admin')
+
+
+@login_required
+@require_POST
+def bulk_schedules(request):
+    """
+    Create many visits at once from a JSON array or CSV (request body, or a
+    ``file`` upload). Responds with the number created and per-row errors.
+    """
+    try:
+        if request.content_type == 'multipart/form-data':
+            upload = request.FILES['file']
+            data = upload.read().decode('utf-8-sig')
+            data_format = 'csv' if upload.name.lower().endswith('.csv') else 'json'
+        else:
+            data = request.body.decode('utf-8-sig')
+            data_format = 'csv' if request.content_type == 'text/csv' else 'json'
+        rows = read_rows(data, data_format)
+    except KeyError:
+        return JsonResponse({'error': 'Upload the batch as "file".'}, status=400)
+    except (UnicodeDecodeError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if len(rows) > settings.BULK_SCHEDULE_MAX_ROWS:
+        return JsonResponse({'error': f'At most {settings.BULK_SCHEDULE_MAX_ROWS} rows per request.'}, status=400)
+
+    # Families may only schedule their own elderly profiles
+    family = None if is_staff_or_admin(request.user) else request.user
+    schedules, errors = create_schedules(rows, family=family)
+    return JsonResponse({'created': len(schedules), 'errors': errors}, status=201 if schedules else 400)
+
+
+@user_passes_test(is_staff_or_admin)
+def export_schedules(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return HttpResponseBadRequest('format must be csv or ndjson')
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.GET.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            return HttpResponseBadRequest(f'{name} must be a YYYY-MM-DD date')
+
+    queryset = schedule_export_queryset(dates['start'], dates['end'], request.GET.get('family'))
+    rows = schedule_rows(queryset)
+    if export_format == 'csv':
+        response = StreamingHttpResponse(csv_stream(rows), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(ndjson_stream(rows), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="schedules.{export_format}"'
+    return response